@@ -0,0 +1,449 @@
+"""
+HTTP API заданий обработки расшифровок.
+
+Запускается внутри процесса Streamlit (секция [api] config.toml, enabled = true)
+и тогда использует те же стратегии, регулятор запросов к моделям, кэш результатов
+шагов и таблицу заданий, что и интерфейс. Может быть запущен и отдельно:
+
+    python app/api_server.py
+
+В этом случае с интерфейсом можно разделять кэш sqlite/redis и таблицу заданий:
+задания закреплены за процессом, который их выполняет, и прерванными помечаются
+только задания завершившихся процессов.
+
+Методы:
+    GET  /api/models                 - доступные модели
+    POST /api/jobs                   - запуск обработки (JSON или multipart с файлом)
+    GET  /api/jobs/<job_id>          - состояние и результат задания
+    GET  /api/jobs/<job_id>/events   - прогресс и результат (Server-Sent Events)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+import toml
+import tornado.iostream
+import tornado.web
+from tornado.ioloop import IOLoop
+from chat_strategies.chat_model_strategy import ChatModelStrategy
+from chat_strategies.registry import (
+    find_strategy_for_model,
+    initialize_available_strategies,
+)
+from processing.terms_index import select_relevant_terms
+from processing.transcript_cleaning import clean_transcript
+from ui.processing_steps import process_all_summaries, process_initial_steps
+from utils.cache_backends import DEFAULT_TTL_HOURS, get_cache_backend
+from utils.common import step_response_to_markdown
+from utils.job_runner import JOB_DONE, JOB_FAILED, get_job_runner
+from utils.llm_scheduler import (
+    PRIORITY_BATCH,
+    configure_llm_scheduler,
+    llm_request_context,
+)
+from utils.metrics import start_metrics_server
+from utils.step_memo import StepMemo
+from utils.tracing import configure_tracing
+
+DEFAULT_API_PORT = 8502
+DEFAULT_API_ADDRESS = "127.0.0.1"
+# Количество заданий API, которые могут одновременно ожидать или выполняться;
+# остальные запросы получают 429, чтобы не вытеснять задания интерфейса
+DEFAULT_MAX_ACTIVE_JOBS = 2
+DEFAULT_SUMMARY_ITERATIONS = 3
+# Интервал проверки состояния задания для потока событий, секунд
+EVENTS_POLL_INTERVAL = 0.5
+# Если задан, запросы должны содержать заголовок "Authorization: Bearer <токен>"
+API_TOKEN_ENV = "LLM_RECUP_API_TOKEN"
+
+JOB_KIND = "api"
+PREPARE_STEPS_CNT = 3
+
+
+def run_pipeline_job(
+    chat_strategy: ChatModelStrategy,
+    file_content: str,
+    model_name: str,
+    steps: Dict[str, Any],
+    terms_content: Optional[str],
+    summary_iterations: Optional[int],
+    memo: StepMemo,
+    progress_callback: Callable[..., None] = None,
+) -> Dict[str, Any]:
+    """
+    Задание API: начальные шаги анализа и, если summary_iterations не None,
+    итоги с summary_iterations итерациями улучшения
+    """
+    responses, stats, df_participation = process_initial_steps(
+        chat_strategy,
+        file_content,
+        model_name,
+        steps,
+        terms_content,
+        memo=memo,
+        progress_callback=progress_callback,
+    )
+    result = {
+        "responses": responses,
+        "stats": stats,
+        "participation": df_participation.to_dict(orient="records"),
+    }
+    if summary_iterations is not None:
+        summaries = process_all_summaries(
+            chat_strategy,
+            file_content,
+            model_name,
+            responses["analyze_metadata"],
+            step_response_to_markdown(
+                responses["analyze_recognition_errors"],
+                steps.get("analyze_recognition_errors", {}),
+            ),
+            steps.get("generate_summary", {}),
+            steps.get("refine_summary", {}),
+            iterations=summary_iterations,
+            terms_file=terms_content,
+            memo=memo,
+            progress_callback=progress_callback,
+        )
+        result["summaries"] = [
+            {"response": response, "stats": stats} for response, stats in summaries
+        ]
+    return result
+
+
+def prepare_input(
+    params: Dict[str, str], cleaning_config: Dict[str, Any]
+) -> Tuple[str, Optional[str]]:
+    """
+    Проверка расшифровки и подготовка входных данных задания
+    (очистка текста и отбор терминов, если они запрошены)
+
+    Returns:
+    --------
+    Tuple[str, Optional[str]]
+        Содержимое файла диалога и словарь терминов
+    """
+    try:
+        turns = json.loads(params.get("transcript") or "null")
+    except ValueError:
+        raise tornado.web.HTTPError(400, "transcript: некорректный JSON")
+    if not isinstance(turns, list) or not all(
+        isinstance(turn, dict) and {"speaker", "message"} <= turn.keys()
+        for turn in turns
+    ):
+        raise tornado.web.HTTPError(
+            400, "transcript: ожидается список реплик {speaker, message}"
+        )
+
+    file_content = json.dumps(turns, ensure_ascii=False, indent=2)
+    if _flag(params.get("clean"), False):
+        file_content, _, _ = clean_transcript(file_content, cleaning_config)
+    terms_content = params.get("terms") or None
+    if terms_content and _flag(params.get("filter_terms"), False):
+        terms_content, _, _ = select_relevant_terms(terms_content, file_content)
+    return file_content, terms_content
+
+
+class ApiHandler(tornado.web.RequestHandler):
+    """Общая часть обработчиков: проверка токена и ответы в JSON"""
+
+    def initialize(self, app_state: Dict[str, Any]):
+        self.app_state = app_state
+
+    def prepare(self):
+        token = os.environ.get(API_TOKEN_ENV)
+        if token and self.request.headers.get("Authorization") != f"Bearer {token}":
+            raise tornado.web.HTTPError(401)
+
+    def write_json(self, data: Any, status: int = 200):
+        self.set_status(status)
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        self.finish(json.dumps(data, ensure_ascii=False))
+
+    def write_error(self, status_code: int, **kwargs):
+        # Статус уже установлен tornado; текст ошибки - сообщение HTTPError
+        exception = kwargs.get("exc_info", (None, None, None))[1]
+        error = getattr(exception, "log_message", None) or self._reason
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        self.finish(json.dumps({"error": error}, ensure_ascii=False))
+
+
+class ModelsHandler(ApiHandler):
+    def get(self):
+        self.write_json(
+            {
+                provider: strategy.get_models()
+                for provider, strategy in self.app_state["strategies"].items()
+            }
+        )
+
+
+class JobsHandler(ApiHandler):
+    async def post(self):
+        """
+        Запуск обработки. Параметры передаются в JSON или полями формы:
+        transcript - расшифровка (список реплик; в форме - файл или поле),
+        model - имя модели, terms - словарь терминов (в форме - файл или поле),
+        summaries - строить ли итоги (по умолчанию да), iterations - количество
+        итераций улучшения итогов, clean - очищать ли текст, filter_terms -
+        оставлять ли в словаре только термины, встречающиеся в тексте
+        """
+        params = self._read_params()
+        strategies = self.app_state["strategies"]
+        model_name = (
+            params.get("model") or next(iter(strategies.values())).get_models()[0]
+        )
+        chat_strategy = find_strategy_for_model(strategies, model_name)
+        if chat_strategy is None:
+            raise tornado.web.HTTPError(400, f"Неизвестная модель {model_name}")
+
+        summary_iterations = None
+        if _flag(params.get("summaries"), True):
+            try:
+                summary_iterations = int(
+                    params.get("iterations") or DEFAULT_SUMMARY_ITERATIONS
+                )
+            except ValueError:
+                raise tornado.web.HTTPError(400, "iterations: ожидается число")
+
+        config = self.app_state["config"]
+        api_config = config.get("api", {})
+        runner = get_job_runner()
+        # Место в очереди занимается до подготовки входных данных: иначе
+        # одновременные запросы прошли бы проверку, пока готовятся их данные.
+        # Проверка и занятие места выполняются в потоке IOLoop без переключений
+        if runner.count_active_jobs(JOB_KIND) + self.app_state[
+            "pending_jobs"
+        ] >= api_config.get("max_active_jobs", DEFAULT_MAX_ACTIVE_JOBS):
+            self.set_header("Retry-After", "10")
+            self.write_json({"error": "Очередь заданий заполнена"}, 429)
+            return
+        self.app_state["pending_jobs"] += 1
+
+        try:
+            # Разбор, очистка текста и отбор терминов большой расшифровки занимают
+            # заметное время, поэтому выполняются вне потока IOLoop, чтобы
+            # не задерживать другие запросы и потоки событий (/events)
+            file_content, terms_content = await IOLoop.current().run_in_executor(
+                None, prepare_input, params, config.get("cleaning", {})
+            )
+
+            # Запросы заданий API уступают место интерактивным запросам интерфейса
+            client_id = self.request.headers.get("X-Client-Id", "default")
+            session_id = f"api:{client_id}"
+            with llm_request_context(session_id, PRIORITY_BATCH):
+                job_id = runner.submit(
+                    session_id,
+                    JOB_KIND,
+                    run_pipeline_job,
+                    chat_strategy,
+                    file_content,
+                    model_name,
+                    config.get("steps", {}),
+                    terms_content,
+                    summary_iterations,
+                    self.app_state["memo"],
+                    progress_total=PREPARE_STEPS_CNT
+                    + (summary_iterations + 1 if summary_iterations is not None else 0),
+                )
+        finally:
+            self.app_state["pending_jobs"] -= 1
+        self.write_json(
+            {
+                "job_id": job_id,
+                "status_url": f"/api/jobs/{job_id}",
+                "events_url": f"/api/jobs/{job_id}/events",
+            },
+            202,
+        )
+
+    def _read_params(self) -> Dict[str, str]:
+        """Параметры запроса из тела JSON или из полей и файлов формы"""
+        if self.request.headers.get("Content-Type", "").startswith("application/json"):
+            try:
+                body = json.loads(self.request.body)
+            except ValueError:
+                raise tornado.web.HTTPError(400, "Некорректный JSON")
+            if not isinstance(body, dict):
+                raise tornado.web.HTTPError(400, "Ожидается объект JSON")
+            return {
+                key: value if isinstance(value, str) else json.dumps(value)
+                for key, value in body.items()
+            }
+
+        params = {
+            key: self.get_body_argument(key) for key in self.request.body_arguments
+        }
+        for key, files in self.request.files.items():
+            try:
+                params[key] = files[0]["body"].decode("utf-8")
+            except UnicodeDecodeError:
+                raise tornado.web.HTTPError(400, f"{key}: ожидается файл в UTF-8")
+        return params
+
+
+class JobHandler(ApiHandler):
+    def get(self, job_id: str):
+        self.write_json(_get_job(job_id))
+
+
+class JobEventsHandler(ApiHandler):
+    async def get(self, job_id: str):
+        """
+        Поток событий задания: progress после каждого шага, step с результатом
+        каждого шага подготовки по мере завершения, затем result (результат
+        задания) или error
+        """
+        job = _get_job(job_id)
+        self.set_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.set_header("Cache-Control", "no-cache")
+        sent_progress = None
+        sent_steps = set()
+        try:
+            while True:
+                for step, step_result in (job["partial_result"] or {}).items():
+                    if step not in sent_steps:
+                        sent_steps.add(step)
+                        await self._send_event("step", {"step": step, **step_result})
+                progress = (job["status"], job["progress_done"])
+                if progress != sent_progress:
+                    sent_progress = progress
+                    await self._send_event(
+                        "progress",
+                        {
+                            key: job[key]
+                            for key in [
+                                "status",
+                                "progress_done",
+                                "progress_total",
+                                "progress_label",
+                            ]
+                        },
+                    )
+                if job["status"] == JOB_DONE:
+                    await self._send_event("result", job["result"])
+                    break
+                if job["status"] == JOB_FAILED:
+                    await self._send_event("error", {"error": job["error"]})
+                    break
+                await asyncio.sleep(EVENTS_POLL_INTERVAL)
+                job = _get_job(job_id)
+        except tornado.iostream.StreamClosedError:
+            # Клиент отключился; задание продолжает выполняться
+            return
+        self.finish()
+
+    async def _send_event(self, event: str, data: Any):
+        self.write(f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n")
+        await self.flush()
+
+
+def _get_job(job_id: str) -> Dict[str, Any]:
+    job = get_job_runner().get_job(job_id)
+    if job is None or job["kind"] != JOB_KIND:
+        raise tornado.web.HTTPError(404, "Задание не найдено")
+    return job
+
+
+def _flag(value: Optional[str], default: bool) -> bool:
+    """Логический параметр запроса ("true"/"false", "1"/"0")"""
+    if value is None or value == "":
+        return default
+    return value.lower() in ("true", "1", "yes")
+
+
+def make_api_app(
+    config: Dict[str, Any], strategies: Dict[str, ChatModelStrategy]
+) -> tornado.web.Application:
+    """
+    Создает приложение tornado с методами API
+
+    Parameters:
+    -----------
+    config: Dict[str, Any]
+        Полная конфигурация приложения (config.toml)
+    strategies: Dict[str, ChatModelStrategy]
+        Доступные стратегии работы с моделями
+    """
+    cache_config = config.get("cache", {})
+    app_state = {
+        "config": config,
+        "strategies": strategies,
+        "memo": StepMemo(
+            backend=get_cache_backend(cache_config),
+            ttl=cache_config.get("ttl_hours", DEFAULT_TTL_HOURS) * 3600,
+        ),
+        # Запросы, входные данные которых еще готовятся (задание не создано)
+        "pending_jobs": 0,
+    }
+    return tornado.web.Application(
+        [
+            (r"/api/models", ModelsHandler, {"app_state": app_state}),
+            (r"/api/jobs", JobsHandler, {"app_state": app_state}),
+            (r"/api/jobs/(\w+)", JobHandler, {"app_state": app_state}),
+            (r"/api/jobs/(\w+)/events", JobEventsHandler, {"app_state": app_state}),
+        ]
+    )
+
+
+async def serve_api(config: Dict[str, Any], strategies: Dict[str, ChatModelStrategy]):
+    """Запускает API и обслуживает запросы до остановки цикла событий"""
+    api_config = config.get("api", {})
+    make_api_app(config, strategies).listen(
+        api_config.get("port", DEFAULT_API_PORT),
+        api_config.get("address", DEFAULT_API_ADDRESS),
+        max_body_size=api_config.get("max_body_mb", 50) * 1024 * 1024,
+    )
+    logging.info(
+        f"API заданий запущено на порту {api_config.get('port', DEFAULT_API_PORT)}"
+    )
+    await asyncio.Event().wait()
+
+
+_api_thread: Optional[threading.Thread] = None
+_api_thread_lock = threading.Lock()
+
+
+def start_api_server(config: Dict[str, Any]):
+    """
+    Запускает API в фоновом потоке текущего процесса, если оно включено
+    в секции [api] config.toml. Повторные вызовы ничего не делают
+    """
+    global _api_thread
+    if not config.get("api", {}).get("enabled"):
+        return
+    with _api_thread_lock:
+        if _api_thread is not None:
+            return
+        strategies = initialize_available_strategies()
+        if not strategies:
+            logging.error("API заданий не запущено: не настроен ни один провайдер")
+            return
+
+        def run():
+            try:
+                asyncio.run(serve_api(config, strategies))
+            except Exception:
+                logging.exception("API заданий остановлено с ошибкой")
+
+        _api_thread = threading.Thread(target=run, name="api", daemon=True)
+        _api_thread.start()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+    )
+    with open("config.toml", "r", encoding="utf-8") as f:
+        app_config = toml.load(f)
+    configure_llm_scheduler(app_config.get("scheduler", {}))
+    configure_tracing(app_config.get("tracing", {}))
+    start_metrics_server(app_config.get("metrics", {}))
+    available_strategies = initialize_available_strategies()
+    if not available_strategies:
+        raise SystemExit("No API keys found. Please configure at least one provider.")
+    asyncio.run(serve_api(app_config, available_strategies))
@@ -0,0 +1,11 @@
+"""
+Офлайн-бенчмарки приложения. Запросы к моделям обслуживает FakeChatStrategy,
+поэтому бенчмарки не требуют ключей API и ничего не стоят.
+
+Запуск из каталога app:
+
+    python -m benchmarks.pipeline_benchmark
+
+Результаты сохраняются в Data/benchmarks; с параметром --baseline результаты
+сравниваются с ранее сохраненными.
+"""
@@ -0,0 +1,167 @@
+"""
+Бенчмарк локальной обработки данных на странице для расшифровок от тысячи
+до миллиона реплик: разбор и форматирование загруженного JSON
+(render_main_interface), calculate_speaker_participation,
+extract_table_to_dataframe и process_text_for_display.
+
+Время каждой функции измеряется без трассировки памяти (медиана --repeat
+запусков), пиковая память - отдельным запуском под tracemalloc (учитываются
+только выделения во время вызова, без входных данных).
+
+Размер ответов модели растет вместе с расшифровкой: строка таблицы ошибок
+распознавания на каждые ERRORS_TABLE_TURNS реплик и раздел итогов на каждые
+SUMMARY_SECTION_TURNS реплик.
+
+    PYTHONPATH=app python -m benchmarks.data_path_benchmark --sizes 1000,100000
+"""
+
+import argparse
+import gc
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+from benchmarks.results import (
+    DEFAULT_REGRESSION_THRESHOLD,
+    compare_results,
+    load_results,
+    print_table,
+    save_results,
+)
+from benchmarks.synthetic import (
+    generate_errors_table,
+    generate_summary_text,
+    generate_transcript_json,
+)
+from ui.display_components import process_text_for_display
+from utils.common import calculate_speaker_participation, extract_table_to_dataframe
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+ERRORS_TABLE_TURNS = 10
+SUMMARY_SECTION_TURNS = 100
+REGRESSION_METRICS = ["time", "peak_mb"]
+COLUMNS = [
+    "case",
+    "turns",
+    "input_mb",
+    "time",
+    "us_per_turn",
+    "peak_mb",
+    "peak_ratio",
+]
+
+
+def measure(function: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """
+    Время выполнения (медиана repeat запусков) и пиковая память одного вызова
+
+    Returns:
+    --------
+    Dict[str, float]
+        time - секунд, peak_mb - пик памяти, выделенной во время вызова, МБ
+    """
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        started_at = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - started_at)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"time": statistics.median(times), "peak_mb": (peak - baseline) / 1e6}
+
+
+def run_size(turns: int, repeat: int, seed: int) -> List[Dict[str, Any]]:
+    """Измеряет все функции на данных, соответствующих расшифровке из turns реплик"""
+    # Содержимое загруженного файла (uploaded_file.getvalue())
+    data = generate_transcript_json(turns, seed=seed).encode("utf-8")
+    content = json.loads(data.decode("utf-8"))
+    file_content = json.dumps(content, ensure_ascii=False, indent=2)
+    errors_table = generate_errors_table(max(1, turns // ERRORS_TABLE_TURNS), seed)
+    summary = generate_summary_text(max(1, turns // SUMMARY_SECTION_TURNS), seed)
+
+    cases = {
+        "json_loads": (len(data), lambda: json.loads(data.decode("utf-8"))),
+        "json_dumps": (
+            len(file_content.encode("utf-8")),
+            lambda: json.dumps(content, ensure_ascii=False, indent=2),
+        ),
+        "speaker_participation": (
+            len(file_content.encode("utf-8")),
+            lambda: calculate_speaker_participation(file_content),
+        ),
+        "errors_table": (
+            len(errors_table.encode("utf-8")),
+            lambda: extract_table_to_dataframe(errors_table),
+        ),
+        "display_text": (
+            len(summary.encode("utf-8")),
+            lambda: process_text_for_display(summary),
+        ),
+    }
+    results = []
+    for name, (input_bytes, function) in cases.items():
+        result = measure(function, repeat)
+        results.append(
+            {
+                "case": f"{name}-{turns}",
+                "turns": turns,
+                "input_mb": input_bytes / 1e6,
+                "time": result["time"],
+                "us_per_turn": result["time"] / turns * 1e6,
+                "peak_mb": result["peak_mb"],
+                "peak_ratio": result["peak_mb"] * 1e6 / input_bytes,
+            }
+        )
+        print(
+            f"{results[-1]['case']}: {result['time']:.3f} с, "
+            f"{result['peak_mb']:.1f} МБ",
+            flush=True,
+        )
+    return results
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default=",".join(map(str, DEFAULT_SIZES)),
+        help="Размеры расшифровок (количество реплик) через запятую",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Файл результатов")
+    parser.add_argument("--baseline", type=Path, help="Результаты для сравнения")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    cases = []
+    for turns in map(int, args.sizes.split(",")):
+        cases.extend(run_size(turns, args.repeat, args.seed))
+
+    print_table(cases, COLUMNS)
+    print(f"\nРезультаты сохранены: {save_results('data_path', cases, args.output)}")
+
+    if args.baseline:
+        regressions = compare_results(
+            cases, load_results(args.baseline), REGRESSION_METRICS, args.threshold
+        )
+        for regression in regressions:
+            print(f"Регрессия: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
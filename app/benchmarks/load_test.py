@@ -0,0 +1,298 @@
+"""
+Нагрузочный тест интерфейса: N сессий одновременно проходят сценарий
+загрузка файла -> "Подготовка" -> правка результатов -> "Итоги".
+
+Сессии выполняются через streamlit.testing (AppTest) в одном процессе,
+поэтому делят стратегии, регулятор запросов, кэши и фоновые задания так же,
+как сессии одной реплики. Запросы к моделям обслуживает FakeChatStrategy
+(LLM_RECUP_FAKE_PROVIDER=1) с задержками, масштабированными --time-scale.
+
+Для каждого действия выводятся процентили задержки (от действия до появления
+результата на странице) без ожидания очереди запусков скрипта и отдельно
+процентили этого ожидания, а также прирост памяти процесса на сессию и
+количество потоков.
+
+    PYTHONPATH=app python -m benchmarks.load_test --sessions 20 --concurrency 10
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT_PATH = Path(__file__).resolve().parents[2]
+MAIN_PATH = ROOT_PATH / "app" / "main.py"
+INTERACTIONS = ["upload", "prepare", "edit", "summaries"]
+# Интервал опроса страницы, пока выполняется фоновое задание, секунд
+POLL_INTERVAL = 0.1
+# Интервал замера количества потоков, секунд
+SAMPLE_INTERVAL = 0.5
+
+# AppTest подменяет глобальный экземпляр Runtime на время каждого запуска скрипта,
+# поэтому запуски скрипта разных сессий выполняются по очереди. Фоновые задания
+# (запросы к моделям) при этом выполняются параллельно, как на сервере. На сервере
+# такой очереди нет, поэтому ожидание блокировки вычитается из задержки действий
+# и выводится отдельно
+_script_run_lock = threading.Lock()
+
+
+class Upload:
+    """Загруженный файл (AppTest не поддерживает st.file_uploader)"""
+
+    def __init__(self, name: str, content: str):
+        self.name = name
+        self.file_id = name
+        self._data = content.encode("utf-8")
+
+    def getvalue(self) -> bytes:
+        return self._data
+
+    def getbuffer(self) -> memoryview:
+        return memoryview(self._data)
+
+
+def rss_megabytes() -> float:
+    """
+    Объем резидентной памяти процесса, МБ
+    (максимальный за время работы, если текущий недоступен)
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1_000_000
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1_000
+
+
+def run_session(
+    index: int, transcript: str, timeout: float, model_name: str
+) -> Dict[str, Any]:
+    """
+    Проводит одну сессию через сценарий
+
+    Returns:
+    --------
+    Dict[str, Any]
+        Время каждого действия (секунд, без ожидания очереди запусков скрипта),
+        ожидание очереди во время каждого действия (lock_waits), время отдельных
+        запусков скрипта и ожидания очереди перед ними (reruns, rerun_lock_waits)
+        и ошибка, если сценарий прервался
+    """
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(MAIN_PATH), default_timeout=timeout)
+    at.session_state["uploaded_file"] = Upload(f"session-{index}.json", transcript)
+    at.session_state["current_model"] = model_name
+    timings: Dict[str, float] = {}
+    lock_waits: Dict[str, float] = {}
+    reruns: List[float] = []
+    rerun_lock_waits: List[float] = []
+    lock_wait = 0.0
+
+    def run():
+        nonlocal lock_wait
+        waiting_since = time.perf_counter()
+        with _script_run_lock:
+            started_at = time.perf_counter()
+            rerun_lock_waits.append(started_at - waiting_since)
+            lock_wait += rerun_lock_waits[-1]
+            at.run()
+            reruns.append(time.perf_counter() - started_at)
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+
+    def click(label: str, done_key: str):
+        button = next(b for b in at.button if b.label.endswith(label))
+        button.click()
+        run()
+        deadline = time.monotonic() + timeout
+        while done_key not in at.session_state:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{label}: нет результата за {timeout} с")
+            time.sleep(POLL_INTERVAL)
+            run()
+
+    def edit():
+        text_area = at.text_area[0]
+        text_area.set_value(text_area.value + "\nУточнение пользователя")
+        run()
+
+    def timed(interaction: str, action):
+        nonlocal lock_wait
+        lock_wait = 0.0
+        started_at = time.perf_counter()
+        action()
+        timings[interaction] = time.perf_counter() - started_at - lock_wait
+        lock_waits[interaction] = lock_wait
+
+    try:
+        timed("upload", run)
+        timed("prepare", lambda: click("Подготовка", "response_analyze_metadata"))
+        timed("edit", edit)
+        timed("summaries", lambda: click("Итоги", "summary0_response"))
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return {
+        "timings": timings,
+        "lock_waits": lock_waits,
+        "reruns": reruns,
+        "rerun_lock_waits": rerun_lock_waits,
+        "error": error,
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument(
+        "--concurrency", type=int, help="Одновременных сессий (по умолчанию все)"
+    )
+    parser.add_argument("--turns", type=int, default=500, help="Реплик в расшифровке")
+    parser.add_argument(
+        "--same-transcript",
+        action="store_true",
+        help="Все сессии загружают одну расшифровку (проверка общих кэшей)",
+    )
+    parser.add_argument("--time-scale", type=float, default=0.05)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--output", type=Path, help="Файл результатов")
+    parser.add_argument("--baseline", type=Path, help="Результаты для сравнения")
+    args = parser.parse_args(argv)
+
+    # Приложение читает config.toml и пишет журналы относительно корня проекта
+    os.chdir(ROOT_PATH)
+    Path("logs").mkdir(exist_ok=True)
+    os.environ["LLM_RECUP_FAKE_PROVIDER"] = "1"
+    os.environ["LLM_RECUP_FAKE_TIME_SCALE"] = str(args.time_scale)
+
+    from benchmarks.results import (
+        DEFAULT_REGRESSION_THRESHOLD,
+        compare_results,
+        load_results,
+        percentiles,
+        print_table,
+        save_results,
+    )
+    from benchmarks.synthetic import generate_transcript_json
+    from chat_strategies.fake_strategy import FakeChatStrategy
+    from ui import processing_steps
+
+    processing_steps.CACHE_WARMUP_DELAY *= args.time_scale
+    model_name = FakeChatStrategy().get_models()[0]
+    transcripts = [
+        generate_transcript_json(args.turns, seed=0 if args.same_transcript else i)
+        for i in range(args.sessions)
+    ]
+
+    # Первый запуск загружает модули приложения и не относится к нагрузке
+    run_session(
+        -1, generate_transcript_json(args.turns, seed=-1), args.timeout, model_name
+    )
+
+    max_threads = threading.active_count()
+    sampling = threading.Event()
+
+    def sample_threads():
+        nonlocal max_threads
+        while not sampling.wait(SAMPLE_INTERVAL):
+            max_threads = max(max_threads, threading.active_count())
+
+    threads_before = threading.active_count()
+    rss_before = rss_megabytes()
+    sampler = threading.Thread(target=sample_threads, daemon=True)
+    sampler.start()
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency or args.sessions) as executor:
+        sessions = list(
+            executor.map(
+                lambda i: run_session(i, transcripts[i], args.timeout, model_name),
+                range(args.sessions),
+            )
+        )
+    wall_time = time.perf_counter() - started_at
+    sampling.set()
+    sampler.join()
+    rss_after = rss_megabytes()
+
+    cases = []
+    for interaction in INTERACTIONS:
+        values = [
+            s["timings"][interaction] for s in sessions if interaction in s["timings"]
+        ]
+        waits = [
+            s["lock_waits"][interaction]
+            for s in sessions
+            if interaction in s["lock_waits"]
+        ]
+        cases.append(
+            {
+                "case": interaction,
+                "completed": len(values),
+                **percentiles(values, "latency"),
+                **percentiles(waits, "lock_wait"),
+            }
+        )
+    cases.append(
+        {
+            "case": "rerun",
+            "completed": sum(len(s["reruns"]) for s in sessions),
+            **percentiles([t for s in sessions for t in s["reruns"]], "latency"),
+            **percentiles(
+                [t for s in sessions for t in s["rerun_lock_waits"]], "lock_wait"
+            ),
+        }
+    )
+    errors = [s["error"] for s in sessions if s["error"]]
+    summary = {
+        "case": "process",
+        "sessions": args.sessions,
+        "concurrency": args.concurrency or args.sessions,
+        "errors": len(errors),
+        "wall_time": wall_time,
+        "rss_before_mb": rss_before,
+        "rss_growth_per_session_mb": (rss_after - rss_before) / args.sessions,
+        "threads_before": threads_before,
+        "threads_max": max_threads,
+        "threads_after": threading.active_count(),
+    }
+
+    print_table(
+        cases,
+        [
+            "case",
+            "completed",
+            "latency_p50",
+            "latency_p95",
+            "latency_p99",
+            "lock_wait_p50",
+            "lock_wait_p95",
+        ],
+    )
+    print()
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    for error in sorted(set(errors)):
+        print(f"Ошибка сессии: {error}")
+    path = save_results("load", [*cases, summary], args.output)
+    print(f"\nРезультаты сохранены: {path}")
+
+    if args.baseline:
+        regressions = compare_results(
+            cases,
+            load_results(args.baseline),
+            ["latency_p50", "latency_p95", "latency_p99"],
+            DEFAULT_REGRESSION_THRESHOLD,
+        )
+        for regression in regressions:
+            print(f"Регрессия: {regression}")
+        return 1 if regressions or errors else 0
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""
+Бенчмарк конвейера обработки: process_initial_steps ("Подготовка")
+и process_all_summaries ("Итоги") на синтетических расшифровках разного размера.
+
+Задержки провайдера моделируются FakeChatStrategy и масштабируются --time-scale
+(вместе с паузой CACHE_WARMUP_DELAY), поэтому время выполнения складывается
+из смоделированного ожидания модели и собственной работы конвейера; последняя
+видна по процессорному времени (cpu_time).
+
+    PYTHONPATH=app python -m benchmarks.pipeline_benchmark --sizes 100,1000 \
+        --baseline Data/benchmarks/pipeline-20250101-120000.json
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+import toml
+from benchmarks.results import (
+    DEFAULT_REGRESSION_THRESHOLD,
+    compare_results,
+    load_results,
+    print_table,
+    save_results,
+)
+from benchmarks.synthetic import generate_transcript_json
+from chat_strategies.fake_strategy import FakeChatStrategy
+from chat_strategies.single_flight_strategy import SingleFlightChatStrategy
+from ui import processing_steps
+from ui.processing_steps import process_all_summaries, process_initial_steps
+
+CONFIG_PATH = Path(__file__).resolve().parents[2] / "config.toml"
+DEFAULT_SIZES = [100, 1000, 10000, 50000]
+# Метрики, рост которых считается регрессией
+REGRESSION_METRICS = ["wall_time", "cpu_time"]
+COLUMNS = [
+    "case",
+    "turns",
+    "megabytes",
+    "wall_time",
+    "cpu_time",
+    "calls",
+    "max_in_flight",
+    "input_tokens",
+    "cache_read_tokens",
+]
+
+
+def run_case(
+    name: str,
+    turns: int,
+    repeat: int,
+    make_strategy: Callable[[], FakeChatStrategy],
+    run: Callable[[SingleFlightChatStrategy, str], List[Dict[str, Any]]],
+) -> Dict[str, Any]:
+    """
+    Выполняет run repeat раз на расшифровке из turns реплик, каждый раз
+    с новой стратегией (пустым кэшем промптов), и возвращает медианы времени
+
+    Parameters:
+    -----------
+    run: Callable[[SingleFlightChatStrategy, str], List[Dict[str, Any]]]
+        Выполняет конвейер и возвращает статистику всех его шагов
+    """
+    file_content = generate_transcript_json(turns)
+    wall_times, cpu_times = [], []
+    for _ in range(repeat):
+        fake = make_strategy()
+        started_at, cpu_started_at = time.perf_counter(), time.process_time()
+        stats = run(SingleFlightChatStrategy(fake), file_content)
+        wall_times.append(time.perf_counter() - started_at)
+        cpu_times.append(time.process_time() - cpu_started_at)
+    return {
+        "case": f"{name}-{turns}",
+        "turns": turns,
+        "megabytes": len(file_content.encode("utf-8")) / 1_000_000,
+        "wall_time": statistics.median(wall_times),
+        "cpu_time": statistics.median(cpu_times),
+        "calls": fake.calls,
+        "max_in_flight": fake.max_in_flight,
+        "input_tokens": sum(s["input_tokens"] for s in stats),
+        "cache_read_tokens": sum(s["cache_read_tokens"] for s in stats),
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default=",".join(map(str, DEFAULT_SIZES)),
+        help="Размеры расшифровок (количество реплик) через запятую",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--iterations", type=int, default=2, help="Улучшения итогов")
+    parser.add_argument(
+        "--time-scale",
+        type=float,
+        default=0.05,
+        help="Множитель смоделированных задержек (0 - без задержек)",
+    )
+    parser.add_argument("--latency", type=float, default=2.0, help="Медиана TTFT, с")
+    parser.add_argument("--tokens-per-second", type=float, default=60.0)
+    parser.add_argument("--rate-limit-probability", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Файл результатов")
+    parser.add_argument("--baseline", type=Path, help="Результаты для сравнения")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    steps = toml.load(CONFIG_PATH)["steps"]
+    processing_steps.CACHE_WARMUP_DELAY *= args.time_scale
+
+    def make_strategy() -> FakeChatStrategy:
+        return FakeChatStrategy(
+            latency_median=args.latency,
+            tokens_per_second=args.tokens_per_second,
+            rate_limit_probability=args.rate_limit_probability,
+            time_scale=args.time_scale,
+            seed=args.seed,
+        )
+
+    model_name = FakeChatStrategy().get_models()[0]
+
+    def run_prepare(strategy, file_content):
+        _, stats, _ = process_initial_steps(strategy, file_content, model_name, steps)
+        return list(stats.values())
+
+    def run_summaries(strategy, file_content):
+        summaries = process_all_summaries(
+            strategy,
+            file_content,
+            model_name,
+            "Тема: обсуждение задач",
+            "Ошибки распознавания не найдены.",
+            steps["generate_summary"],
+            steps["refine_summary"],
+            iterations=args.iterations,
+        )
+        return [stats for _, stats in summaries]
+
+    cases = []
+    for turns in map(int, args.sizes.split(",")):
+        for name, run in [("prepare", run_prepare), ("summaries", run_summaries)]:
+            cases.append(run_case(name, turns, args.repeat, make_strategy, run))
+            print(f"{cases[-1]['case']}: {cases[-1]['wall_time']:.2f} с", flush=True)
+
+    print_table(cases, COLUMNS)
+    print(f"\nРезультаты сохранены: {save_results('pipeline', cases, args.output)}")
+
+    if args.baseline:
+        regressions = compare_results(
+            cases, load_results(args.baseline), REGRESSION_METRICS, args.threshold
+        )
+        for regression in regressions:
+            print(f"Регрессия: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""
+Воспроизведение записанного трафика (кассеты) через регулятор запросов,
+объединение одинаковых запросов и, по желанию, память результатов шагов.
+
+Запросы поступают с записанными интервалами (ускоренными в --speed раз)
+и обслуживаются с записанными (масштабированными) задержками, поэтому
+изменения регулятора, кэша и параллельности можно сравнить на реальной
+форме нагрузки без обращений к провайдерам.
+
+Запись кассеты: приложение или API, запущенные с переменной окружения
+LLM_RECUP_RECORD_CASSETTE=Data/cassettes/day.jsonl.gz.
+
+    PYTHONPATH=app python -m benchmarks.replay_benchmark Data/cassettes/day.jsonl.gz \
+        --speed 10 --memo
+"""
+
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+import toml
+from benchmarks.results import (
+    DEFAULT_REGRESSION_THRESHOLD,
+    compare_results,
+    load_results,
+    percentiles,
+    print_table,
+    save_results,
+)
+from chat_strategies.cassette_strategy import (
+    Cassette,
+    ReplayChatStrategy,
+    request_fingerprint,
+)
+from chat_strategies.single_flight_strategy import (
+    SingleFlightChatStrategy,
+    leader_context,
+)
+from utils.llm_scheduler import (
+    configure_llm_scheduler,
+    get_llm_scheduler,
+    llm_request_context,
+)
+from utils.step_memo import StepMemo
+
+CONFIG_PATH = Path(__file__).resolve().parents[2] / "config.toml"
+# Максимальное количество одновременно ожидающих и выполняющихся запросов
+MAX_WORKERS = 256
+REGRESSION_METRICS = ["wall_time", "latency_p50", "latency_p95", "latency_p99"]
+COLUMNS = [
+    "case",
+    "requests",
+    "provider_calls",
+    "memo_hits",
+    "errors",
+    "wall_time",
+    "latency_p50",
+    "latency_p95",
+    "latency_p99",
+    "queue_wait_p95",
+]
+
+
+def replay(
+    cassette: Cassette,
+    speed: float,
+    latency_scale: float,
+    memo: StepMemo = None,
+) -> Dict[str, Any]:
+    """
+    Воспроизводит запросы кассеты
+
+    Parameters:
+    -----------
+    cassette: Cassette
+        Записанный трафик
+    speed: float
+        Во сколько раз сократить интервалы между поступлением запросов
+    latency_scale: float
+        Множитель записанных задержек ответов
+    memo: StepMemo, optional
+        Память результатов (ключ - отпечаток запроса)
+
+    Returns:
+    --------
+    Dict[str, Any]
+        Количество запросов, обращений к записанным ответам, попаданий в память
+        и ошибок, общее время и процентили задержки и ожидания в очереди
+    """
+    strategies = {
+        provider: SingleFlightChatStrategy(
+            ReplayChatStrategy(cassette, provider, latency_scale)
+        )
+        for provider in cassette.providers
+    }
+    latencies: List[float] = []
+    queue_waits: List[float] = []
+    counters = {"provider_calls": 0, "memo_hits": 0, "errors": 0}
+    lock = threading.Lock()
+
+    @contextmanager
+    def provider_slot(provider: str, arrived_at: float) -> Iterator[None]:
+        with get_llm_scheduler().slot(provider):
+            with lock:
+                queue_waits.append(time.monotonic() - arrived_at)
+            yield
+
+    def serve(index: int, request: Dict[str, Any], arrived_at: float):
+        strategy = strategies[request["provider"]]
+        params = cassette.request_params(request)
+        key = request_fingerprint(request["method"], params)
+        try:
+            if memo is not None and memo.get(key) is not None:
+                with lock:
+                    counters["memo_hits"] += 1
+            else:
+                # Как в приложении: место у регулятора занимает только запрос,
+                # который обращается к провайдеру, а не ожидающие его результат
+                with llm_request_context(f"replay-{index}"), leader_context(
+                    lambda: provider_slot(request["provider"], arrived_at)
+                ):
+                    response = getattr(strategy, request["method"])(**params)
+                with lock:
+                    counters["provider_calls"] += 1
+                if memo is not None:
+                    memo.set(key, response, {})
+        except Exception:
+            with lock:
+                counters["errors"] += 1
+        with lock:
+            latencies.append(time.monotonic() - arrived_at)
+
+    started_at = time.monotonic()
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        for index, request in enumerate(cassette.requests):
+            delay = started_at + request["offset"] / speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(serve, index, request, time.monotonic())
+
+    return {
+        "requests": len(cassette.requests),
+        **counters,
+        "wall_time": time.monotonic() - started_at,
+        **percentiles(latencies, "latency"),
+        **percentiles(queue_waits, "queue_wait"),
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("cassette", type=Path)
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="Ускорение поступления запросов"
+    )
+    parser.add_argument(
+        "--latency-scale",
+        type=float,
+        help="Множитель записанных задержек (по умолчанию 1/speed)",
+    )
+    parser.add_argument("--memo", action="store_true", help="Память результатов")
+    parser.add_argument(
+        "--max-concurrent", type=int, help="Ограничение регулятора запросов"
+    )
+    parser.add_argument("--output", type=Path, help="Файл результатов")
+    parser.add_argument("--baseline", type=Path, help="Результаты для сравнения")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    scheduler_config = toml.load(CONFIG_PATH).get("scheduler", {})
+    if args.max_concurrent:
+        scheduler_config = {**scheduler_config, "max_concurrent": args.max_concurrent}
+    configure_llm_scheduler(scheduler_config)
+
+    cassette = Cassette(args.cassette)
+    result = replay(
+        cassette,
+        args.speed,
+        args.latency_scale if args.latency_scale is not None else 1 / args.speed,
+        StepMemo() if args.memo else None,
+    )
+    cases = [{"case": f"replay-{args.cassette.name}", **result}]
+
+    print_table(cases, COLUMNS)
+    print(f"\nРезультаты сохранены: {save_results('replay', cases, args.output)}")
+
+    if args.baseline:
+        regressions = compare_results(
+            cases, load_results(args.baseline), REGRESSION_METRICS, args.threshold
+        )
+        for regression in regressions:
+            print(f"Регрессия: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
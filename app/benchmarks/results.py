@@ -0,0 +1,109 @@
+import json
+import platform
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+RESULTS_PATH = Path("Data/benchmarks")
+# Доля роста, начиная с которой результат считается регрессией
+DEFAULT_REGRESSION_THRESHOLD = 0.2
+
+
+def save_results(
+    name: str, cases: List[Dict[str, Any]], path: Optional[Path] = None
+) -> Path:
+    """
+    Сохраняет результаты бенчмарка name (список случаев с полем case)
+    в JSON-файл вместе с описанием окружения
+
+    Returns:
+    --------
+    Path
+        Путь к файлу результатов
+    """
+    if path is None:
+        path = RESULTS_PATH / f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        json.dumps(
+            {
+                "benchmark": name,
+                "created_at": time.time(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "cases": cases,
+            },
+            ensure_ascii=False,
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+    return path
+
+
+def load_results(path: Path) -> Dict[str, Dict[str, Any]]:
+    """Загружает сохраненные результаты: случаи по значению поля case"""
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    return {case["case"]: case for case in data["cases"]}
+
+
+def compare_results(
+    cases: List[Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    metrics: List[str],
+    threshold: float = DEFAULT_REGRESSION_THRESHOLD,
+) -> List[str]:
+    """
+    Сравнивает результаты с базовыми по метрикам metrics (чем меньше, тем лучше)
+
+    Returns:
+    --------
+    List[str]
+        Описания регрессий: метрики, выросшие больше чем на threshold
+    """
+    regressions = []
+    for case in cases:
+        base = baseline.get(case["case"])
+        if base is None:
+            continue
+        for metric in metrics:
+            if not base.get(metric):
+                continue
+            ratio = case[metric] / base[metric]
+            if ratio > 1 + threshold:
+                regressions.append(
+                    f"{case['case']}: {metric} {base[metric]:.4g} -> "
+                    f"{case[metric]:.4g} (x{ratio:.2f})"
+                )
+    return regressions
+
+
+def percentiles(values: List[float], prefix: str) -> Dict[str, float]:
+    """
+    Медиана, 95-й и 99-й процентили values (ближайший ранг)
+    с именами {prefix}_p50, {prefix}_p95, {prefix}_p99
+    """
+    ordered = sorted(values) or [0.0]
+    return {
+        f"{prefix}_p{q}": ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+        for q in (50, 95, 99)
+    }
+
+
+def print_table(cases: List[Dict[str, Any]], columns: List[str]):
+    """Печатает результаты в виде таблицы"""
+    rows = [columns] + [
+        [
+            (
+                f"{case[column]:.4g}"
+                if isinstance(case[column], float)
+                else str(case[column])
+            )
+            for column in columns
+        ]
+        for case in cases
+    ]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    for row in rows:
+        print("  ".join(value.rjust(width) for value, width in zip(row, widths)))
@@ -0,0 +1,217 @@
+"""
+Синтетические данные для бенчмарков: расшифровки встреч, похожие на результат
+распознавания речи (неравные доли спикеров, русская речь, слова-паразиты,
+повторы и искаженные термины), а также ответы модели для разбора на странице
+(таблица ошибок распознавания, итоги с блоками NewElements).
+
+Все генераторы детерминированы: результат зависит только от параметров.
+"""
+
+import json
+import random
+from typing import Dict, List, Tuple
+
+SUBJECTS = (
+    "я",
+    "мы",
+    "команда",
+    "заказчик",
+    "тестировщики",
+    "бэкенд",
+    "аналитик",
+    "Иван",
+    "Мария",
+    "отдел продаж",
+    "поддержка",
+    "руководитель проекта",
+)
+VERBS = (
+    "посмотрю",
+    "проверим",
+    "согласовала",
+    "просил исправить",
+    "подготовит",
+    "обсудим",
+    "перенесем",
+    "закроем",
+    "оценим",
+    "выкатим",
+    "заведу задачу на",
+    "не успеваем сделать",
+)
+OBJECTS = (
+    "ошибку в модуле оплаты",
+    "план релиза",
+    "отчет по нагрузке",
+    "интеграцию с банком",
+    "миграцию базы",
+    "документацию по API",
+    "презентацию для клиента",
+    "сроки по спринту",
+    "авторизацию через SSO",
+    "дашборд в Grafana",
+    "тикет в Jira",
+    "деплой в Kubernetes",
+    "очередь в Kafka",
+    "скрипты на Python",
+)
+TAILS = (
+    "до пятницы",
+    "на следующей неделе",
+    "после ретро",
+    "к релизу",
+    "сегодня вечером",
+    "в этом спринте",
+    "если успеем",
+    "вместе с тестированием",
+)
+FILLERS = ("ну", "э", "ээ", "эм", "как бы", "вот", "короче", "то есть", "так")
+BACKCHANNELS = ("угу", "ага", "да", "да-да", "понятно", "хорошо", "ок", "ясно")
+# Термины и варианты, в которые их превращает распознавание речи
+MISRECOGNIZED_TERMS = {
+    "Jira": ["жира", "джира", "жиру"],
+    "Kubernetes": ["кубер нетис", "кубернетис", "губернатор"],
+    "Kafka": ["кафка", "кавка"],
+    "Grafana": ["графана", "графа на"],
+    "Python": ["питон", "пайтон"],
+    "SSO": ["эс эс о", "ссо"],
+    "API": ["апи", "эйпиай"],
+    "деплой": ["диплой", "до плой"],
+}
+# Доля реплик-поддакиваний
+BACKCHANNEL_SHARE = 0.15
+# Медиана и разброс (логнормальный) количества предложений в реплике
+SENTENCES_MEDIAN = 2.0
+SENTENCES_SIGMA = 0.8
+MAX_SENTENCES = 40
+# Показатель закона Ципфа для долей спикеров
+SPEAKER_ZIPF_EXPONENT = 1.1
+# Вероятность искажения при распознавании (на предложение): слово-паразит,
+# повтор слова, искаженный термин
+ASR_NOISE = 0.3
+
+
+def speaker_shares(speakers: int) -> List[float]:
+    """
+    Доли реплик спикеров по закону Ципфа: ведущий говорит чаще всех,
+    несколько участников изредка
+    """
+    weights = [1 / (rank + 1) ** SPEAKER_ZIPF_EXPONENT for rank in range(speakers)]
+    total = sum(weights)
+    return [weight / total for weight in weights]
+
+
+def _sentence(rng: random.Random, noise: float) -> str:
+    words = " ".join(
+        [rng.choice(SUBJECTS), rng.choice(VERBS), rng.choice(OBJECTS)]
+        + ([rng.choice(TAILS)] if rng.random() < 0.5 else [])
+    ).split()
+    if rng.random() < noise:
+        words.insert(rng.randrange(len(words) + 1), rng.choice(FILLERS))
+    if rng.random() < noise:
+        position = rng.randrange(len(words))
+        words.insert(position, words[position])
+    text = " ".join(words)
+    if rng.random() < noise:
+        for term, variants in MISRECOGNIZED_TERMS.items():
+            if term in text:
+                text = text.replace(term, rng.choice(variants))
+                break
+    # Распознавание часто теряет регистр и пунктуацию
+    if rng.random() < noise:
+        return text.lower()
+    return text[0].upper() + text[1:] + rng.choice("..?")
+
+
+def generate_transcript(
+    turns: int, speakers: int = 4, seed: int = 0, noise: float = ASR_NOISE
+) -> List[Dict[str, str]]:
+    """
+    Синтетическая расшифровка встречи
+
+    Parameters:
+    -----------
+    turns: int
+        Количество реплик
+    speakers: int
+        Количество спикеров (доли реплик по закону Ципфа)
+    seed: int
+        Начальное значение генератора случайных чисел
+    noise: float
+        Вероятность искажений распознавания (0 - чистый текст)
+
+    Returns:
+    --------
+    List[Dict[str, str]]
+        Реплики в формате загружаемого файла (speaker, message)
+    """
+    rng = random.Random(seed)
+    names = [f"SPEAKER_{index:02d}" for index in range(speakers)]
+    speaker_sequence = rng.choices(names, weights=speaker_shares(speakers), k=turns)
+    transcript = []
+    for speaker in speaker_sequence:
+        if rng.random() < BACKCHANNEL_SHARE:
+            message = rng.choice(BACKCHANNELS)
+        else:
+            sentences = min(
+                MAX_SENTENCES,
+                max(
+                    1, round(rng.lognormvariate(0, SENTENCES_SIGMA) * SENTENCES_MEDIAN)
+                ),
+            )
+            message = " ".join(_sentence(rng, noise) for _ in range(sentences))
+        transcript.append({"speaker": speaker, "message": message})
+    return transcript
+
+
+def generate_transcript_json(
+    turns: int, speakers: int = 4, seed: int = 0, noise: float = ASR_NOISE
+) -> str:
+    """Синтетическая расшифровка в виде JSON, как содержимое загруженного файла"""
+    return json.dumps(
+        generate_transcript(turns, speakers, seed, noise), ensure_ascii=False
+    )
+
+
+def _misrecognition(rng: random.Random) -> Tuple[str, str]:
+    term, variants = rng.choice(list(MISRECOGNIZED_TERMS.items()))
+    return rng.choice(variants), term
+
+
+def generate_errors_table(rows: int, seed: int = 0) -> str:
+    """
+    Ответ модели на шаге поиска ошибок распознавания: markdown-таблица
+    из rows строк с вводной фразой, как ее разбирает extract_table_to_dataframe
+    """
+    rng = random.Random(seed)
+    lines = [
+        "Найденные ошибки распознавания:",
+        "",
+        "| Исходный текст | Правильный вариант | Контекст | Уверенность |",
+        "|----------------|-------------------|-----------|-------------|",
+    ]
+    for _ in range(rows):
+        source, target = _misrecognition(rng)
+        context = _sentence(rng, 0).replace(target, source)
+        confidence = rng.choice(("высокая", "средняя", "низкая"))
+        lines.append(f"| {source} | {target} | {context} | {confidence} |")
+    return "\n".join(lines)
+
+
+def generate_summary_text(sections: int, seed: int = 0) -> str:
+    """
+    Ответ модели на шаге улучшения итогов: sections разделов итогов,
+    каждый с блоком <NewElements>, как его обрабатывает process_text_for_display
+    """
+    rng = random.Random(seed)
+    parts = []
+    for index in range(sections):
+        new_elements = "\n".join(
+            f"- {_sentence(rng, 0)}" for _ in range(rng.randint(2, 3))
+        )
+        summary = " ".join(_sentence(rng, 0) for _ in range(rng.randint(3, 8)))
+        parts.append(
+            f"<NewElements>\n{new_elements}\n</NewElements>\n\n"
+            f"# Саммари, часть {index + 1}\n{summary}\n"
+        )
+    return "\n".join(parts)
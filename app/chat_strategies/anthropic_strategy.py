@@ -3,8 +3,8 @@ Implements the AnthropicChatStrategy, a concrete strategy for interacting with t
 This strategy adheres to the ChatModelStrategy interface and encapsulates Anthropic-specific functionality.
 """
 
-from typing import List, Dict
-from anthropic import Anthropic
+from typing import Any, List, Dict
+from anthropic import Anthropic, DefaultHttpxClient
 from chat_strategies.chat_model_strategy import ChatModelStrategy
 from chat_strategies.model import Model
 
@@ -48,8 +48,12 @@ class AnthropicChatStrategy(ChatModelStrategy):
         Calculates and returns the total price based on the input and output tokens.
     send_message(system_prompt, messages, model_name, max_tokens, temperature)
         Sends a message to the Anthropic API and returns the generated response.
+    send_structured_message(system_prompt, messages, model_name, max_tokens, temperature, schema_name, schema)
+        Sends a message with a forced tool call whose input schema is the response schema.
     """
 
+    provider_name = "anthropic"
+
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.models = [
@@ -72,7 +76,12 @@ class AnthropicChatStrategy(ChatModelStrategy):
                 price_output=1.25,
             ),
         ]
-        self.client = Anthropic(api_key=self.api_key)
+        self.client = Anthropic(
+            api_key=self.api_key,
+            http_client=DefaultHttpxClient(
+                event_hooks={"request": [self.count_attempt]}
+            ),
+        )
         self.input_tokens = 0
         self.output_tokens = 0
         self.cache_create_tokens = 0
@@ -125,17 +134,9 @@ class AnthropicChatStrategy(ChatModelStrategy):
 
         return inputs + outputs + cache_create + cache_read
 
-    def send_message(
-        self,
-        system_prompt: str,
-        messages: List[Dict[str, str]],
-        model_name: str,
-        max_tokens: int,
-        temperature: float = 0,
-    ) -> str:
-
-        self.model = model_name
-
+    def _build_cached_messages(
+        self, messages: List[Dict[str, str]]
+    ) -> List[Dict[str, Any]]:
         cashed_messages = []
         message_count = len(messages)
         used_cashed_control_breakpoints = 0
@@ -158,19 +159,85 @@ class AnthropicChatStrategy(ChatModelStrategy):
                 used_cashed_control_breakpoints += 1
                 new_message["content"][0]["cache_control"] = {"type": "ephemeral"}
             cashed_messages.append(new_message)
+        return cashed_messages
 
+    def _create_message(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, str]],
+        model_name: str,
+        max_tokens: int,
+        temperature: float,
+        **kwargs,
+    ):
+        self.model = model_name
+
+        self.attempts = 0
         response = self.client.beta.prompt_caching.messages.create(
             model=model_name,
             system=system_prompt,
-            messages=cashed_messages,
+            messages=self._build_cached_messages(messages),
             temperature=temperature,
             max_tokens=max_tokens,
             top_p=1,
+            **kwargs,
         )
 
+        self.retries = self.attempts - 1
         self.input_tokens = response.usage.input_tokens
         self.output_tokens = response.usage.output_tokens
         self.cache_create_tokens = response.usage.cache_creation_input_tokens
         self.cache_read_tokens = response.usage.cache_read_input_tokens
 
+        return response
+
+    def send_message(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, str]],
+        model_name: str,
+        max_tokens: int,
+        temperature: float = 0,
+    ) -> str:
+        response = self._create_message(
+            system_prompt, messages, model_name, max_tokens, temperature
+        )
         return response.content[0].text
+
+    def send_structured_message(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, str]],
+        model_name: str,
+        max_tokens: int,
+        temperature: float,
+        schema_name: str,
+        schema: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        # Структурированный ответ получаем через принудительный вызов инструмента,
+        # входная схема которого совпадает со схемой ответа
+        response = self._create_message(
+            system_prompt,
+            messages,
+            model_name,
+            max_tokens,
+            temperature,
+            tools=[
+                {
+                    "name": schema_name,
+                    "description": "Записать результат анализа",
+                    "input_schema": schema,
+                }
+            ],
+            tool_choice={"type": "tool", "name": schema_name},
+        )
+        tool_input = next(
+            (block.input for block in response.content if block.type == "tool_use"),
+            None,
+        )
+        if tool_input is None:
+            raise ValueError(
+                f"The response does not contain a tool call "
+                f"(stop_reason: {response.stop_reason})"
+            )
+        return tool_input
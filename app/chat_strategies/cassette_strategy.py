@@ -0,0 +1,448 @@
+"""
+Implements record-and-replay of chat model traffic.
+
+RecordingChatStrategy wraps any ChatModelStrategy and writes every request it serves to a cassette:
+the request fingerprint, the response, the usage and the observed timings. ReplayChatStrategy serves the
+recorded responses for matching requests with the original or scaled latencies, so recorded traffic can be
+replayed offline against scheduler, cache and concurrency changes.
+
+A cassette is a gzip-compressed JSON Lines file. Message texts are stored once per distinct text
+(a meeting transcript is sent by every step of a run), and requests refer to them by hash.
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from chat_strategies.chat_model_strategy import ChatModelStrategy, ThreadLocalAttribute
+
+
+def request_fingerprint(method: str, params: Dict[str, Any]) -> str:
+    """
+    Returns the hash that identifies a request by its method and all its parameters.
+
+    Parameters
+    ----------
+    method : str
+        The strategy method ("send_message" or "send_structured_message").
+    params : Dict[str, Any]
+        The parameters of the request.
+
+    Returns
+    -------
+    str
+        The SHA-256 hex digest of the request.
+    """
+    return hashlib.sha256(
+        json.dumps(
+            {"method": method, **params}, ensure_ascii=False, sort_keys=True
+        ).encode("utf-8")
+    ).hexdigest()
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+class CassetteWriter:
+    """
+    Appends recorded requests to a cassette file. One writer may be shared by several recording strategies.
+
+    Parameters
+    ----------
+    path : Path
+        The cassette file. Records are appended to an existing file.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = gzip.open(self.path, "at", encoding="utf-8")
+        self._texts = set()
+        self._providers = set()
+        self._started_at = time.time()
+        self._lock = threading.Lock()
+
+    def _write(self, record: Dict[str, Any]):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def write_request(
+        self,
+        strategy: ChatModelStrategy,
+        method: str,
+        params: Dict[str, Any],
+        record: Dict[str, Any],
+    ):
+        """
+        Writes a request, the message texts it refers to and, on the first request of the provider,
+        the list of its models.
+        """
+        messages = [
+            {"role": message["role"], "text": _text_hash(message["content"])}
+            for message in params["messages"]
+        ]
+        with self._lock:
+            if strategy.provider_name not in self._providers:
+                self._providers.add(strategy.provider_name)
+                self._write(
+                    {
+                        "type": "provider",
+                        "provider": strategy.provider_name,
+                        "models": strategy.get_models(),
+                        "output_max_tokens": {
+                            model: strategy.get_output_max_tokens(model)
+                            for model in strategy.get_models()
+                        },
+                        "input_price": {
+                            model: strategy.get_input_price(model)
+                            for model in strategy.get_models()
+                        },
+                    }
+                )
+            for message, reference in zip(params["messages"], messages):
+                if reference["text"] not in self._texts:
+                    self._texts.add(reference["text"])
+                    self._write(
+                        {
+                            "type": "text",
+                            "hash": reference["text"],
+                            "content": message["content"],
+                        }
+                    )
+            self._write(
+                {
+                    "type": "request",
+                    "provider": strategy.provider_name,
+                    "method": method,
+                    "fingerprint": request_fingerprint(method, params),
+                    "params": {**params, "messages": messages},
+                    "offset": record.pop("started_at") - self._started_at,
+                    **record,
+                }
+            )
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class Cassette:
+    """
+    The contents of a cassette file.
+
+    Parameters
+    ----------
+    path : Path
+        The cassette file.
+
+    Attributes
+    ----------
+    providers : Dict[str, Dict[str, Any]]
+        The models, their output limits and input prices by provider.
+    requests : List[Dict[str, Any]]
+        The recorded requests in the order of arrival.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.providers: Dict[str, Dict[str, Any]] = {}
+        self.requests: List[Dict[str, Any]] = []
+        self._texts: Dict[str, str] = {}
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if record["type"] == "provider":
+                    self.providers[record["provider"]] = record
+                elif record["type"] == "text":
+                    self._texts[record["hash"]] = record["content"]
+                elif record["type"] == "request":
+                    self.requests.append(record)
+        self.requests.sort(key=lambda request: request["offset"])
+
+    def request_params(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Returns the parameters of a recorded request with the message texts restored.
+        """
+        return {
+            **request["params"],
+            "messages": [
+                {"role": message["role"], "content": self._texts[message["text"]]}
+                for message in request["params"]["messages"]
+            ],
+        }
+
+
+class RecordingChatStrategy(ChatModelStrategy):
+    """
+    A strategy decorator that records every request of the wrapped strategy to a cassette.
+
+    Parameters
+    ----------
+    strategy : ChatModelStrategy
+        The strategy that performs the requests.
+    writer : CassetteWriter
+        The cassette writer.
+    """
+
+    def __init__(self, strategy: ChatModelStrategy, writer: CassetteWriter):
+        self.strategy = strategy
+        self.writer = writer
+        self.provider_name = strategy.provider_name
+
+    def get_models(self) -> List[str]:
+        return self.strategy.get_models()
+
+    def get_output_max_tokens(self, model_name: str) -> int:
+        return self.strategy.get_output_max_tokens(model_name)
+
+    def get_input_price(self, model_name: str) -> float:
+        return self.strategy.get_input_price(model_name)
+
+    def get_input_tokens(self) -> int:
+        return self.strategy.get_input_tokens()
+
+    def get_output_tokens(self) -> int:
+        return self.strategy.get_output_tokens()
+
+    def get_cache_create_tokens(self) -> int:
+        return self.strategy.get_cache_create_tokens()
+
+    def get_cache_read_tokens(self) -> int:
+        return self.strategy.get_cache_read_tokens()
+
+    def get_full_price(self) -> float:
+        return self.strategy.get_full_price()
+
+    def get_time_to_first_token(self) -> Optional[float]:
+        return self.strategy.get_time_to_first_token()
+
+    def get_retries(self) -> int:
+        return self.strategy.get_retries()
+
+    def _record(self, method: str, params: Dict[str, Any], call: Callable[[], Any]):
+        started_at, started = time.time(), time.monotonic()
+        try:
+            response = call()
+        except Exception as e:
+            self.writer.write_request(
+                self,
+                method,
+                params,
+                {
+                    "started_at": started_at,
+                    "duration": time.monotonic() - started,
+                    "error": f"{type(e).__name__}: {e}",
+                },
+            )
+            raise
+        self.writer.write_request(
+            self,
+            method,
+            params,
+            {
+                "started_at": started_at,
+                "duration": time.monotonic() - started,
+                "time_to_first_token": self.strategy.get_time_to_first_token(),
+                "retries": self.strategy.get_retries(),
+                "response": response,
+                "usage": {
+                    "input_tokens": self.strategy.get_input_tokens(),
+                    "output_tokens": self.strategy.get_output_tokens(),
+                    "cache_create_tokens": self.strategy.get_cache_create_tokens(),
+                    "cache_read_tokens": self.strategy.get_cache_read_tokens(),
+                    "full_price": self.strategy.get_full_price(),
+                },
+            },
+        )
+        return response
+
+    def send_message(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, str]],
+        model_name: str,
+        max_tokens: int,
+        temperature: float,
+    ) -> str:
+        params = {
+            "system_prompt": system_prompt,
+            "messages": messages,
+            "model_name": model_name,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+        return self._record(
+            "send_message", params, lambda: self.strategy.send_message(**params)
+        )
+
+    def send_structured_message(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, str]],
+        model_name: str,
+        max_tokens: int,
+        temperature: float,
+        schema_name: str,
+        schema: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        params = {
+            "system_prompt": system_prompt,
+            "messages": messages,
+            "model_name": model_name,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "schema_name": schema_name,
+            "schema": schema,
+        }
+        return self._record(
+            "send_structured_message",
+            params,
+            lambda: self.strategy.send_structured_message(**params),
+        )
+
+
+class CassetteMissError(KeyError):
+    """Raised when a replayed request was not recorded in the cassette."""
+
+
+class ReplayedRequestError(Exception):
+    """Raised when a replayed request failed when it was recorded."""
+
+
+class ReplayChatStrategy(ChatModelStrategy):
+    """
+    A strategy that serves the responses recorded in a cassette for one provider.
+
+    Requests are matched by fingerprint. Identical requests are served in the order they were recorded;
+    once the recordings of a request are exhausted, the last one is served again.
+
+    Parameters
+    ----------
+    cassette : Cassette
+        The recorded traffic.
+    provider_name : str
+        The provider whose requests are served. Replayed requests pass the scheduler limits of this provider.
+    latency_scale : float
+        The multiplier applied to the recorded durations (1 for the original latencies, 0 for none).
+    """
+
+    full_price = ThreadLocalAttribute(0.0)
+
+    def __init__(
+        self, cassette: Cassette, provider_name: str, latency_scale: float = 1.0
+    ):
+        self.provider_name = provider_name
+        self.latency_scale = latency_scale
+        self._provider = cassette.providers[provider_name]
+        self._recordings: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for request in cassette.requests:
+            if request["provider"] == provider_name:
+                self._recordings[request["fingerprint"]].append(request)
+        self._served: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def get_models(self) -> List[str]:
+        return self._provider["models"]
+
+    def get_output_max_tokens(self, model_name: str) -> int:
+        return self._provider["output_max_tokens"][model_name]
+
+    def get_input_price(self, model_name: str) -> float:
+        return self._provider["input_price"][model_name]
+
+    def get_input_tokens(self) -> int:
+        return self.input_tokens
+
+    def get_output_tokens(self) -> int:
+        return self.output_tokens
+
+    def get_cache_create_tokens(self) -> int:
+        return self.cache_create_tokens
+
+    def get_cache_read_tokens(self) -> int:
+        return self.cache_read_tokens
+
+    def get_full_price(self) -> float:
+        return self.full_price
+
+    def replay(self, request: Dict[str, Any]) -> Any:
+        """
+        Serves a recorded request: waits for its scaled duration, sets its usage and returns its response.
+
+        Raises
+        ------
+        ReplayedRequestError
+            If the request failed when it was recorded.
+        """
+        if self.latency_scale > 0:
+            time.sleep(request["duration"] * self.latency_scale)
+        if "error" in request:
+            raise ReplayedRequestError(request["error"])
+        usage = request["usage"]
+        self.input_tokens = usage["input_tokens"]
+        self.output_tokens = usage["output_tokens"]
+        self.cache_create_tokens = usage["cache_create_tokens"]
+        self.cache_read_tokens = usage["cache_read_tokens"]
+        self.full_price = usage["full_price"]
+        self.model = request["params"]["model_name"]
+        ttft = request.get("time_to_first_token")
+        self.time_to_first_token = None if ttft is None else ttft * self.latency_scale
+        self.retries = request.get("retries", 0)
+        return request["response"]
+
+    def _replay(self, method: str, params: Dict[str, Any]) -> Any:
+        fingerprint = request_fingerprint(method, params)
+        with self._lock:
+            recordings = self._recordings.get(fingerprint)
+            if not recordings:
+                raise CassetteMissError(f"The request {fingerprint} was not recorded")
+            index = min(self._served[fingerprint], len(recordings) - 1)
+            self._served[fingerprint] += 1
+        return self.replay(recordings[index])
+
+    def send_message(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, str]],
+        model_name: str,
+        max_tokens: int,
+        temperature: float,
+    ) -> str:
+        return self._replay(
+            "send_message",
+            {
+                "system_prompt": system_prompt,
+                "messages": messages,
+                "model_name": model_name,
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+            },
+        )
+
+    def send_structured_message(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, str]],
+        model_name: str,
+        max_tokens: int,
+        temperature: float,
+        schema_name: str,
+        schema: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        return self._replay(
+            "send_structured_message",
+            {
+                "system_prompt": system_prompt,
+                "messages": messages,
+                "model_name": model_name,
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+                "schema_name": schema_name,
+                "schema": schema,
+            },
+        )
@@ -14,10 +14,73 @@ Guidelines for refactoring and extending this module:
 Following these guidelines will keep the module flexible, extensible, and aligned with the Strategy pattern.
 """
 
-from typing import List, Dict
+import json
+import threading
+from typing import Any, List, Dict, Optional
 from abc import ABC, abstractmethod
 
 
+def parse_json_response(text: str) -> Dict[str, Any]:
+    """
+    Parses a JSON object from a model response, ignoring markdown code fences and surrounding text.
+
+    Parameters
+    ----------
+    text : str
+        The text response of the model.
+
+    Returns
+    -------
+    Dict[str, Any]
+        The parsed JSON object.
+
+    Raises
+    ------
+    ValueError
+        If the response does not contain a JSON object.
+    """
+    start = text.find("{")
+    end = text.rfind("}")
+    if start == -1 or end < start:
+        raise ValueError("The response does not contain a JSON object")
+    return json.loads(text[start : end + 1])
+
+
+class ThreadLocalAttribute:
+    """
+    A descriptor that keeps a separate value of an instance attribute for every thread.
+
+    Usage statistics of the last request are stored in such attributes, so concurrent requests
+    made through one strategy instance from different threads do not overwrite each other's values.
+
+    Parameters
+    ----------
+    default : Any
+        The value returned in a thread that has not set the attribute yet.
+    """
+
+    def __init__(self, default: Any = None):
+        self.default = default
+
+    def __set_name__(self, owner, name: str):
+        self.name = name
+
+    @staticmethod
+    def _local(instance) -> threading.local:
+        # dict.setdefault is atomic, so concurrent first accesses share one object
+        return instance.__dict__.setdefault(
+            "_thread_local_attributes", threading.local()
+        )
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return getattr(self._local(instance), self.name, self.default)
+
+    def __set__(self, instance, value):
+        setattr(self._local(instance), self.name, value)
+
+
 class ChatModelStrategy(ABC):
     """
     Abstract base class for chat model strategies.
@@ -25,6 +88,14 @@ class ChatModelStrategy(ABC):
     This class defines the common interface for all chat model strategies and enforces the implementation
     of essential methods for interacting with chat model APIs.
 
+    Attributes
+    ----------
+    provider_name : str
+        The provider identifier used to apply per-provider request limits.
+    input_tokens, output_tokens, cache_create_tokens, cache_read_tokens, reasoning_tokens, model
+        Usage statistics of the last request. The values are thread-local, so the getters return
+        the statistics of the last request made by the calling thread.
+
     Methods
     -------
     get_models()
@@ -37,10 +108,26 @@ class ChatModelStrategy(ABC):
         Returns the number of output tokens generated in the last API response.
     get_full_price()
         Calculates and returns the total price based on the input and output tokens.
+    get_input_price(model_name)
+        Returns the price of one million input tokens for the specified model.
     send_message(system_prompt, messages, model_name, max_tokens, temperature)
         Sends a message to the chat model API and returns the generated response.
+    send_structured_message(system_prompt, messages, model_name, max_tokens, temperature, schema_name, schema)
+        Sends a message and returns a response that conforms to the given JSON schema.
     """
 
+    provider_name = "default"
+
+    input_tokens = ThreadLocalAttribute(0)
+    output_tokens = ThreadLocalAttribute(0)
+    cache_create_tokens = ThreadLocalAttribute(0)
+    cache_read_tokens = ThreadLocalAttribute(0)
+    reasoning_tokens = ThreadLocalAttribute(0)
+    model = ThreadLocalAttribute(None)
+    time_to_first_token = ThreadLocalAttribute(None)
+    retries = ThreadLocalAttribute(0)
+    attempts = ThreadLocalAttribute(0)
+
     @abstractmethod
     def get_models(self) -> List[str]:
         """
@@ -130,6 +217,68 @@ class ChatModelStrategy(ABC):
         """
         pass
 
+    def get_input_price(self, model_name: str) -> float:
+        """
+        Returns the price of one million input tokens for the specified model.
+
+        The default implementation looks the model up in the ``models`` list of the strategy.
+
+        Parameters
+        ----------
+        model_name : str
+            The name of the model.
+
+        Returns
+        -------
+        float
+            The price of one million input tokens.
+        """
+        return next(
+            model.price_input for model in self.models if model.name == model_name
+        )
+
+    def get_time_to_first_token(self) -> Optional[float]:
+        """
+        Returns the time from sending the last API request to receiving the first output token.
+
+        Strategies that do not stream responses cannot observe it and return None.
+
+        Returns
+        -------
+        Optional[float]
+            The time to the first token in seconds or None.
+        """
+        return self.time_to_first_token
+
+    def get_retries(self) -> int:
+        """
+        Returns the number of retried attempts made while sending the last API request.
+
+        Strategies that neither retry requests themselves nor count the attempts of their client
+        (see count_attempt) return 0.
+
+        Returns
+        -------
+        int
+            The number of retries.
+        """
+        return self.retries
+
+    def count_attempt(self, request: Any):
+        """
+        Counts an HTTP attempt of the API client made by the calling thread.
+
+        The provider SDKs retry failed requests internally, so the strategies register this method as
+        an httpx request event hook, reset the attempts before a request and report the attempts
+        beyond the first one as retries.
+
+        Parameters
+        ----------
+        request : httpx.Request
+            The request being sent.
+        """
+        self.attempts += 1
+
     @abstractmethod
     def send_message(
         self,
@@ -161,3 +310,79 @@ class ChatModelStrategy(ABC):
             The generated response from the chat model API.
         """
         pass
+
+    def send_structured_message(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, str]],
+        model_name: str,
+        max_tokens: int,
+        temperature: float,
+        schema_name: str,
+        schema: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """
+        Sends a message and returns a response that conforms to the given JSON schema.
+
+        The default implementation asks the model to answer with JSON only and parses the text response.
+        Strategies whose APIs support structured outputs should override it.
+
+        Parameters
+        ----------
+        system_prompt : str
+            The system prompt to provide context for the conversation.
+        messages : List[Dict[str, str]]
+            A list of messages in the conversation, each represented as a dictionary.
+        model_name : str
+            The name of the model to use for generating the response.
+        max_tokens : int
+            The maximum number of tokens to generate in the response.
+        temperature : float
+            The temperature value to control the randomness of the generated response.
+        schema_name : str
+            The name of the output schema (letters, digits, underscores and hyphens).
+        schema : Dict[str, Any]
+            The JSON schema of the response.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The parsed response of the chat model API.
+        """
+        response = self.send_message(
+            system_prompt=system_prompt,
+            messages=self.with_schema_instruction(messages, schema),
+            model_name=model_name,
+            max_tokens=max_tokens,
+            temperature=temperature,
+        )
+        return parse_json_response(response)
+
+    @staticmethod
+    def with_schema_instruction(
+        messages: List[Dict[str, str]], schema: Dict[str, Any]
+    ) -> List[Dict[str, str]]:
+        """
+        Returns a copy of the messages with a JSON output instruction appended to the last message.
+
+        Parameters
+        ----------
+        messages : List[Dict[str, str]]
+            A list of messages in the conversation, each represented as a dictionary.
+        schema : Dict[str, Any]
+            The JSON schema of the response.
+
+        Returns
+        -------
+        List[Dict[str, str]]
+            The messages with the instruction.
+        """
+        instruction = (
+            "\n\nОтвет дай только в виде JSON-объекта, соответствующего JSON-схеме:\n"
+            + json.dumps(schema, ensure_ascii=False)
+        )
+        last_message = {
+            **messages[-1],
+            "content": messages[-1]["content"] + instruction,
+        }
+        return messages[:-1] + [last_message]
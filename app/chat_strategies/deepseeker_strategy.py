@@ -3,10 +3,10 @@ Implements the DeepseekerChatStrategy, a concrete strategy for interacting with
 This strategy adheres to the ChatModelStrategy interface and encapsulates Deepseeker-specific functionality.
 """
 
-from typing import List, Dict
-from openai import OpenAI
+from typing import Any, List, Dict
+from openai import OpenAI, DefaultHttpxClient
 from chat_strategies.model import Model
-from chat_strategies.chat_model_strategy import ChatModelStrategy
+from chat_strategies.chat_model_strategy import ChatModelStrategy, parse_json_response
 
 
 # https://api-docs.deepseek.com/quick_start/pricing
@@ -48,8 +48,12 @@ class DeepseekerChatStrategy(ChatModelStrategy):
         Calculates and returns the total price based on the input and output tokens.
     send_message(system_prompt, messages, model_name, max_tokens, temperature)
         Sends a message to the Deepseeker API and returns the generated response.
+    send_structured_message(system_prompt, messages, model_name, max_tokens, temperature, schema_name, schema)
+        Sends a message in JSON mode and returns the parsed response.
     """
 
+    provider_name = "deepseeker"
+
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.models = [
@@ -60,7 +64,13 @@ class DeepseekerChatStrategy(ChatModelStrategy):
                 price_output=0.28,
             ),
         ]
-        self.client = OpenAI(api_key=self.api_key, base_url="https://api.deepseek.com")
+        self.client = OpenAI(
+            api_key=self.api_key,
+            base_url="https://api.deepseek.com",
+            http_client=DefaultHttpxClient(
+                event_hooks={"request": [self.count_attempt]}
+            ),
+        )
         self.input_tokens = 0
         self.output_tokens = 0
         self.cache_create_tokens = 0
@@ -112,19 +122,21 @@ class DeepseekerChatStrategy(ChatModelStrategy):
 
         return inputs + outputs + cache_create + cache_read
 
-    def send_message(
+    def _create_completion(
         self,
         system_prompt: str,
         messages: List[Dict[str, str]],
         model_name: str,
         max_tokens: int,
-        temperature: float = 0,
+        temperature: float,
+        **kwargs,
     ) -> str:
         self.model = model_name
 
         full_messages = [{"role": "system", "content": f"{system_prompt}"}]
         full_messages.extend(messages)
 
+        self.attempts = 0
         response = self.client.chat.completions.create(
             model=model_name,
             messages=full_messages,
@@ -133,8 +145,10 @@ class DeepseekerChatStrategy(ChatModelStrategy):
             top_p=1,
             frequency_penalty=0,
             presence_penalty=0,
+            **kwargs,
         )
 
+        self.retries = self.attempts - 1
         self.output_tokens = response.usage.completion_tokens
         self.cache_create_tokens = response.usage.prompt_cache_miss_tokens
         self.cache_read_tokens = response.usage.prompt_cache_hit_tokens
@@ -145,3 +159,37 @@ class DeepseekerChatStrategy(ChatModelStrategy):
         )
 
         return response.choices[0].message.content
+
+    def send_message(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, str]],
+        model_name: str,
+        max_tokens: int,
+        temperature: float = 0,
+    ) -> str:
+        return self._create_completion(
+            system_prompt, messages, model_name, max_tokens, temperature
+        )
+
+    def send_structured_message(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, str]],
+        model_name: str,
+        max_tokens: int,
+        temperature: float,
+        schema_name: str,
+        schema: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        # Deepseeker поддерживает только JSON-режим без схемы,
+        # поэтому схема передается в тексте запроса
+        response = self._create_completion(
+            system_prompt,
+            self.with_schema_instruction(messages, schema),
+            model_name,
+            max_tokens,
+            temperature,
+            response_format={"type": "json_object"},
+        )
+        return parse_json_response(response)
@@ -0,0 +1,299 @@
+"""
+Implements the FakeChatStrategy, a deterministic offline strategy that simulates a chat model provider.
+It is used by the benchmarks and load tests to exercise the pipeline without paid API calls.
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from chat_strategies.chat_model_strategy import ChatModelStrategy
+from chat_strategies.model import Model
+
+FILLER_WORDS = (
+    "участники обсудили сроки задачи и договорились о следующих шагах по проекту "
+    "команда согласовала план релиза ответственный подготовит отчет к пятнице"
+).split()
+
+
+class FakeRateLimitError(Exception):
+    """Raised when a simulated rate limit persists after all retries."""
+
+
+class FakeChatStrategy(ChatModelStrategy):
+    """
+    A deterministic strategy that simulates provider latency, throughput, rate limits and prompt caching.
+
+    Every random decision is drawn from a generator seeded with the seed, the request fingerprint and
+    the number of previous identical requests, so a run produces the same responses, usage and
+    latencies regardless of the order in which concurrent threads make their calls.
+
+    Parameters
+    ----------
+    latency_median : float
+        The median time to the first token in seconds.
+    latency_sigma : float
+        The shape of the lognormal distribution of the time to the first token (0 for a fixed latency).
+    tokens_per_second : float
+        The output generation speed.
+    output_tokens : int
+        The number of output tokens of a text response (limited by max_tokens).
+    rate_limit_probability : float
+        The probability that an attempt is rejected by the simulated rate limit.
+    max_retries : int
+        The number of retries after a rejected attempt before FakeRateLimitError is raised.
+    retry_delay : float
+        The delay before a retry in seconds.
+    prompt_cache : bool
+        Whether the provider caches prompt prefixes (all messages except the last one).
+    cache_ttl : float
+        The lifetime of a cached prefix in seconds since its last use.
+    cache_min_tokens : int
+        The minimum prefix length that is cached.
+    explicit_cache_writes : bool
+        Whether writing a prefix to the cache is billed separately (as at Anthropic) or is free (as at OpenAI).
+    chars_per_token : float
+        The number of characters per token used to estimate the usage.
+    time_scale : float
+        The multiplier applied to all simulated delays (0 disables sleeping).
+    seed : int
+        The seed of the simulation.
+
+    Attributes
+    ----------
+    calls : int
+        The number of requests made.
+    max_in_flight : int
+        The largest number of requests that were in progress at the same time.
+    """
+
+    provider_name = "fake"
+
+    def __init__(
+        self,
+        latency_median: float = 1.0,
+        latency_sigma: float = 0.3,
+        tokens_per_second: float = 60.0,
+        output_tokens: int = 400,
+        rate_limit_probability: float = 0.0,
+        max_retries: int = 2,
+        retry_delay: float = 1.0,
+        prompt_cache: bool = True,
+        cache_ttl: float = 300.0,
+        cache_min_tokens: int = 1024,
+        explicit_cache_writes: bool = True,
+        chars_per_token: float = 3.0,
+        time_scale: float = 1.0,
+        seed: int = 0,
+    ):
+        self.models = [
+            Model(
+                name="fake-model",
+                output_max_tokens=8192,
+                price_input=2.5,
+                price_output=10.0,
+            ),
+        ]
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.tokens_per_second = tokens_per_second
+        self.default_output_tokens = output_tokens
+        self.rate_limit_probability = rate_limit_probability
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.prompt_cache = prompt_cache
+        self.cache_ttl = cache_ttl
+        self.cache_min_tokens = cache_min_tokens
+        self.explicit_cache_writes = explicit_cache_writes
+        self.chars_per_token = chars_per_token
+        self.time_scale = time_scale
+        self.seed = seed
+
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._cache: Dict[str, float] = {}
+        self._fingerprints: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get_models(self) -> List[str]:
+        return [model.name for model in self.models]
+
+    def get_output_max_tokens(self, model_name: str) -> int:
+        return self.models[self.get_models().index(model_name)].output_max_tokens
+
+    def get_input_tokens(self) -> int:
+        return self.input_tokens
+
+    def get_output_tokens(self) -> int:
+        return self.output_tokens
+
+    def get_cache_create_tokens(self) -> int:
+        return self.cache_create_tokens
+
+    def get_cache_read_tokens(self) -> int:
+        return self.cache_read_tokens
+
+    def get_full_price(self) -> float:
+        price_input = self.get_input_price(self.model)
+        price_output = self.models[self.get_models().index(self.model)].price_output
+        return (
+            self.input_tokens * price_input
+            + self.output_tokens * price_output
+            + self.cache_create_tokens * price_input * 1.25
+            + self.cache_read_tokens * price_input * 0.1
+        ) / 1_000_000.0
+
+    def reset(self):
+        """
+        Clears the simulated prompt cache, the request history and the counters.
+        """
+        with self._lock:
+            self.calls = 0
+            self.max_in_flight = 0
+            self._cache.clear()
+            self._fingerprints.clear()
+
+    def _count_tokens(self, text: str) -> int:
+        return int(len(text) / self.chars_per_token) + 1
+
+    def _sleep(self, seconds: float):
+        if self.time_scale > 0:
+            time.sleep(seconds * self.time_scale)
+
+    def _start_request(
+        self, system_prompt: str, messages: List[Dict[str, str]], model_name: str
+    ) -> random.Random:
+        fingerprint = hashlib.sha256(
+            json.dumps(
+                [system_prompt, messages, model_name], ensure_ascii=False
+            ).encode("utf-8")
+        ).hexdigest()
+        with self._lock:
+            repeat = self._fingerprints.get(fingerprint, 0)
+            self._fingerprints[fingerprint] = repeat + 1
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        return random.Random(f"{self.seed}:{fingerprint}:{repeat}")
+
+    def _finish_request(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def _prompt_usage(
+        self, system_prompt: str, messages: List[Dict[str, str]]
+    ) -> Tuple[int, int, int]:
+        prefix = system_prompt + "".join(m["content"] for m in messages[:-1])
+        prefix_tokens = self._count_tokens(prefix)
+        total_tokens = prefix_tokens + self._count_tokens(messages[-1]["content"])
+        if not self.prompt_cache or prefix_tokens < self.cache_min_tokens:
+            return total_tokens, 0, 0
+
+        key = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        now = time.monotonic()
+        with self._lock:
+            cached_at = self._cache.get(key)
+            self._cache[key] = now
+        uncached = total_tokens - prefix_tokens
+        if cached_at is not None and now - cached_at <= self.cache_ttl:
+            return uncached, 0, prefix_tokens
+        if self.explicit_cache_writes:
+            return uncached, prefix_tokens, 0
+        return total_tokens, 0, 0
+
+    def _simulate(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, str]],
+        model_name: str,
+        output_tokens: int,
+    ) -> random.Random:
+        rng = self._start_request(system_prompt, messages, model_name)
+        try:
+            retries = 0
+            while rng.random() < self.rate_limit_probability:
+                if retries == self.max_retries:
+                    raise FakeRateLimitError("Simulated rate limit exceeded")
+                retries += 1
+                self._sleep(self.retry_delay)
+
+            if self.latency_sigma > 0:
+                ttft = rng.lognormvariate(0, self.latency_sigma) * self.latency_median
+            else:
+                ttft = self.latency_median
+            self._sleep(ttft + output_tokens / self.tokens_per_second)
+
+            (
+                self.input_tokens,
+                self.cache_create_tokens,
+                self.cache_read_tokens,
+            ) = self._prompt_usage(system_prompt, messages)
+            self.output_tokens = output_tokens
+            self.model = model_name
+            self.time_to_first_token = ttft * self.time_scale
+            self.retries = retries
+            return rng
+        finally:
+            self._finish_request()
+
+    def send_message(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, str]],
+        model_name: str,
+        max_tokens: int,
+        temperature: float = 0,
+    ) -> str:
+        output_tokens = min(self.default_output_tokens, max_tokens)
+        rng = self._simulate(system_prompt, messages, model_name, output_tokens)
+        words = []
+        length = 0
+        while length < output_tokens * self.chars_per_token:
+            word = rng.choice(FILLER_WORDS)
+            words.append(word)
+            length += len(word) + 1
+        return " ".join(words)
+
+    def send_structured_message(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, str]],
+        model_name: str,
+        max_tokens: int,
+        temperature: float,
+        schema_name: str,
+        schema: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        response = _schema_example(schema)
+        output_tokens = min(
+            self._count_tokens(json.dumps(response, ensure_ascii=False)), max_tokens
+        )
+        self._simulate(system_prompt, messages, model_name, output_tokens)
+        return response
+
+
+def _schema_example(schema: Dict[str, Any]) -> Optional[Any]:
+    """
+    Builds a minimal value that conforms to a JSON schema (objects, arrays, enums and scalars).
+    """
+    if "enum" in schema:
+        return schema["enum"][0]
+    schema_type = schema.get("type")
+    if isinstance(schema_type, list):
+        schema_type = schema_type[0]
+    if schema_type == "object":
+        return {
+            name: _schema_example(value)
+            for name, value in schema.get("properties", {}).items()
+        }
+    if schema_type == "array":
+        return [_schema_example(schema.get("items", {}))]
+    return {
+        "string": "текст",
+        "integer": 1,
+        "number": 1.0,
+        "boolean": True,
+    }.get(schema_type)
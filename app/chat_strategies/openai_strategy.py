@@ -3,8 +3,9 @@ Implements the OpenAIChatStrategy, a concrete strategy for interacting with the
 This strategy adheres to the ChatModelStrategy interface and encapsulates OpenAI-specific functionality.
 """
 
-from typing import List, Dict
-from openai import OpenAI
+import json
+from typing import Any, List, Dict
+from openai import OpenAI, DefaultHttpxClient
 from chat_strategies.model import Model
 from chat_strategies.chat_model_strategy import ChatModelStrategy
 
@@ -49,8 +50,12 @@ class OpenAIChatStrategy(ChatModelStrategy):
         Calculates and returns the total price based on the input and output tokens.
     send_message(system_prompt, messages, model_name, max_tokens, temperature)
         Sends a message to the OpenAI API and returns the generated response.
+    send_structured_message(system_prompt, messages, model_name, max_tokens, temperature, schema_name, schema)
+        Sends a message using a JSON schema response format and returns the parsed response.
     """
 
+    provider_name = "openai"
+
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.models = [
@@ -85,7 +90,12 @@ class OpenAIChatStrategy(ChatModelStrategy):
                 price_output=60.00,
             ),
         ]
-        self.client = OpenAI(api_key=self.api_key)
+        self.client = OpenAI(
+            api_key=self.api_key,
+            http_client=DefaultHttpxClient(
+                event_hooks={"request": [self.count_attempt]}
+            ),
+        )
         self.input_tokens = 0
         self.output_tokens = 0
         self.cache_create_tokens = 0
@@ -138,15 +148,15 @@ class OpenAIChatStrategy(ChatModelStrategy):
 
         return inputs + outputs + cache_create + cache_read
 
-    def send_message(
+    def _create_completion(
         self,
         system_prompt: str,
         messages: List[Dict[str, str]],
         model_name: str,
         max_tokens: int,
-        temperature: float = 0,
-    ) -> str:
-
+        temperature: float,
+        **kwargs,
+    ):
         self.model = model_name
 
         if system_prompt:
@@ -155,11 +165,13 @@ class OpenAIChatStrategy(ChatModelStrategy):
             full_messages = []
         full_messages.extend(messages)
 
+        self.attempts = 0
         if model_name in ["o1-mini", "o3-mini", "o1"]:
             response = self.client.chat.completions.create(
                 model=model_name,
                 messages=full_messages,
                 max_completion_tokens=max_tokens,
+                **kwargs,
             )
         else:
             response = self.client.chat.completions.create(
@@ -170,11 +182,63 @@ class OpenAIChatStrategy(ChatModelStrategy):
                 top_p=1,
                 frequency_penalty=0,
                 presence_penalty=0,
+                **kwargs,
             )
 
+        self.retries = self.attempts - 1
         self.output_tokens = response.usage.completion_tokens
         self.cache_create_tokens = 0
         self.cache_read_tokens = response.usage.prompt_tokens_details.cached_tokens
         self.input_tokens = response.usage.prompt_tokens - self.cache_read_tokens
 
-        return response.choices[0].message.content
+        return response.choices[0].message
+
+    def send_message(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, str]],
+        model_name: str,
+        max_tokens: int,
+        temperature: float = 0,
+    ) -> str:
+        message = self._create_completion(
+            system_prompt, messages, model_name, max_tokens, temperature
+        )
+        return message.content
+
+    def send_structured_message(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, str]],
+        model_name: str,
+        max_tokens: int,
+        temperature: float,
+        schema_name: str,
+        schema: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        # o1-mini не поддерживает structured outputs
+        if model_name == "o1-mini":
+            return super().send_structured_message(
+                system_prompt,
+                messages,
+                model_name,
+                max_tokens,
+                temperature,
+                schema_name,
+                schema,
+            )
+
+        message = self._create_completion(
+            system_prompt,
+            messages,
+            model_name,
+            max_tokens,
+            temperature,
+            response_format={
+                "type": "json_schema",
+                "json_schema": {"name": schema_name, "schema": schema, "strict": True},
+            },
+        )
+        if message.refusal:
+            raise ValueError(f"The model refused to answer: {message.refusal}")
+        return json.loads(message.content)
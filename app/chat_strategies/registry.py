@@ -0,0 +1,122 @@
+"""
+Builds the set of chat strategies available in this process, shared by the Streamlit UI
+and the HTTP job API.
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+from dotenv import load_dotenv, find_dotenv
+from chat_strategies.cassette_strategy import (
+    Cassette,
+    CassetteWriter,
+    RecordingChatStrategy,
+    ReplayChatStrategy,
+)
+from chat_strategies.chat_model_strategy import ChatModelStrategy
+from chat_strategies.fake_strategy import FakeChatStrategy
+from chat_strategies.openai_strategy import OpenAIChatStrategy
+from chat_strategies.anthropic_strategy import AnthropicChatStrategy
+from chat_strategies.deepseeker_strategy import DeepseekerChatStrategy
+from chat_strategies.single_flight_strategy import SingleFlightChatStrategy
+
+
+def initialize_available_strategies() -> Dict[str, ChatModelStrategy]:
+    """
+    Initialize a strategy for every provider that has an API key configured.
+
+    Identical concurrent requests (including requests from different sessions and from the
+    HTTP API) are coalesced into one provider call.
+
+    Returns
+    -------
+    Dict[str, ChatModelStrategy]
+        Strategies keyed by provider name.
+    """
+    load_dotenv(find_dotenv())
+
+    # The simulated provider (load tests, demos without API keys) replaces the real providers
+    if os.environ.get("LLM_RECUP_FAKE_PROVIDER") == "1":
+        return {"fake": SingleFlightChatStrategy(_get_fake_strategy())}
+
+    # Offline replay of recorded traffic replaces the real providers
+    if replay_path := os.environ.get("LLM_RECUP_REPLAY_CASSETTE"):
+        cassette = Cassette(Path(replay_path))
+        latency_scale = float(os.environ.get("LLM_RECUP_REPLAY_LATENCY_SCALE", "1"))
+        return {
+            provider: SingleFlightChatStrategy(
+                ReplayChatStrategy(cassette, provider, latency_scale)
+            )
+            for provider in cassette.providers
+        }
+
+    strategies = {}
+
+    # OpenAI
+    if openai_key := os.environ.get("OPENAI_API_KEY"):
+        strategies["openai"] = OpenAIChatStrategy(openai_key)
+
+    # Anthropic
+    if anthropic_key := os.environ.get("ANTHROPIC_API_KEY"):
+        strategies["anthropic"] = AnthropicChatStrategy(anthropic_key)
+
+    # Deepseeker
+    if deepseeker_key := os.environ.get("DEEPSEEKER_API_KEY"):
+        strategies["deepseeker"] = DeepseekerChatStrategy(deepseeker_key)
+
+    # Provider calls (after coalescing) are recorded for offline replay
+    if record_path := os.environ.get("LLM_RECUP_RECORD_CASSETTE"):
+        writer = _get_cassette_writer(Path(record_path))
+        strategies = {
+            provider: RecordingChatStrategy(strategy, writer)
+            for provider, strategy in strategies.items()
+        }
+
+    return {
+        provider: SingleFlightChatStrategy(strategy)
+        for provider, strategy in strategies.items()
+    }
+
+
+# Objects shared by the strategies initialized on every script run
+_shared_lock = threading.Lock()
+_fake_strategy: Optional[FakeChatStrategy] = None
+
+
+def _get_fake_strategy() -> FakeChatStrategy:
+    # One instance per process, so its simulated prompt cache is shared like a provider's
+    global _fake_strategy
+    with _shared_lock:
+        if _fake_strategy is None:
+            _fake_strategy = FakeChatStrategy(
+                time_scale=float(os.environ.get("LLM_RECUP_FAKE_TIME_SCALE", "1"))
+            )
+        return _fake_strategy
+
+
+_cassette_writers: Dict[Path, CassetteWriter] = {}
+
+
+def _get_cassette_writer(path: Path) -> CassetteWriter:
+    # All recording strategies share one writer per file
+    with _shared_lock:
+        if path not in _cassette_writers:
+            _cassette_writers[path] = CassetteWriter(path)
+        return _cassette_writers[path]
+
+
+def find_strategy_for_model(
+    strategies: Dict[str, ChatModelStrategy], model_name: str
+) -> Optional[ChatModelStrategy]:
+    """
+    Return the strategy that serves the given model, or None if no strategy does.
+    """
+    return next(
+        (
+            strategy
+            for strategy in strategies.values()
+            if model_name in strategy.get_models()
+        ),
+        None,
+    )
@@ -0,0 +1,249 @@
+"""
+Implements the SingleFlightChatStrategy, a decorator over any ChatModelStrategy that coalesces
+identical concurrent requests into one provider call.
+"""
+
+import contextvars
+import copy
+import hashlib
+import json
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional
+from chat_strategies.chat_model_strategy import ChatModelStrategy, ThreadLocalAttribute
+
+
+class _Flight:
+    """A provider call in progress and its outcome."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+# The registry is shared by all strategy instances of the process, so identical requests
+# from different Streamlit sessions (each builds its own strategies) are coalesced as well
+_flights: Dict[str, _Flight] = {}
+_flights_lock = threading.Lock()
+
+_leader_context: contextvars.ContextVar[
+    Optional[Callable[[], ContextManager[None]]]
+] = contextvars.ContextVar("single_flight_leader_context", default=None)
+
+
+class CoalescedRequestError(RuntimeError):
+    """
+    Raised in a waiting thread when the coalesced provider call failed and its error cannot be copied;
+    the cause is the original error.
+    """
+
+
+def _waiter_error(method: str, error: BaseException) -> BaseException:
+    """
+    Creates the exception raised in a waiting thread when the coalesced provider call failed.
+
+    A new exception per waiting thread is needed: re-raising the shared one would keep appending
+    every thread's traceback to the same object. The copy has the type and the attributes of the
+    original error, so callers and metrics tell rate-limit errors from other failures. Errors that
+    cannot be copied are replaced by a CoalescedRequestError.
+
+    Parameters
+    ----------
+    method : str
+        The name of the coalesced strategy method.
+    error : BaseException
+        The error of the provider call.
+
+    Returns
+    -------
+    BaseException
+        The exception to raise from the original error.
+    """
+    # The constructor is not called: SDK errors take keyword-only arguments that are not kept in args
+    try:
+        waiter_error = type(error).__new__(type(error), *error.args)
+        waiter_error.__dict__.update(error.__dict__)
+    except Exception:
+        return CoalescedRequestError(f"Coalesced {method} request failed: {error}")
+    return waiter_error
+
+
+@contextmanager
+def leader_context(factory: Callable[[], ContextManager[None]]) -> Iterator[None]:
+    """
+    Wraps the provider calls made inside the block in factory() when the current thread leads the flight.
+
+    Threads that wait for an identical request in flight do not enter the context, so a limited resource
+    (such as a scheduler slot) is held only by the thread that actually calls the provider.
+
+    Parameters
+    ----------
+    factory : Callable[[], ContextManager[None]]
+        Creates the context entered around the provider call.
+    """
+    token = _leader_context.set(factory)
+    try:
+        yield
+    finally:
+        _leader_context.reset(token)
+
+
+class SingleFlightChatStrategy(ChatModelStrategy):
+    """
+    A strategy decorator that coalesces identical concurrent requests.
+
+    A request is identified by the provider, the method and all request parameters. While a request
+    is in flight, every identical request waits for it and receives a copy of its result instead of
+    calling the provider again. The usage of the provider call is attributed to the thread that made it;
+    the waiting threads get zero usage, so the cost is counted once. Only the calling thread enters the
+    context set by leader_context, and the waiting threads get a CoalescedRequestError if the call fails.
+
+    Parameters
+    ----------
+    strategy : ChatModelStrategy
+        The strategy that performs the provider calls.
+    """
+
+    full_price = ThreadLocalAttribute(0.0)
+
+    def __init__(self, strategy: ChatModelStrategy):
+        self.strategy = strategy
+        self.provider_name = strategy.provider_name
+
+    def get_models(self) -> List[str]:
+        return self.strategy.get_models()
+
+    def get_output_max_tokens(self, model_name: str) -> int:
+        return self.strategy.get_output_max_tokens(model_name)
+
+    def get_input_price(self, model_name: str) -> float:
+        return self.strategy.get_input_price(model_name)
+
+    def get_input_tokens(self) -> int:
+        return self.input_tokens
+
+    def get_output_tokens(self) -> int:
+        return self.output_tokens
+
+    def get_cache_create_tokens(self) -> int:
+        return self.cache_create_tokens
+
+    def get_cache_read_tokens(self) -> int:
+        return self.cache_read_tokens
+
+    def get_full_price(self) -> float:
+        return self.full_price
+
+    def _single_flight(
+        self, method: str, params: Dict[str, Any], call: Callable[[], Any]
+    ):
+        key = hashlib.sha256(
+            json.dumps(
+                {"provider": self.provider_name, "method": method, **params},
+                ensure_ascii=False,
+                sort_keys=True,
+            ).encode("utf-8")
+        ).hexdigest()
+
+        with _flights_lock:
+            flight = _flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise _waiter_error(method, flight.error) from flight.error
+            self._set_usage(0, 0, 0, 0, 0, 0.0, params["model_name"])
+            self.time_to_first_token, self.retries = None, 0
+            return copy.deepcopy(flight.result)
+
+        factory = _leader_context.get()
+        try:
+            with factory() if factory is not None else nullcontext():
+                flight.result = call()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with _flights_lock:
+                del _flights[key]
+            flight.done.set()
+
+        # The wrapped strategy keeps thread-local usage, so it belongs to this call
+        self._set_usage(
+            self.strategy.get_input_tokens(),
+            self.strategy.get_output_tokens(),
+            self.strategy.get_cache_create_tokens(),
+            self.strategy.get_cache_read_tokens(),
+            self.strategy.reasoning_tokens,
+            self.strategy.get_full_price(),
+            params["model_name"],
+        )
+        self.time_to_first_token = self.strategy.get_time_to_first_token()
+        self.retries = self.strategy.get_retries()
+        return copy.deepcopy(flight.result)
+
+    def _set_usage(
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        cache_create_tokens: int,
+        cache_read_tokens: int,
+        reasoning_tokens: int,
+        full_price: float,
+        model: str,
+    ):
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.cache_create_tokens = cache_create_tokens
+        self.cache_read_tokens = cache_read_tokens
+        self.reasoning_tokens = reasoning_tokens
+        self.full_price = full_price
+        self.model = model
+
+    def send_message(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, str]],
+        model_name: str,
+        max_tokens: int,
+        temperature: float,
+    ) -> str:
+        params = {
+            "system_prompt": system_prompt,
+            "messages": messages,
+            "model_name": model_name,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+        return self._single_flight(
+            "send_message", params, lambda: self.strategy.send_message(**params)
+        )
+
+    def send_structured_message(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, str]],
+        model_name: str,
+        max_tokens: int,
+        temperature: float,
+        schema_name: str,
+        schema: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        params = {
+            "system_prompt": system_prompt,
+            "messages": messages,
+            "model_name": model_name,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "schema_name": schema_name,
+            "schema": schema,
+        }
+        return self._single_flight(
+            "send_structured_message",
+            params,
+            lambda: self.strategy.send_structured_message(**params),
+        )
@@ -1,16 +1,21 @@
 import streamlit as st
-from dotenv import load_dotenv, find_dotenv
 import toml
-import os
-from chat_strategies.openai_strategy import OpenAIChatStrategy
-from chat_strategies.anthropic_strategy import AnthropicChatStrategy
-from chat_strategies.deepseeker_strategy import DeepseekerChatStrategy
-from chat_strategies.chat_model_strategy import ChatModelStrategy
-from utils.session_manager import initialize_session
+from chat_strategies.registry import (
+    find_strategy_for_model,
+    initialize_available_strategies,
+)
+from utils.session_manager import (
+    DEFAULT_SESSION_TTL_HOURS,
+    cleanup_expired_sessions,
+    initialize_session,
+)
+from utils.llm_scheduler import configure_llm_scheduler
+from utils.metrics import start_metrics_server
+from utils.tracing import configure_tracing
+from api_server import start_api_server
 from ui.sidebar import render_sidebar
 from ui.main_interface import render_main_interface
 import logging
-from typing import Dict
 
 # -----------------------------
 # Настройка логирования
@@ -27,28 +32,6 @@ logging.basicConfig(
 st.set_page_config(page_title="LLM Recup", layout="wide")
 
 
-def initialize_available_strategies() -> Dict[str, ChatModelStrategy]:
-    """
-    Инициализирует все доступные стратегии на основе наличия API ключей
-    """
-    load_dotenv(find_dotenv())
-    strategies = {}
-
-    # OpenAI
-    if openai_key := os.environ.get("OPENAI_API_KEY"):
-        strategies["openai"] = OpenAIChatStrategy(openai_key)
-
-    # Anthropic
-    if anthropic_key := os.environ.get("ANTHROPIC_API_KEY"):
-        strategies["anthropic"] = AnthropicChatStrategy(anthropic_key)
-
-    # Deepseeker
-    if deepseeker_key := os.environ.get("DEEPSEEKER_API_KEY"):
-        strategies["deepseeker"] = DeepseekerChatStrategy(deepseeker_key)
-
-    return strategies
-
-
 # -----------------------------
 # Загрузка конфигурационного файла
 # -----------------------------
@@ -61,11 +44,19 @@ def load_config(config_path: str) -> dict:
 
 config = load_config("config.toml")
 steps = config.get("steps", {})
+configure_llm_scheduler(config.get("scheduler", {}))
+configure_tracing(config.get("tracing", {}))
+start_metrics_server(config.get("metrics", {}))
+# HTTP API заданий работает в том же процессе, что и интерфейс
+start_api_server(config)
 
 # -----------------------------
 # Инициализация сессионных переменных
 # -----------------------------
 initialize_session()
+cleanup_expired_sessions(
+    config.get("sessions", {}).get("ttl_hours", DEFAULT_SESSION_TTL_HOURS)
+)
 
 # -----------------------------
 # Инициализация доступных стратегий
@@ -85,14 +76,7 @@ render_sidebar(available_strategies)
 # Определение текущей стратегии
 # -----------------------------
 current_model = st.session_state["current_model"]
-current_strategy = next(
-    (
-        strategy
-        for strategy in available_strategies.values()
-        if current_model in strategy.get_models()
-    ),
-    None,
-)
+current_strategy = find_strategy_for_model(available_strategies, current_model)
 
 if not current_strategy:
     st.error(f"No strategy found for model {current_model}")
@@ -101,4 +85,4 @@ if not current_strategy:
 # -----------------------------
 # Основной интерфейс
 # -----------------------------
-render_main_interface(current_strategy, steps)
+render_main_interface(current_strategy, steps, config)
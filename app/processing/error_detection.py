@@ -0,0 +1,234 @@
+import json
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+import pandas as pd
+from processing.terms_index import (
+    get_terms_index,
+    normalize_token,
+    token_trigrams,
+)
+
+ERRORS_TABLE_COLUMNS = [
+    "Исходный текст",
+    "Правильный вариант",
+    "Контекст",
+    "Уверенность",
+]
+
+# Максимальная длина n-граммы (в словах), сравниваемой с терминами
+MAX_NGRAM_WORDS = 3
+# Минимальная длина нормализованного ключа для сравнения
+MIN_KEY_LENGTH = 4
+# Порог сходства по триграммам для отбора кандидатов
+CANDIDATE_THRESHOLD = 0.5
+# Допустимая доля отличий (расстояние Левенштейна / длина термина)
+MAX_RELATIVE_DISTANCE = 0.25
+# Количество символов контекста с каждой стороны от найденной ошибки
+CONTEXT_CHARS = 40
+
+WORD_WITH_POSITION = re.compile(r"\w+")
+
+
+def levenshtein_distance(left: str, right: str, max_distance: int) -> int:
+    """
+    Расстояние Левенштейна с ранним прекращением:
+    если расстояние заведомо больше max_distance, возвращается max_distance + 1
+    """
+    if abs(len(left) - len(right)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(right) + 1))
+    for i, left_char in enumerate(left, start=1):
+        current = [i]
+        for j, right_char in enumerate(right, start=1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (left_char != right_char),
+                )
+            )
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+class RecognitionErrorDetector:
+    """
+    Локальный поиск ошибок распознавания по словарю терминов.
+
+    Термины словаря приводятся к фонетическому ключу (транслитерация и упрощение
+    написания, слова склеиваются) и помещаются в триграммный индекс. N-граммы реплик
+    приводятся к тому же ключу; кандидаты из индекса проверяются расстоянием Левенштейна.
+    N-грамма, ключ которой близок к ключу термина, но написание отличается от термина,
+    считается вероятной ошибкой распознавания.
+
+    Parameters:
+    -----------
+    terms_content: str
+        Содержимое файла словаря терминов
+    """
+
+    def __init__(self, terms_content: str):
+        self.term_by_key: Dict[str, str] = {}
+        self.keys: List[str] = []
+        postings: Dict[str, List[int]] = defaultdict(list)
+
+        terms_index = get_terms_index(terms_content)
+        for term in terms_index.entry_terms:
+            key = "".join(
+                normalize_token(word) for word in WORD_WITH_POSITION.findall(term)
+            )
+            if len(key) < MIN_KEY_LENGTH or key in self.term_by_key:
+                continue
+            self.term_by_key[key] = term
+            for trigram in token_trigrams(key):
+                postings[trigram].append(len(self.keys))
+            self.keys.append(key)
+
+        # Инвертированный индекс хранится в массивах NumPy, чтобы подсчет общих
+        # триграмм для каждой n-граммы выполнялся векторно
+        self.trigram_postings = {
+            trigram: np.array(ids, dtype=np.int32) for trigram, ids in postings.items()
+        }
+        self.key_lengths = np.array([len(key) for key in self.keys], dtype=np.int32)
+        self.key_trigram_counts = np.array(
+            [len(token_trigrams(key)) for key in self.keys], dtype=np.int32
+        )
+        self.max_key_length = int(
+            self.key_lengths.max(initial=0) / (1 - MAX_RELATIVE_DISTANCE)
+        )
+
+    def match_key(self, key: str) -> Optional[Tuple[str, int]]:
+        """
+        Находит термин, ключ которого ближе всего к заданному
+
+        Returns:
+        --------
+        Optional[Tuple[str, int]]
+            Термин и расстояние Левенштейна между ключами или None
+        """
+        best = None
+        if key in self.term_by_key:
+            best = (self.term_by_key[key], 0)
+        elif MIN_KEY_LENGTH <= len(key) <= self.max_key_length:
+            key_trigrams = token_trigrams(key)
+            hits = [
+                self.trigram_postings[trigram]
+                for trigram in key_trigrams
+                if trigram in self.trigram_postings
+            ]
+            if hits:
+                overlaps = np.bincount(np.concatenate(hits), minlength=len(self.keys))
+                ids = np.flatnonzero(overlaps)
+                overlaps = overlaps[ids]
+                similarity = (
+                    2 * overlaps / (len(key_trigrams) + self.key_trigram_counts[ids])
+                )
+                max_distances = np.maximum(
+                    1, (self.key_lengths[ids] * MAX_RELATIVE_DISTANCE).astype(np.int32)
+                )
+                candidates = (similarity >= CANDIDATE_THRESHOLD) & (
+                    np.abs(self.key_lengths[ids] - len(key)) <= max_distances
+                )
+                for candidate_id, max_distance in zip(
+                    ids[candidates], max_distances[candidates]
+                ):
+                    candidate = self.keys[candidate_id]
+                    distance = levenshtein_distance(key, candidate, int(max_distance))
+                    if distance <= max_distance and (
+                        best is None or distance < best[1]
+                    ):
+                        best = (self.term_by_key[candidate], distance)
+
+        return best
+
+    def detect(self, messages: List[str]) -> pd.DataFrame:
+        """
+        Ищет вероятные ошибки распознавания в репликах
+
+        Parameters:
+        -----------
+        messages: List[str]
+            Тексты реплик
+
+        Returns:
+        --------
+        pd.DataFrame
+            Таблица с колонками ERRORS_TABLE_COLUMNS (по одной строке на исходный текст)
+        """
+        rows: Dict[str, List[str]] = {}
+        # Результаты сравнения ключей хранятся только на время одного вызова:
+        # детектор общий для всех сессий, и общий кэш рос бы без ограничений
+        matches: Dict[str, Optional[Tuple[str, int]]] = {}
+        for message in messages:
+            words = list(WORD_WITH_POSITION.finditer(message))
+            keys = [normalize_token(word.group()) for word in words]
+
+            # Все n-граммы, похожие на термины: (расстояние, число слов, позиция, термин)
+            spans = []
+            for position in range(len(words)):
+                for size in range(1, min(MAX_NGRAM_WORDS, len(words) - position) + 1):
+                    key = "".join(keys[position : position + size])
+                    if key not in matches:
+                        matches[key] = self.match_key(key)
+                    found = matches[key]
+                    if found:
+                        spans.append((found[1], size, position, found[0]))
+
+            # Выбираем непересекающиеся n-граммы, начиная с самых точных и коротких
+            covered: Set[int] = set()
+            for distance, size, position, term in sorted(spans):
+                span_positions = set(range(position, position + size))
+                if span_positions & covered:
+                    continue
+                covered |= span_positions
+
+                start = words[position].start()
+                end = words[position + size - 1].end()
+                source = message[start:end]
+                # Термин записан правильно - это не ошибка
+                if source.lower() == term.lower() or source.lower() in rows:
+                    continue
+
+                context = message[
+                    max(0, start - CONTEXT_CHARS) : end + CONTEXT_CHARS
+                ].strip()
+                if distance == 0:
+                    confidence = "высокая"
+                elif distance == 1:
+                    confidence = "средняя"
+                else:
+                    confidence = "низкая"
+                rows[source.lower()] = [source, term, context, confidence]
+
+        return pd.DataFrame(list(rows.values()), columns=ERRORS_TABLE_COLUMNS)
+
+
+@lru_cache(maxsize=8)
+def get_error_detector(terms_content: str) -> RecognitionErrorDetector:
+    """Возвращает детектор ошибок, построенный один раз для каждого словаря"""
+    return RecognitionErrorDetector(terms_content)
+
+
+def detect_recognition_errors(file_content: str, terms_content: str) -> pd.DataFrame:
+    """
+    Локальный поиск кандидатов в ошибки распознавания по словарю терминов
+
+    Parameters:
+    -----------
+    file_content: str
+        Содержимое файла диалога (JSON со списком реплик)
+    terms_content: str
+        Содержимое файла словаря терминов
+
+    Returns:
+    --------
+    pd.DataFrame
+        Таблица в формате extract_table_to_dataframe
+    """
+    messages = [entry["message"] for entry in json.loads(file_content)]
+    return get_error_detector(terms_content).detect(messages)
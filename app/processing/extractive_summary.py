@@ -0,0 +1,141 @@
+import json
+import re
+from typing import Dict, List, Tuple
+import numpy as np
+from utils.common import count_tokens
+
+# Бюджет токенов сокращенного текста по умолчанию
+DEFAULT_TOKEN_BUDGET = 30_000
+# Реплики короче этого количества слов не считаются информативными
+MIN_TURN_WORDS = 4
+# Термины, встречающиеся в большей доле реплик, считаются стоп-словами
+MAX_DOCUMENT_FREQUENCY = 0.3
+# Длина префикса слова, используемого вместо основы (грубый стемминг для русского)
+STEM_LENGTH = 6
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def turn_terms(message: str) -> List[str]:
+    """Слова реплики, приведенные к нижнему регистру и усеченные до "основы" """
+    return [word[:STEM_LENGTH] for word in WORD_PATTERN.findall(message.lower())]
+
+
+def score_turns(messages: List[str]) -> np.ndarray:
+    """
+    Оценка информативности реплик по TF-IDF центральности:
+    косинусная близость TF-IDF вектора реплики к центроиду всей встречи.
+    Реплики, близкие к основному содержанию встречи, получают больший вес.
+
+    Parameters:
+    -----------
+    messages: List[str]
+        Тексты реплик
+
+    Returns:
+    --------
+    np.ndarray
+        Оценки реплик (0 для неинформативных реплик)
+    """
+    vocabulary: Dict[str, int] = {}
+    rows, cols = [], []
+    for row, message in enumerate(messages):
+        terms = turn_terms(message)
+        if len(terms) < MIN_TURN_WORDS:
+            continue
+        for term in terms:
+            rows.append(row)
+            cols.append(vocabulary.setdefault(term, len(vocabulary)))
+
+    scores = np.zeros(len(messages))
+    if not vocabulary:
+        return scores
+
+    # Разреженная матрица "реплика x термин" в координатном формате
+    rows = np.array(rows)
+    cols = np.array(cols)
+    pair_ids, tf = np.unique(rows * len(vocabulary) + cols, return_counts=True)
+    pair_rows, pair_cols = np.divmod(pair_ids, len(vocabulary))
+
+    document_frequency = np.bincount(pair_cols, minlength=len(vocabulary))
+    documents_cnt = len(np.unique(pair_rows))
+    idf = np.log((1 + documents_cnt) / (1 + document_frequency)) + 1
+    # Слишком частые термины (слова-паразиты, служебные слова) не учитываются
+    idf[document_frequency > MAX_DOCUMENT_FREQUENCY * documents_cnt] = 0
+    weights = np.log1p(tf) * idf[pair_cols]
+
+    # Нормируем векторы реплик и считаем близость к центроиду
+    norms = np.sqrt(np.bincount(pair_rows, weights=weights**2, minlength=len(messages)))
+    weights = np.divide(
+        weights,
+        norms[pair_rows],
+        out=np.zeros_like(weights),
+        where=norms[pair_rows] > 0,
+    )
+    centroid = np.bincount(pair_cols, weights=weights, minlength=len(vocabulary))
+    if not centroid.any():
+        return scores
+    centroid /= np.linalg.norm(centroid)
+    scores += np.bincount(
+        pair_rows, weights=weights * centroid[pair_cols], minlength=len(messages)
+    )
+
+    # Более длинные реплики при равной близости несут больше информации
+    distinct_terms = np.bincount(
+        pair_rows, weights=weights > 0, minlength=len(messages)
+    )
+    return scores * np.log1p(distinct_terms)
+
+
+def condense_transcript(
+    file_content: str, token_budget: int = DEFAULT_TOKEN_BUDGET
+) -> Tuple[str, Dict[str, int]]:
+    """
+    Экстрактивное сокращение расшифровки до заданного бюджета токенов.
+    Отбираются самые информативные реплики, порядок реплик сохраняется.
+    Если текст укладывается в бюджет, он возвращается без изменений.
+
+    Parameters:
+    -----------
+    file_content: str
+        Содержимое файла диалога (JSON со списком реплик)
+    token_budget: int
+        Бюджет токенов сокращенного текста
+
+    Returns:
+    --------
+    Tuple[str, Dict[str, int]]
+        Сокращенное содержимое файла и отчет (количество реплик и токенов до и после)
+    """
+    tokens_before = count_tokens(file_content)
+    turns = json.loads(file_content)
+    report = {
+        "turns_before": len(turns),
+        "turns_after": len(turns),
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_before,
+    }
+    if tokens_before <= token_budget:
+        return file_content, report
+
+    scores = score_turns([turn["message"] for turn in turns])
+    # Токены реплики оцениваются в том же форматировании, что и в итоговом списке
+    turn_tokens = [
+        count_tokens(json.dumps([turn], ensure_ascii=False, indent=2)) for turn in turns
+    ]
+
+    selected = []
+    used_tokens = 0
+    for index in np.argsort(-scores, kind="stable"):
+        if scores[index] <= 0:
+            break
+        if used_tokens + turn_tokens[index] > token_budget:
+            continue
+        selected.append(index)
+        used_tokens += turn_tokens[index]
+
+    condensed = [turns[index] for index in sorted(selected)]
+    condensed_content = json.dumps(condensed, ensure_ascii=False, indent=2)
+    report["turns_after"] = len(condensed)
+    report["tokens_after"] = count_tokens(condensed_content)
+    return condensed_content, report
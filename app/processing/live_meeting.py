@@ -0,0 +1,50 @@
+import hashlib
+import json
+from typing import Any, Dict, List
+
+# Окончание текста JSON-списка реплик в форматировании json.dumps(indent=2)
+LIST_END = "\n]"
+
+
+def segment_fingerprint(segment_content: str) -> str:
+    """
+    Отпечаток фрагмента расшифровки, не зависящий от форматирования JSON.
+    Используется, чтобы один и тот же фрагмент не добавлялся к встрече дважды.
+    """
+    turns = json.loads(segment_content)
+    canonical = json.dumps(turns, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def append_turns(file_content: str, turns: List[Dict[str, Any]]) -> str:
+    """
+    Добавляет реплики в конец текста встречи.
+
+    Уже имеющийся текст остается побайтно неизменным (меняется только закрывающая
+    скобка списка), поэтому при повторной отправке полного текста провайдеры
+    могут переиспользовать кэш его префикса. Результат совпадает с
+    json.dumps(старые + новые реплики, ensure_ascii=False, indent=2).
+
+    Parameters:
+    -----------
+    file_content: str
+        Содержимое файла диалога (JSON со списком реплик)
+    turns: List[Dict[str, Any]]
+        Добавляемые реплики
+
+    Returns:
+    --------
+    str
+        Содержимое файла диалога с добавленными репликами
+    """
+    if not turns:
+        return file_content
+
+    if not file_content.endswith(LIST_END):
+        # Пустой список или текст в другом форматировании
+        existing_turns = json.loads(file_content)
+        return json.dumps(existing_turns + turns, ensure_ascii=False, indent=2)
+
+    # Убираем "[" и "\n]", оставляя реплики с отступами и разделителями
+    addition = json.dumps(turns, ensure_ascii=False, indent=2)[1 : -len(LIST_END)]
+    return file_content[: -len(LIST_END)] + "," + addition + LIST_END
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import re
+import zlib
+from typing import List
+import numpy as np
+
+# Количество хэш-функций MinHash (длина сигнатуры)
+NUM_PERMUTATIONS = 128
+# Разбиение сигнатуры на полосы LSH: кандидатами считаются расшифровки,
+# совпавшие хотя бы в одной полосе (порог срабатывания ~ (1/32)^(1/4) ≈ 0.42)
+LSH_BANDS = 32
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+# Длина шингла в словах
+SHINGLE_SIZE = 5
+# Минимальное сходство (оценка коэффициента Жаккара), при котором предлагается
+# переиспользовать результаты
+DEFAULT_SIMILARITY_THRESHOLD = 0.8
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+# Параметры хэш-функций фиксированы, чтобы сигнатуры были сравнимы между процессами
+_random = np.random.RandomState(20240601)
+_HASH_A = _random.randint(1, 1 << 31, size=NUM_PERMUTATIONS).astype(np.uint64)
+_HASH_B = _random.randint(0, 1 << 31, size=NUM_PERMUTATIONS).astype(np.uint64)
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def transcript_words(file_content: str) -> List[str]:
+    """
+    Слова расшифровки в нижнем регистре с метками спикеров.
+    Форматирование JSON и пробелы не влияют на результат.
+    """
+    try:
+        text = "\n".join(
+            f"{turn['speaker']} {turn['message']}" for turn in json.loads(file_content)
+        )
+    except (ValueError, TypeError, KeyError):
+        text = file_content
+    return WORD_PATTERN.findall(text.lower())
+
+
+def transcript_shingles(file_content: str) -> np.ndarray:
+    """
+    32-битные хэши (CRC32) уникальных шинглов из SHINGLE_SIZE подряд идущих слов
+    """
+    words = transcript_words(file_content)
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    size = min(SHINGLE_SIZE, len(words))
+    shingles = {
+        zlib.crc32(" ".join(words[i : i + size]).encode("utf-8"))
+        for i in range(len(words) - size + 1)
+    }
+    return np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+
+
+def transcript_signature(file_content: str) -> np.ndarray:
+    """
+    MinHash-сигнатура расшифровки: для каждой хэш-функции (a * x + b) mod p
+    минимальное значение по всем шинглам
+
+    Returns:
+    --------
+    np.ndarray
+        Сигнатура длины NUM_PERMUTATIONS (uint64); пустая, если в тексте нет слов
+    """
+    shingles = transcript_shingles(file_content)
+    if not len(shingles):
+        return np.empty(0, dtype=np.uint64)
+    # a < 2^31 и x < 2^32, поэтому произведение помещается в uint64
+    hashes = (np.outer(shingles, _HASH_A) + _HASH_B) % MERSENNE_PRIME
+    return hashes.min(axis=0)
+
+
+def lsh_band_keys(signature: np.ndarray) -> List[str]:
+    """
+    Ключи полос LSH сигнатуры (номер полосы и хэш ее значений)
+    """
+    return [
+        f"{band}:"
+        + hashlib.blake2b(
+            signature[band * LSH_ROWS : (band + 1) * LSH_ROWS].tobytes(), digest_size=8
+        ).hexdigest()
+        for band in range(LSH_BANDS)
+    ]
+
+
+def estimate_similarity(left: np.ndarray, right: np.ndarray) -> float:
+    """
+    Оценка коэффициента Жаккара множеств шинглов по MinHash-сигнатурам
+    """
+    if not len(left) or len(left) != len(right):
+        return 0.0
+    return float(np.mean(left == right))
@@ -0,0 +1,207 @@
+import json
+import re
+from collections import deque
+from typing import Dict, List, Tuple
+import pandas as pd
+
+SOURCE_COLUMN = "Исходный текст"
+TARGET_COLUMN = "Правильный вариант"
+
+# Разделители нескольких вариантов коррекции в одной ячейке ("A / B", "A; B", "A или B")
+VARIANTS_SEPARATOR = re.compile(r"\s*(?:/|;|\bили\b)\s*")
+
+# Текст, который подставляется в промпт вместо таблицы ошибок,
+# если исправления уже применены к тексту встречи
+CORRECTIONS_APPLIED_NOTE = "Ошибки распознавания уже исправлены в тексте встречи."
+
+
+def _lower_preserving_length(text: str) -> str:
+    """
+    Приводит текст к нижнему регистру посимвольно, не меняя длину строки
+    (нужно, чтобы позиции совпадений указывали на исходный текст)
+    """
+    return "".join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+
+
+def _clean_cell(value) -> str:
+    """Очищает ячейку таблицы от markdown-разметки и кавычек"""
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ""
+    return str(value).replace("**", "").replace("`", "").strip().strip("\"'«»")
+
+
+class RecognitionCorrector:
+    """
+    Многошаблонная замена на основе автомата Ахо-Корасик.
+
+    Все пары "исходный текст → правильный вариант" компилируются в один автомат,
+    после чего текст переписывается за один линейный проход. Поиск ведется без учета
+    регистра, заменяются только совпадения по границам слов; при пересечении
+    выбирается самое левое, а из них - самое длинное совпадение.
+
+    Parameters:
+    -----------
+    corrections: Dict[str, str]
+        Словарь замен {исходный текст: правильный вариант}
+    """
+
+    def __init__(self, corrections: Dict[str, str]):
+        self.corrections = {}
+        for source, target in corrections.items():
+            key = _lower_preserving_length(source.strip())
+            if key and key != _lower_preserving_length(target.strip()):
+                self.corrections[key] = target.strip()
+
+        # Таблица переходов, ссылки неудач и выходы (длины шаблонов) для каждого узла
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+        for pattern in self.corrections:
+            self._add_pattern(pattern)
+        self._build_failure_links()
+
+    def _add_pattern(self, pattern: str):
+        node = 0
+        for ch in pattern:
+            if ch not in self._goto[node]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[node][ch] = len(self._goto) - 1
+            node = self._goto[node][ch]
+        self._output[node].append(len(pattern))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._output[child].extend(self._output[self._fail[child]])
+
+    def find_matches(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Находит непересекающиеся совпадения шаблонов в тексте
+
+        Returns:
+        --------
+        List[Tuple[int, int]]
+            Список интервалов (начало, конец) совпадений в порядке следования
+        """
+        if not self.corrections:
+            return []
+
+        lowered = _lower_preserving_length(text)
+        # Для каждой начальной позиции запоминаем самое длинное совпадение
+        longest_at: Dict[int, int] = {}
+        node = 0
+        for pos, ch in enumerate(lowered):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length in self._output[node]:
+                start = pos - length + 1
+                end = pos + 1
+                # Совпадение засчитывается только по границам слов
+                if (start > 0 and lowered[start - 1].isalnum()) or (
+                    end < len(lowered) and lowered[end].isalnum()
+                ):
+                    continue
+                if end > longest_at.get(start, -1):
+                    longest_at[start] = end
+
+        matches = []
+        last_end = 0
+        for start in sorted(longest_at):
+            if start >= last_end:
+                matches.append((start, longest_at[start]))
+                last_end = longest_at[start]
+        return matches
+
+    def apply(self, text: str) -> Tuple[str, int]:
+        """
+        Применяет исправления к тексту
+
+        Returns:
+        --------
+        Tuple[str, int]
+            Исправленный текст и количество выполненных замен
+        """
+        matches = self.find_matches(text)
+        if not matches:
+            return text, 0
+
+        parts = []
+        last_end = 0
+        for start, end in matches:
+            parts.append(text[last_end:start])
+            parts.append(self.corrections[_lower_preserving_length(text[start:end])])
+            last_end = end
+        parts.append(text[last_end:])
+        return "".join(parts), len(matches)
+
+
+def corrections_from_dataframe(df: pd.DataFrame) -> Dict[str, str]:
+    """
+    Извлекает пары "исходный текст → правильный вариант" из таблицы ошибок распознавания.
+    Если для исходного текста указано несколько вариантов, берется первый (самый вероятный).
+
+    Parameters:
+    -----------
+    df: pd.DataFrame
+        Таблица ошибок распознавания (в формате extract_table_to_dataframe)
+
+    Returns:
+    --------
+    Dict[str, str]
+        Словарь замен
+    """
+    if df is None or df.empty or len(df.columns) < 2:
+        return {}
+
+    columns = {_clean_cell(column): column for column in df.columns}
+    source_column = columns.get(SOURCE_COLUMN, df.columns[0])
+    target_column = columns.get(TARGET_COLUMN, df.columns[1])
+
+    corrections = {}
+    for source, target in zip(df[source_column], df[target_column]):
+        source = _clean_cell(source)
+        target = VARIANTS_SEPARATOR.split(_clean_cell(target))[0].strip()
+        if source and target and source not in corrections:
+            corrections[source] = target
+    return corrections
+
+
+def apply_recognition_corrections(
+    file_content: str, corrections: Dict[str, str]
+) -> Tuple[str, int]:
+    """
+    Применяет исправления ошибок распознавания к репликам диалога
+
+    Parameters:
+    -----------
+    file_content: str
+        Содержимое файла диалога (JSON со списком реплик)
+    corrections: Dict[str, str]
+        Словарь замен
+
+    Returns:
+    --------
+    Tuple[str, int]
+        Исправленное содержимое файла и количество выполненных замен
+    """
+    corrector = RecognitionCorrector(corrections)
+    if not corrector.corrections:
+        return file_content, 0
+
+    content = json.loads(file_content)
+    total_replacements = 0
+    for entry in content:
+        entry["message"], replacements = corrector.apply(entry["message"])
+        total_replacements += replacements
+
+    return json.dumps(content, ensure_ascii=False, indent=2), total_replacements
@@ -0,0 +1,143 @@
+import json
+import re
+from collections import defaultdict
+from typing import Dict, List, Tuple
+import numpy as np
+from processing.extractive_summary import score_turns, turn_terms
+from utils.common import count_tokens
+
+# Бюджет токенов фрагментов, передаваемых в одну итерацию улучшения итогов
+DEFAULT_COVERAGE_TOKEN_BUDGET = 1_000
+# Количество подряд идущих реплик в одном фрагменте
+DEFAULT_SEGMENT_TURNS = 4
+# Реплика считается отраженной в итогах, если предложение итогов покрывает
+# не меньшую долю ее терминов (с учетом их веса)
+COVERED_THRESHOLD = 0.5
+
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def summary_sentences(summary: str) -> List[str]:
+    """Предложения и строки списков итогов (разметка MD не мешает сравнению)"""
+    return [
+        sentence
+        for sentence in SENTENCE_PATTERN.split(summary)
+        if len(turn_terms(sentence)) > 0
+    ]
+
+
+def turn_coverage(messages: List[str], summary: str) -> np.ndarray:
+    """
+    Доля содержания каждой реплики, отраженная в итогах: максимальная по предложениям
+    итогов доля IDF-веса терминов реплики, встречающихся в предложении
+
+    Parameters:
+    -----------
+    messages: List[str]
+        Тексты реплик
+    summary: str
+        Текущие итоги встречи
+
+    Returns:
+    --------
+    np.ndarray
+        Покрытие реплик от 0 до 1 (1 для реплик без терминов)
+    """
+    terms = [set(turn_terms(message)) for message in messages]
+    document_frequency: Dict[str, int] = defaultdict(int)
+    for turn in terms:
+        for term in turn:
+            document_frequency[term] += 1
+    idf = {
+        term: np.log((1 + len(messages)) / (1 + frequency)) + 1
+        for term, frequency in document_frequency.items()
+    }
+
+    # Индекс "термин -> предложения итогов, в которых он встречается"
+    sentences = summary_sentences(summary)
+    sentence_index: Dict[str, List[int]] = defaultdict(list)
+    for number, sentence in enumerate(sentences):
+        for term in set(turn_terms(sentence)):
+            sentence_index[term].append(number)
+
+    coverage = np.ones(len(messages))
+    for row, turn in enumerate(terms):
+        total_weight = sum(idf[term] for term in turn)
+        if not total_weight:
+            continue
+        overlap = np.zeros(len(sentences))
+        for term in turn:
+            for number in sentence_index.get(term, ()):
+                overlap[number] += idf[term]
+        coverage[row] = overlap.max(initial=0.0) / total_weight
+    return coverage
+
+
+def select_uncovered_segments(
+    file_content: str,
+    summary: str,
+    token_budget: int = DEFAULT_COVERAGE_TOKEN_BUDGET,
+    segment_turns: int = DEFAULT_SEGMENT_TURNS,
+) -> Tuple[str, Dict[str, int]]:
+    """
+    Отбор фрагментов расшифровки, хуже всего отраженных в текущих итогах.
+
+    Расшифровка делится на фрагменты из segment_turns подряд идущих реплик.
+    Вес фрагмента - сумма информативности его реплик (TF-IDF центральность),
+    умноженной на непокрытую итогами долю реплики. Фрагменты отбираются по
+    убыванию веса в пределах бюджета токенов, порядок реплик сохраняется.
+
+    Parameters:
+    -----------
+    file_content: str
+        Содержимое файла диалога (JSON со списком реплик)
+    summary: str
+        Текущие итоги встречи
+    token_budget: int
+        Бюджет токенов отобранных фрагментов
+    segment_turns: int
+        Количество реплик во фрагменте
+
+    Returns:
+    --------
+    Tuple[str, Dict[str, int]]
+        Отобранные реплики (JSON, пустой список, если все отражено в итогах)
+        и отчет (количество реплик и токенов всего и отобранных)
+    """
+    turns = json.loads(file_content)
+    messages = [turn["message"] for turn in turns]
+    coverage = turn_coverage(messages, summary)
+    # Реплики, уже отраженные в итогах, не передаются повторно
+    uncovered = np.where(
+        coverage < COVERED_THRESHOLD, score_turns(messages) * (1 - coverage), 0.0
+    )
+
+    starts = np.arange(0, len(turns), segment_turns)
+    segment_scores = np.add.reduceat(uncovered, starts) if len(turns) else starts
+
+    selected = []
+    used_tokens = 0
+    for segment in np.argsort(-segment_scores, kind="stable"):
+        if segment_scores[segment] <= 0:
+            break
+        segment_range = range(
+            starts[segment], min(starts[segment] + segment_turns, len(turns))
+        )
+        segment_tokens = count_tokens(
+            json.dumps([turns[i] for i in segment_range], ensure_ascii=False, indent=2)
+        )
+        if used_tokens + segment_tokens > token_budget:
+            continue
+        selected.extend(segment_range)
+        used_tokens += segment_tokens
+
+    segments_content = json.dumps(
+        [turns[index] for index in sorted(selected)], ensure_ascii=False, indent=2
+    )
+    report = {
+        "turns_total": len(turns),
+        "turns_selected": len(selected),
+        "tokens_total": count_tokens(file_content),
+        "tokens_selected": count_tokens(segments_content) if selected else 0,
+    }
+    return segments_content, report
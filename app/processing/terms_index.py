@@ -0,0 +1,273 @@
+import json
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Set, Tuple
+
+# Порог сходства (коэффициент Дайса по триграммам) для нечеткого совпадения слов
+FUZZY_MATCH_THRESHOLD = 0.6
+# Слова короче этой длины сравниваются только точно
+FUZZY_MIN_TOKEN_LENGTH = 4
+
+CYRILLIC_TO_LATIN = {
+    "а": "a",
+    "б": "b",
+    "в": "v",
+    "г": "g",
+    "д": "d",
+    "е": "e",
+    "ё": "e",
+    "ж": "zh",
+    "з": "z",
+    "и": "i",
+    "й": "i",
+    "к": "k",
+    "л": "l",
+    "м": "m",
+    "н": "n",
+    "о": "o",
+    "п": "p",
+    "р": "r",
+    "с": "s",
+    "т": "t",
+    "у": "u",
+    "ф": "f",
+    "х": "h",
+    "ц": "ts",
+    "ч": "ch",
+    "ш": "sh",
+    "щ": "sch",
+    "ъ": "",
+    "ы": "y",
+    "ь": "",
+    "э": "e",
+    "ю": "yu",
+    "я": "ya",
+}
+
+# Упрощения написания, сближающие транслитерированные русские слова с английскими
+# ("дж" -> "j", "c" перед e/i -> "s", "ph" -> "f" и т.п.)
+PHONETIC_RULES = [
+    (re.compile(r"dzh|dj"), "j"),
+    (re.compile(r"ph"), "f"),
+    (re.compile(r"ck|q"), "k"),
+    (re.compile(r"c(?=[eiy])"), "s"),
+    (re.compile(r"c"), "k"),
+    (re.compile(r"w"), "v"),
+    (re.compile(r"x"), "ks"),
+    (re.compile(r"yu"), "u"),
+    (re.compile(r"ya"), "a"),
+    (re.compile(r"(?<=[a-z])y"), "i"),
+    (re.compile(r"([a-z])\1+"), r"\1"),
+]
+
+WORD_PATTERN = re.compile(r"\w+")
+# Разделители термина и его описания в строке словаря
+TERM_SEPARATOR = re.compile(r"\s+[-—–]\s+|:|\t|\s+=\s+")
+
+
+def transliterate(text: str) -> str:
+    """Транслитерирует кириллицу в латиницу (текст должен быть в нижнем регистре)"""
+    return "".join(CYRILLIC_TO_LATIN.get(ch, ch) for ch in text)
+
+
+def phonetic_key(token: str) -> str:
+    """Упрощает написание латинского слова по правилам PHONETIC_RULES"""
+    for pattern, replacement in PHONETIC_RULES:
+        token = pattern.sub(replacement, token)
+    return token
+
+
+def normalize_token(token: str) -> str:
+    """
+    Приводит слово к виду для сравнения: нижний регистр, транслитерация
+    и фонетическое упрощение, чтобы "джира" и "Jira" были сопоставимы
+    """
+    return phonetic_key(transliterate(token.lower()))
+
+
+def token_trigrams(token: str) -> Set[str]:
+    """Возвращает множество триграмм слова с граничными пробелами"""
+    padded = f"  {token} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def extract_term_key(line: str) -> str:
+    """
+    Выделяет из строки словаря сам термин (часть до описания).
+    Поддерживаются строки вида "Термин - описание", "Термин: описание",
+    маркированные списки и строки markdown-таблиц.
+    """
+    line = line.strip()
+    if line.startswith("|"):
+        cells = [cell.strip() for cell in line.strip("|").split("|")]
+        line = next((cell for cell in cells if cell), "")
+    line = line.lstrip("-*+• ").replace("**", "").replace("`", "")
+    return TERM_SEPARATOR.split(line, maxsplit=1)[0].strip()
+
+
+def is_separator_line(line: str) -> bool:
+    """Проверяет, что строка - разделитель (строка таблицы "|---|" или линия "---")"""
+    return set(line) <= set("|-: ")
+
+
+def extract_transcript_words(file_content: str) -> Set[str]:
+    """
+    Возвращает множество нормализованных слов из реплик диалога.
+    Если содержимое не является JSON со списком реплик, берутся все слова текста.
+    """
+    try:
+        text = "\n".join(entry["message"] for entry in json.loads(file_content))
+    except (ValueError, TypeError, KeyError):
+        text = file_content
+    return {normalize_token(word) for word in WORD_PATTERN.findall(text)}
+
+
+class TermsIndex:
+    """
+    Индекс словаря терминов для отбора релевантных встрече записей.
+
+    Строки словаря разбираются на термины, слова терминов нормализуются (нижний регистр,
+    транслитерация) и помещаются в триграммный индекс. Запись считается релевантной, если
+    все значимые слова термина точно или приблизительно встречаются в тексте встречи.
+
+    Parameters:
+    -----------
+    terms_content: str
+        Содержимое файла словаря терминов
+    """
+
+    def __init__(self, terms_content: str):
+        self.entries: List[str] = []
+        self.entry_terms: List[str] = []
+        self.entry_tokens: List[List[str]] = []
+        self.token_trigrams: Dict[str, Set[str]] = {}
+        self.trigram_postings: Dict[str, Set[str]] = defaultdict(set)
+
+        lines = terms_content.splitlines()
+        for number, line in enumerate(lines):
+            stripped = line.strip()
+            # Пропускаем пустые строки, заголовки, разделители таблиц
+            # и строки заголовков таблиц (за ними следует разделитель)
+            if (
+                not stripped
+                or stripped.startswith("#")
+                or is_separator_line(stripped)
+                or (
+                    stripped.startswith("|")
+                    and number + 1 < len(lines)
+                    and lines[number + 1].strip().startswith("|")
+                    and is_separator_line(lines[number + 1].strip())
+                )
+            ):
+                continue
+            term = extract_term_key(stripped)
+            tokens = [normalize_token(token) for token in WORD_PATTERN.findall(term)]
+            significant = [token for token in tokens if len(token) >= 3] or tokens
+            if not significant:
+                continue
+
+            self.entries.append(line)
+            self.entry_terms.append(term)
+            self.entry_tokens.append(significant)
+            for token in significant:
+                if token not in self.token_trigrams:
+                    self.token_trigrams[token] = token_trigrams(token)
+                    for trigram in self.token_trigrams[token]:
+                        self.trigram_postings[trigram].add(token)
+
+    def match_tokens(
+        self, words: Iterable[str], threshold: float = FUZZY_MATCH_THRESHOLD
+    ) -> Set[str]:
+        """
+        Находит слова терминов, которые точно или приблизительно встречаются среди words
+
+        Parameters:
+        -----------
+        words: Iterable[str]
+            Нормализованные слова текста
+        threshold: float
+            Минимальный коэффициент Дайса для нечеткого совпадения
+
+        Returns:
+        --------
+        Set[str]
+            Множество совпавших слов терминов
+        """
+        matched = set()
+        for word in words:
+            if word in self.token_trigrams:
+                matched.add(word)
+                continue
+            if len(word) < FUZZY_MIN_TOKEN_LENGTH:
+                continue
+
+            # Считаем общие триграммы через инвертированный индекс
+            word_trigrams = token_trigrams(word)
+            overlaps: Dict[str, int] = defaultdict(int)
+            for trigram in word_trigrams:
+                for candidate in self.trigram_postings.get(trigram, ()):
+                    overlaps[candidate] += 1
+            for candidate, overlap in overlaps.items():
+                if len(candidate) < FUZZY_MIN_TOKEN_LENGTH:
+                    continue
+                similarity = (
+                    2
+                    * overlap
+                    / (len(word_trigrams) + len(self.token_trigrams[candidate]))
+                )
+                if similarity >= threshold:
+                    matched.add(candidate)
+        return matched
+
+    def select(
+        self, words: Iterable[str], threshold: float = FUZZY_MATCH_THRESHOLD
+    ) -> List[str]:
+        """
+        Отбирает строки словаря, все значимые слова термина которых найдены в тексте
+
+        Returns:
+        --------
+        List[str]
+            Строки словаря в исходном порядке
+        """
+        matched = self.match_tokens(words, threshold)
+        return [
+            entry
+            for entry, tokens in zip(self.entries, self.entry_tokens)
+            if all(token in matched for token in tokens)
+        ]
+
+
+@lru_cache(maxsize=8)
+def get_terms_index(terms_content: str) -> TermsIndex:
+    """
+    Возвращает индекс словаря терминов.
+    Индекс строится один раз для каждого словаря и переиспользуется между сессиями.
+    """
+    return TermsIndex(terms_content)
+
+
+def select_relevant_terms(
+    terms_content: str, file_content: str, threshold: float = FUZZY_MATCH_THRESHOLD
+) -> Tuple[str, int, int]:
+    """
+    Отбирает из словаря терминов только записи, встречающиеся в тексте встречи
+
+    Parameters:
+    -----------
+    terms_content: str
+        Содержимое файла словаря терминов
+    file_content: str
+        Содержимое файла диалога
+    threshold: float
+        Минимальный коэффициент Дайса для нечеткого совпадения
+
+    Returns:
+    --------
+    Tuple[str, int, int]
+        Отфильтрованный словарь, количество отобранных и общее количество записей
+    """
+    index = get_terms_index(terms_content)
+    selected = index.select(extract_transcript_words(file_content), threshold)
+    return "\n".join(selected), len(selected), len(index.entries)
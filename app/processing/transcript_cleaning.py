@@ -0,0 +1,157 @@
+import json
+import re
+from typing import Any, Dict, List, Tuple
+import pandas as pd
+from utils.common import count_tokens
+
+# Настройки по умолчанию (переопределяются секцией [cleaning] в config.toml)
+DEFAULT_CLEANING_CONFIG = {
+    "fillers": ["угу", "ага", "ну", "э", "ээ", "эээ", "эм", "ммм", "мм", "как бы"],
+    "backchannels": ["да", "ага", "угу", "ок", "окей", "понятно", "ясно", "хорошо"],
+    "max_backchannel_words": 2,
+    "collapse_repeats": True,
+}
+
+# Колонки, для которых при объединении реплик берется последнее значение
+LAST_VALUE_COLUMNS = {"end", "end_time", "timestamp_end"}
+# Знаки, которыми может заканчиваться предложение
+SENTENCE_END = ".!?…"
+
+
+def _words_pattern(words: List[str]) -> str:
+    """Регулярное выражение, совпадающее с любым словом (фразой) из списка целиком"""
+    alternatives = sorted(
+        (re.escape(word) for word in words if word), key=len, reverse=True
+    )
+    return r"(?<!\w)(?:" + "|".join(alternatives) + r")(?!\w)"
+
+
+def clean_messages(messages: pd.Series, config: Dict[str, Any]) -> pd.Series:
+    """
+    Векторная очистка текстов реплик:
+    удаление слов-паразитов, схлопывание повторов ("да-да", "задачу задачу")
+
+    Parameters:
+    -----------
+    messages: pd.Series
+        Тексты реплик
+    config: Dict[str, Any]
+        Настройки очистки
+
+    Returns:
+    --------
+    pd.Series
+        Очищенные тексты реплик
+    """
+    cleaned = messages.fillna("").astype(str)
+
+    if config["collapse_repeats"]:
+        # "да-да-да" -> "да"
+        cleaned = cleaned.str.replace(r"(?i)\b([^\W\d_]+)(?:-\1\b)+", r"\1", regex=True)
+        # "задачу задачу", "я думаю, я думаю" -> одно вхождение.
+        # Слова с дефисом сравниваются целиком, и повтор должен заканчиваться
+        # пробелом или знаком препинания: "что что-то" не схлопывается.
+        # Числа не схлопываются: "2 2 миллиона" может быть значимой цифрой
+        word = r"[^\W\d_]+(?:-[^\W\d_]+)*"
+        cleaned = cleaned.str.replace(
+            rf"(?i)(?<![\w-])({word}(?:\s+{word})?)(?:[\s,]+\1(?=[\s,.!?…]|$))+",
+            r"\1",
+            regex=True,
+        )
+
+    if config["fillers"]:
+        cleaned = cleaned.str.replace(
+            r"(?i)" + _words_pattern(config["fillers"]) + r"[,.…]*", "", regex=True
+        )
+
+    # Убираем следы удаленных слов: лишние пробелы и знаки препинания
+    return (
+        cleaned.str.replace(r"\s+([,.!?…])", r"\1", regex=True)
+        .str.replace(r"([,.!?…])(?:\s*,)+", r"\1", regex=True)
+        .str.replace(r"\s{2,}", " ", regex=True)
+        .str.strip(" ,")
+    )
+
+
+def _join_messages(messages: pd.Series) -> str:
+    """
+    Объединяет тексты реплик одного спикера, сохраняя границы предложений:
+    реплика без знака конца предложения завершается точкой
+    """
+    parts = [message for message in messages if message]
+    return " ".join(
+        part if part[-1] in SENTENCE_END or index == len(parts) - 1 else part + "."
+        for index, part in enumerate(parts)
+    )
+
+
+def clean_transcript(
+    file_content: str, cleaning_config: Dict[str, Any] = None
+) -> Tuple[str, List[List[int]], Dict[str, int]]:
+    """
+    Очистка расшифровки перед отправкой в модель:
+    - удаляет слова-паразиты и схлопывает повторы
+    - удаляет короткие реплики-поддакивания ("угу", "да-да", "понятно")
+    - объединяет идущие подряд реплики одного спикера, разорванные поддакиваниями
+
+    Parameters:
+    -----------
+    file_content: str
+        Содержимое файла диалога (JSON со списком реплик)
+    cleaning_config: Dict[str, Any], optional
+        Настройки очистки (секция [cleaning] в config.toml)
+
+    Returns:
+    --------
+    Tuple[str, List[List[int]], Dict[str, int]]
+        Очищенное содержимое файла, соответствие очищенных реплик исходным
+        (список номеров исходных реплик для каждой очищенной) и отчет об экономии токенов
+    """
+    config = {**DEFAULT_CLEANING_CONFIG, **(cleaning_config or {})}
+
+    df = pd.DataFrame(json.loads(file_content))
+    columns = list(df.columns)
+    df["source_turn"] = range(len(df))
+    df["message"] = clean_messages(df["message"], config)
+
+    # Реплика-поддакивание: пустая после очистки либо короткая и состоящая
+    # только из слов подтверждения. Ответ на вопрос ("Да." после реплики,
+    # заканчивающейся "?") сохраняется: иначе терялись бы ответ и ответивший
+    word_counts = df["message"].str.count(r"\w+")
+    is_backchannel = word_counts == 0
+    if config["backchannels"]:
+        without_backchannels = df["message"].str.replace(
+            r"(?i)" + _words_pattern(config["backchannels"]), "", regex=True
+        )
+        is_backchannel |= (word_counts <= config["max_backchannel_words"]) & (
+            without_backchannels.str.count(r"\w+") == 0
+        )
+        answers_question = df["message"].shift().fillna("").str.endswith("?")
+        is_backchannel &= ~(answers_question & (word_counts > 0))
+
+    # Поддакивания приписываются предыдущей реплике (поддакивания в начале -
+    # первой сохраненной), после чего идущие подряд реплики одного спикера объединяются
+    kept = df[~is_backchannel]
+    kept_group = (kept["speaker"] != kept["speaker"].shift()).cumsum()
+    turn_group = kept_group.reindex(df.index).ffill().bfill().fillna(0).astype(int)
+
+    aggregations = {
+        column: ("last" if column in LAST_VALUE_COLUMNS else "first")
+        for column in columns
+        if column != "message"
+    }
+    aggregations["message"] = _join_messages
+    merged = kept.groupby(kept_group, sort=False).agg(aggregations)
+    merged = merged.join(df.groupby(turn_group, sort=False)["source_turn"].agg(list))
+
+    turn_mapping = [[int(turn) for turn in turns] for turns in merged["source_turn"]]
+    cleaned_turns = merged[columns].to_dict("records")
+    cleaned_content = json.dumps(cleaned_turns, ensure_ascii=False, indent=2)
+
+    report = {
+        "turns_before": len(df),
+        "turns_after": len(cleaned_turns),
+        "tokens_before": count_tokens(file_content),
+        "tokens_after": count_tokens(cleaned_content),
+    }
+    return cleaned_content, turn_mapping, report
@@ -1,10 +1,19 @@
 import streamlit as st
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import pandas as pd
 from utils.copy_button import copy_button
-from utils.common import extract_table_to_dataframe
+from utils.common import extract_table_to_dataframe, step_response_to_markdown
+from utils.metrics import get_metrics_registry
 import csv
 import re
+from datetime import datetime
+
+# Вкладки результатов шагов подготовки
+PREPARE_STEP_TABS = {
+    "analyze_metadata": "💬 Участники",
+    "analyze_speakers": "📚 Детали",
+    "analyze_recognition_errors": "⚠️ Ошибки распознавания",
+}
 
 
 def process_text_for_display(text: str) -> str:
@@ -52,20 +61,66 @@ def process_text_for_copying(text: str) -> str:
 def display_debug_panel():
     """Отображение отладочной панели"""
     if st.toggle("Debug Panel", key="debug_ctrl_toggle"):
-        col0, col1, col2 = st.columns(3)
-        with col0:
-            if st.button("Перезапустить приложение"):
-                st.rerun()
-
-        with col1:
-            if st.button("Очистить кэш обращения к api"):
-                st.cache_data.clear()
-
-        with col2:
-            if st.button("Очистить внутренние переменные"):
-                for key in list(st.session_state.keys()):
-                    if key not in ["current_model"]:
-                        del st.session_state[key]
+        actions_tab, metrics_tab = st.tabs(["Действия", "Метрики"])
+        with actions_tab:
+            col0, col1, col2 = st.columns(3)
+            with col0:
+                if st.button("Перезапустить приложение"):
+                    st.rerun()
+
+            with col1:
+                if st.button("Очистить кэш обращения к api"):
+                    st.cache_data.clear()
+                    if "step_memo" in st.session_state:
+                        st.session_state["step_memo"].clear()
+
+            with col2:
+                if st.button("Очистить внутренние переменные"):
+                    for key in list(st.session_state.keys()):
+                        if key not in ["current_model"]:
+                            del st.session_state[key]
+
+        with metrics_tab:
+            display_llm_metrics()
+
+
+def display_llm_metrics():
+    """
+    Метрики запросов к моделям всех сессий процесса с момента его запуска
+    """
+    summary = get_metrics_registry().summary()
+    if not summary:
+        st.caption("Запросов к моделям еще не было")
+        return
+    df = pd.DataFrame(summary)
+    # Время до первого токена измеряют только потоковые стратегии
+    if df["ttft"].isna().all():
+        df = df.drop(columns="ttft")
+    st.dataframe(
+        df.rename(
+            columns={
+                "provider": "Провайдер",
+                "model": "Модель",
+                "requests": "Запросы",
+                "errors": "Ошибки",
+                "retries": "Повторы",
+                "p50": "p50, с",
+                "p95": "p95, с",
+                "p99": "p99, с",
+                "ttft": "До первого токена, с",
+                "tokens_per_second": "Токенов/с",
+                "queue_wait": "Ожидание, с",
+                "cache_hit_ratio": "Доля кэша",
+            }
+        ),
+        hide_index=True,
+    )
+    st.caption(
+        "Квантили длительности оцениваются по интервалам гистограмм. "
+        "Повторы - попытки, сделанные клиентом провайдера после ошибки"
+    )
+    with st.expander("Формат Prometheus"):
+        st.code(get_metrics_registry().render_prometheus(), language="text")
 
 
 def display_usage_stats(stats: Dict[str, Any], key_suffix: str):
@@ -79,6 +134,29 @@ def display_usage_stats(stats: Dict[str, Any], key_suffix: str):
     key_suffix: str
         Суффикс для уникальных ключей виджетов
     """
+    if stats.get("memo_hit"):
+        st.caption("Входные данные шага не изменились, результат взят из памяти")
+    if stats.get("speculative"):
+        st.caption("Шаг выполнен заранее, сразу после загрузки файла")
+    if "keepalive" in stats:
+        keepalive = stats["keepalive"]
+        st.caption(
+            f"Поддержание кэша: запросов {keepalive['pings']}, стоимость "
+            f"{100*keepalive['cost']:.4f} Rub, экономия на этом шаге "
+            f"{100*keepalive['saved']:.4f} Rub - "
+            + (
+                "окупилось"
+                if keepalive["saved"] >= keepalive["cost"]
+                else "не окупилось"
+            )
+        )
+    if "coverage" in stats:
+        st.caption(
+            "Улучшение по непокрытым фрагментам: реплик {turns_selected} из "
+            "{turns_total}, токенов {tokens_selected} из {tokens_total}".format(
+                **stats["coverage"]
+            )
+        )
     if st.toggle("Показать стоимость", key=f"cost_toggle_{key_suffix}"):
         col0, col1, col2, col3, col4 = st.columns(5)
         with col0:
@@ -122,6 +200,130 @@ def display_file_upload():
         st.success("Словарь терминов успешно загружен.")
 
 
+def display_duplicate_offer(
+    match: Dict[str, Any], has_summaries: bool, own_session: bool
+) -> Optional[str]:
+    """
+    Предложение переиспользовать результаты обработки похожего файла
+
+    Parameters:
+    -----------
+    match: Dict[str, Any]
+        Запись реестра похожей расшифровки (name, created_at, similarity)
+    has_summaries: bool
+        Есть ли для похожей расшифровки готовые итоги
+    own_session: bool
+        Обработан ли похожий файл в текущей сессии (имена файлов других сессий
+        не показываются)
+
+    Returns:
+    --------
+    Optional[str]
+        "prepare" - взять результаты подготовки, "summaries" - подготовки и итогов,
+        None - ничего не выбрано
+    """
+    processed_at = datetime.fromtimestamp(match["created_at"]).strftime(
+        "%d.%m.%Y %H:%M"
+    )
+    name = f"«{match['name']}» " if own_session else ""
+    st.info(
+        f"Файл похож на обработанный ранее {name}({processed_at}), "
+        f"сходство {match['similarity']:.0%}. Можно взять его результаты подготовки "
+        "вместо повторного анализа; итоги по новому тексту строятся кнопкой «Итоги»."
+    )
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Использовать результаты подготовки"):
+            return "prepare"
+    with col2:
+        if has_summaries and st.button("Использовать подготовку и итоги"):
+            return "summaries"
+    return None
+
+
+def display_segment_upload():
+    """Отображение блока загрузки нового фрагмента продолжающейся встречи"""
+    st.header("Новый фрагмент встречи")
+    return st.file_uploader(
+        "Продолжение расшифровки (JSON)",
+        type=["json"],
+        accept_multiple_files=False,
+        key="segment_file",
+    )
+
+
+def display_job_progress(job: Dict[str, Any], queue_metrics: Dict[str, Any]):
+    """
+    Отображение прогресса фонового задания
+
+    Parameters:
+    -----------
+    job: Dict[str, Any]
+        Состояние задания (см. JobRunner.get_job)
+    queue_metrics: Dict[str, Any]
+        Состояние очереди запросов к моделям (см. LLMScheduler.get_metrics)
+    """
+    done, total = job["progress_done"], job["progress_total"]
+    if job["progress_label"]:
+        text = (
+            f"Выполнено шагов: {done} из {total} (последний: {job['progress_label']})"
+        )
+    else:
+        text = "Задание ожидает выполнения"
+    st.progress(min(done / total, 1.0) if total else 0.0, text=text)
+    if queue_metrics["session_waiting"]:
+        st.caption(
+            f"Запросов в очереди к модели: {queue_metrics['session_waiting']}, "
+            f"среднее ожидание {queue_metrics['avg_wait_time']:.1f} с"
+        )
+
+
+def display_queue_metrics(queue_metrics: Dict[str, Any]):
+    """
+    Отображение состояния общей очереди запросов к моделям
+
+    Parameters:
+    -----------
+    queue_metrics: Dict[str, Any]
+        Состояние очереди запросов (см. LLMScheduler.get_metrics)
+    """
+    col0, col1, col2 = st.columns(3)
+    with col0:
+        st.metric(
+            "Выполняется",
+            f"{queue_metrics['running']}/{queue_metrics['max_concurrent']}",
+        )
+    with col1:
+        st.metric("В очереди", queue_metrics["waiting"])
+    with col2:
+        st.metric("Ожидание", f"{queue_metrics['avg_wait_time']:.1f} с")
+
+
+def display_cleaning_report(report: Dict[str, int]):
+    """
+    Отображение результатов очистки текста
+
+    Parameters:
+    -----------
+    report: Dict[str, int]
+        Отчет об очистке (количество реплик и токенов до и после)
+    """
+    saved_tokens = report["tokens_before"] - report["tokens_after"]
+    saved_percent = 100 * saved_tokens / max(report["tokens_before"], 1)
+    with st.expander("Очистка текста", expanded=False):
+        col0, col1, col2 = st.columns(3)
+        with col0:
+            st.metric(
+                "Реплики",
+                report["turns_after"],
+                report["turns_after"] - report["turns_before"],
+            )
+        with col1:
+            st.metric("Токены", report["tokens_after"], -saved_tokens)
+        with col2:
+            st.metric("Экономия токенов", f"{saved_percent:.1f} %")
+
+
 def display_participation_stats(df: pd.DataFrame):
     """
     Отображение статистики участия спикеров
@@ -152,12 +354,46 @@ def display_recognition_errors(df: pd.DataFrame) -> pd.DataFrame:
     return edited_df
 
 
+def display_preparation_progress(
+    partial_result: Dict[str, Any], elapsed: float, steps: Dict[str, Any]
+):
+    """
+    Результаты шагов подготовки по мере их завершения: готовые шаги показываются
+    сразу (без редактирования), для остальных - время выполнения
+
+    Parameters:
+    -----------
+    partial_result: Dict[str, Any]
+        Результаты завершенных шагов (response, stats, elapsed) по именам шагов
+    elapsed: float
+        Время с начала задания, секунд
+    steps: Dict[str, Any]
+        Конфигурация шагов (ответы в формате JSON показываются таблицей)
+    """
+    tabs = st.tabs(
+        [
+            ("✅ " if step in partial_result else "⏳ ") + title
+            for step, title in PREPARE_STEP_TABS.items()
+        ]
+    )
+    for tab, step in zip(tabs, PREPARE_STEP_TABS):
+        with tab:
+            if step not in partial_result:
+                st.caption(f"Шаг выполняется: {elapsed:.0f} с")
+                continue
+            st.caption(f"Готово за {partial_result[step]['elapsed']:.0f} с")
+            display_usage_stats(partial_result[step]["stats"], f"partial_{step}")
+            st.markdown(
+                step_response_to_markdown(
+                    partial_result[step]["response"], steps.get(step, {})
+                )
+            )
+
+
 def display_preprocessed_data():
     with st.expander("Итоги подготовки", expanded=False):
         # with st.toggle("Шаг 1"):
-        tab1, tab2, tab3 = st.tabs(
-            ["💬 Участники", "📚 Детали", "⚠️ Ошибки распознавания"]
-        )
+        tab1, tab2, tab3 = st.tabs(list(PREPARE_STEP_TABS.values()))
 
         with tab1:
             st.header("Участники")
@@ -231,7 +467,7 @@ def display_summary_results(step_name: str, response: str, stats: Dict[str, Any]
         copy_button(process_text_for_copying(response))
 
 
-def display_total_cost(total_cost: float):
+def display_total_cost(total_cost: float, discarded_cost: float = 0.0):
     """
     Отображение общей стоимости обработки
 
@@ -239,7 +475,15 @@ def display_total_cost(total_cost: float):
     -----------
     total_price: float
         Общая стоимость
+    discarded_cost: float, optional
+        Стоимость упреждающих запусков, результат которых не использован
+        (входит в общую стоимость)
     """
     if st.toggle("Полная стоимость", key="full_price_toggle"):
         st.header("Полная стоимость")
         st.metric("Общая стоимость", f"{100*total_cost:.4f} Rub")
+        if discarded_cost:
+            st.caption(
+                f"В том числе неиспользованные упреждающие запуски: "
+                f"{100*discarded_cost:.4f} Rub"
+            )
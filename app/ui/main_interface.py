@@ -1,20 +1,711 @@
 import streamlit as st
+import copy
 import json
+import re
+import time
+import pandas as pd
+import numpy as np
 from chat_strategies.chat_model_strategy import ChatModelStrategy
-from typing import Dict, Any
-from ui.processing_steps import process_initial_steps, process_all_summaries
+from typing import Dict, Any, Optional, Callable, Tuple
+from ui.processing_steps import (
+    build_step_messages,
+    process_step,
+    process_initial_steps,
+    process_all_summaries,
+    process_summary_update,
+)
+from utils.common import extract_step_dataframe, step_response_to_markdown
+from utils.step_memo import StepMemo
+from utils.session_manager import get_session_folder
+from utils.cache_backends import DEFAULT_TTL_HOURS, get_cache_backend
+from utils.speculative_prefetch import get_speculative_prefetcher
+from utils.llm_scheduler import (
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    get_llm_scheduler,
+    llm_request_context,
+)
+from utils.transcript_registry import get_transcript_registry
+from utils.cache_keepalive import (
+    KEEPALIVE_PROMPT,
+    KEEPALIVE_PROVIDERS,
+    get_cache_keepalive,
+    keepalive_savings,
+)
+from utils.job_runner import (
+    JOB_DONE,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    get_job_runner,
+)
+from processing.terms_index import select_relevant_terms
+from processing.error_detection import detect_recognition_errors
+from processing.transcript_cleaning import clean_transcript
+from processing.extractive_summary import condense_transcript
+from processing.live_meeting import append_turns, segment_fingerprint
+from processing.near_duplicates import (
+    DEFAULT_SIMILARITY_THRESHOLD,
+    transcript_signature,
+)
+from processing.recognition_corrections import (
+    CORRECTIONS_APPLIED_NOTE,
+    apply_recognition_corrections,
+    corrections_from_dataframe,
+)
 from ui.display_components import (
     display_debug_panel,
+    display_duplicate_offer,
     display_file_upload,
+    display_segment_upload,
     display_summary_results,
     display_total_cost,
     display_preprocessed_data,
+    display_cleaning_report,
+    display_job_progress,
+    display_preparation_progress,
 )
 
 RECURSIVE_SUMMARY_ITERATIONS_CNT = 3  # Количество итераций для рекурсивного промптинга
+# Ключи session_state с итерациями итогов
+SUMMARY_KEY_PATTERN = re.compile(r"summary\d+_(response|stats)")
+JOB_POLL_INTERVAL = 2  # Интервал опроса состояния фонового задания, секунд
+KEEPALIVE_HEARTBEAT_INTERVAL = 60  # Интервал подтверждения активности страницы, секунд
+
+# Начальные шаги анализа
+PREPARE_STEPS = [
+    "analyze_metadata",
+    "analyze_speakers",
+    "analyze_recognition_errors",
+]
+
+
+def read_uploaded_terms() -> Optional[str]:
+    """
+    Чтение полного словаря терминов, если он загружен
+    """
+    if not st.session_state.get("terms_file"):
+        return None
+    return st.session_state["terms_file"].getvalue().decode("utf-8")
+
+
+def read_terms_content(
+    file_content: str, record_selection: bool = True
+) -> Optional[str]:
+    """
+    Чтение словаря терминов, если он загружен.
+    При включенной фильтрации оставляет только термины, встречающиеся в тексте встречи.
+
+    Parameters:
+    -----------
+    file_content: str
+        Содержимое файла диалога
+    record_selection: bool, optional
+        Сохранить количество отобранных терминов в session_state (для всей встречи;
+        для части встречи, например нового фрагмента, не сохраняется)
+
+    Returns:
+    --------
+    Optional[str]
+        Содержимое словаря терминов или None
+    """
+    terms_content = read_uploaded_terms()
+    if terms_content and st.session_state.get("filter_terms"):
+        terms_content, selected_cnt, total_cnt = select_relevant_terms(
+            terms_content, file_content
+        )
+        if record_selection:
+            st.session_state["terms_selection"] = (selected_cnt, total_cnt)
+    elif record_selection:
+        st.session_state.pop("terms_selection", None)
+
+    return terms_content or None
+
+
+def get_step_memo(cache_config: Dict[str, Any]) -> StepMemo:
+    """
+    Память результатов шагов текущей сессии с контрольными точками в папке сессии
+    и общим хранилищем кэша из секции [cache] config.toml
+    """
+    if "step_memo" not in st.session_state:
+        st.session_state["step_memo"] = StepMemo(
+            checkpoint_folder=get_session_folder() / "checkpoints"
+        )
+    memo = st.session_state["step_memo"]
+    memo.backend = get_cache_backend(cache_config)
+    memo.ttl = cache_config.get("ttl_hours", DEFAULT_TTL_HOURS) * 3600
+    return memo
 
 
-def render_main_interface(chat_strategy: ChatModelStrategy, steps: Dict[str, Any]):
+def read_uploaded_transcript(config: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """
+    Чтение загруженного файла диалога и его локальная подготовка (очистка текста)
+
+    Parameters:
+    -----------
+    config: Dict[str, Any]
+        Полная конфигурация приложения (config.toml)
+
+    Returns:
+    --------
+    Tuple[str, Dict[str, Any]]
+        Подготовленный текст встречи и состояние сессии, которое восстанавливается
+        вместе с результатами подготовки (текст, результаты очистки)
+    """
+    uploaded_file = st.session_state["uploaded_file"]
+    content = json.loads(uploaded_file.getvalue().decode("utf-8"))
+    file_content = json.dumps(content, ensure_ascii=False, indent=2)
+    restore_state = {}
+
+    # Очистка текста от слов-паразитов и поддакиваний
+    if st.session_state.get("clean_transcript"):
+        file_content, turn_mapping, cleaning_report = clean_transcript(
+            file_content, config.get("cleaning", {})
+        )
+        restore_state["turn_mapping"] = turn_mapping
+        restore_state["cleaning_report"] = cleaning_report
+
+    restore_state["file_content"] = file_content
+    return file_content, restore_state
+
+
+def uploaded_signature() -> np.ndarray:
+    """
+    MinHash-сигнатура загруженного файла (вычисляется один раз для каждого файла)
+    """
+    uploaded_file = st.session_state["uploaded_file"]
+    cached = st.session_state.get("uploaded_signature")
+    if cached is None or cached[0] != uploaded_file.file_id:
+        signature = transcript_signature(uploaded_file.getvalue().decode("utf-8"))
+        cached = st.session_state["uploaded_signature"] = (
+            uploaded_file.file_id,
+            signature,
+        )
+    return cached[1]
+
+
+def find_similar_results(
+    config: Dict[str, Any]
+) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Поиск завершенной подготовки похожего файла и итогов, построенных по ее
+    результатам. Ищутся только файлы текущей сессии, если в [near_duplicates]
+    не включено share_across_sessions
+
+    Returns:
+    --------
+    Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]
+        Запись реестра похожей расшифровки и задание "Итоги" (или None)
+    """
+    uploaded_file = st.session_state.get("uploaded_file")
+    # Для этого файла результаты уже получены
+    if uploaded_file is None or (
+        st.session_state.get("prepared_file_id") == uploaded_file.file_id
+    ):
+        return None, None
+    near_duplicates_config = config.get("near_duplicates", {})
+    threshold = near_duplicates_config.get(
+        "similarity_threshold", DEFAULT_SIMILARITY_THRESHOLD
+    )
+    # Результаты других сессий принадлежат другим пользователям
+    share_across_sessions = near_duplicates_config.get("share_across_sessions", False)
+    runner = get_job_runner()
+    for match in get_transcript_registry().find_similar(
+        uploaded_signature(),
+        threshold,
+        session_id=None if share_across_sessions else st.session_state["session_id"],
+    ):
+        prepare_job = runner.get_job(match["job_id"])
+        if prepare_job is None or prepare_job["status"] != JOB_DONE:
+            continue
+        # Итоги, построенные после этой подготовки и до следующей
+        summaries_job = None
+        for job in runner.list_jobs(match["session_id"]):
+            if job["created_at"] <= prepare_job["created_at"]:
+                continue
+            if job["kind"] == "prepare":
+                break
+            if job["kind"] == "summaries" and job["status"] == JOB_DONE:
+                summaries_job = job
+        return match, summaries_job
+    return None, None
+
+
+def reuse_similar_results(
+    match: Dict[str, Any],
+    summaries_job: Optional[Dict[str, Any]],
+    steps: Dict[str, Any],
+    config: Dict[str, Any],
+):
+    """
+    Применение результатов подготовки (и итогов) похожего файла к текущей сессии.
+    Текст встречи берется из нового файла, поэтому кнопка «Итоги» заново строит
+    итоги по нему (все шаги итогов, так как их промпты содержат весь текст)
+    """
+    runner = get_job_runner()
+    # Копия: запись задания другой подготовки не должна меняться
+    prepare_job = copy.deepcopy(runner.get_job(match["job_id"]))
+    _, restore_state = read_uploaded_transcript(config)
+    read_terms_content(restore_state["file_content"])
+
+    # Результаты получены без запросов к модели, поэтому стоимость меняется
+    # только на стоимость неиспользованного упреждающего запуска
+    total_cost = st.session_state.get("total_cost", 0.0)
+    discarded_cost = st.session_state.get("speculative_discarded_cost", 0.0)
+    prepare_job["result"]["state"] = restore_state
+    finish_job(prepare_job, steps)
+    if summaries_job is not None:
+        finish_job(runner.get_job(summaries_job["job_id"]), steps)
+    st.session_state["total_cost"] = (
+        total_cost
+        + st.session_state.get("speculative_discarded_cost", 0.0)
+        - discarded_cost
+    )
+    st.session_state["prepared_file_id"] = st.session_state["uploaded_file"].file_id
+
+
+def speculative_key() -> Tuple:
+    """
+    Входные данные, от которых зависит упреждающий шаг подготовки:
+    загруженные файлы, модель и настройки подготовки текста и словаря
+    """
+    terms_file = st.session_state.get("terms_file")
+    return (
+        st.session_state["uploaded_file"].file_id,
+        terms_file.file_id if terms_file else None,
+        st.session_state["current_model"],
+        bool(st.session_state.get("clean_transcript")),
+        bool(st.session_state.get("filter_terms")),
+    )
+
+
+def prefetch_preparation(
+    chat_strategy: ChatModelStrategy, steps: Dict[str, Any], config: Dict[str, Any]
+):
+    """
+    Упреждающий запуск первого шага подготовки (analyze_metadata, он же создает
+    кэш провайдера) сразу после загрузки файла, с фоновым приоритетом.
+    Результат попадает в память результатов шагов: задание «Подготовка» берет его
+    оттуда или дожидается, если шаг еще выполняется. При смене файлов, модели или
+    настроек прежняя задача отменяется, а ее результат не используется
+    """
+    prefetcher = get_speculative_prefetcher()
+    session_id = st.session_state["session_id"]
+    key = speculative_key()
+    if prefetcher.current_key(session_id) == key:
+        return
+
+    file_content, _ = read_uploaded_transcript(config)
+    with llm_request_context(session_id, PRIORITY_BATCH):
+        prefetcher.prefetch(
+            session_id,
+            key,
+            process_step,
+            chat_strategy,
+            steps.get("analyze_metadata", {}),
+            file_content,
+            st.session_state["current_model"],
+            read_terms_content(file_content),
+            get_step_memo(config.get("cache", {})),
+        )
+
+
+def add_discarded_speculative_cost(cost: float):
+    """
+    Учет стоимости упреждающего запуска, результат которого не использован:
+    она входит в общую стоимость и отдельно показывается рядом с ней
+    """
+    if not cost:
+        return
+    st.session_state["total_cost"] = st.session_state.get("total_cost", 0.0) + cost
+    st.session_state["speculative_discarded_cost"] = (
+        st.session_state.get("speculative_discarded_cost", 0.0) + cost
+    )
+
+
+def latest_summary() -> Optional[str]:
+    """
+    Последние итоги встречи: последнее обновление по фрагментам
+    либо последняя итерация итогов
+    """
+    if st.session_state.get("live_updates"):
+        return st.session_state["live_updates"][-1]["response"]
+    for i in range(RECURSIVE_SUMMARY_ITERATIONS_CNT, -1, -1):
+        if f"summary{i}_response" in st.session_state:
+            return st.session_state[f"summary{i}_response"]
+    return None
+
+
+def prepare_segment(
+    segment_content: str, config: Dict[str, Any]
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Подготовка нового фрагмента встречи теми же локальными шагами, что и основной
+    текст (очистка, исправление ошибок распознавания). session_state не меняется:
+    состояние с добавленным фрагментом сохраняется только после успешного
+    обновления итогов
+
+    Parameters:
+    -----------
+    segment_content: str
+        Содержимое фрагмента (JSON со списком реплик)
+    config: Dict[str, Any]
+        Полная конфигурация приложения (config.toml)
+
+    Returns:
+    --------
+    Tuple[str, Dict[str, Any]]
+        Подготовленное содержимое фрагмента и состояние сессии после его добавления
+        (текст встречи, результаты очистки)
+    """
+    segment_content = json.dumps(
+        json.loads(segment_content), ensure_ascii=False, indent=2
+    )
+    segment_state = {}
+
+    if "cleaning_report" in st.session_state:
+        segment_content, segment_mapping, segment_report = clean_transcript(
+            segment_content, config.get("cleaning", {})
+        )
+        # Номера реплик фрагмента продолжают нумерацию исходного текста
+        report = st.session_state["cleaning_report"]
+        segment_state["turn_mapping"] = st.session_state["turn_mapping"] + [
+            [index + report["turns_before"] for index in group]
+            for group in segment_mapping
+        ]
+        segment_state["cleaning_report"] = {
+            key: value + segment_report[key] for key, value in report.items()
+        }
+
+    if st.session_state.get("apply_corrections_locally"):
+        segment_content, _ = apply_recognition_corrections(
+            segment_content,
+            corrections_from_dataframe(st.session_state["recognition_errors"]),
+        )
+
+    segment_state["file_content"] = append_turns(
+        st.session_state["file_content"], json.loads(segment_content)
+    )
+    return segment_content, segment_state
+
+
+def run_prepare_job(
+    chat_strategy: ChatModelStrategy,
+    file_content: str,
+    model_name: str,
+    steps: Dict[str, Any],
+    terms_content: Optional[str],
+    recognition_errors_mode: str,
+    error_candidates: Optional[pd.DataFrame],
+    memo: StepMemo,
+    restore_state: Dict[str, Any],
+    progress_callback: Callable[..., None] = None,
+) -> Dict[str, Any]:
+    """
+    Фоновое задание "Подготовка": начальные шаги анализа.
+    Выполняется вне скрипта Streamlit, поэтому не обращается к session_state;
+    все, что нужно для восстановления сессии, возвращается в результате (JSON)
+    """
+    responses, stats, df_participation = process_initial_steps(
+        chat_strategy,
+        file_content,
+        model_name,
+        steps,
+        terms_content,
+        recognition_errors_mode,
+        error_candidates,
+        memo=memo,
+        progress_callback=progress_callback,
+    )
+    return {
+        "state": restore_state,
+        "responses": responses,
+        "stats": stats,
+        "participation": df_participation.to_dict(orient="records"),
+    }
+
+
+def apply_prepare_result(result: Dict[str, Any], steps: Dict[str, Any]):
+    """
+    Сохранение результата задания "Подготовка" в session_state
+    """
+    responses, stats = result["responses"], result["stats"]
+
+    # Шаг, выполненный заранее, взят заданием из памяти: его статистика
+    # и стоимость берутся из упреждающей задачи
+    speculative = None
+    if st.session_state.get("uploaded_file") is not None:
+        speculative = get_speculative_prefetcher().take(
+            st.session_state["session_id"], speculative_key()
+        )
+    if speculative is not None and not speculative[1].get("memo_hit"):
+        if stats["analyze_metadata"].get("memo_hit"):
+            stats["analyze_metadata"] = {**speculative[1], "speculative": True}
+        else:
+            # Задание выполнило шаг заново, упреждающий запуск не пригодился
+            add_discarded_speculative_cost(speculative[1]["full_price"])
+
+    # Инициализация стоимости
+    if "total_cost" not in st.session_state:
+        st.session_state["total_cost"] = 0.0
+
+    # Обновление стоимости
+    st.session_state["total_cost"] += sum(
+        stats[step]["full_price"] for step in PREPARE_STEPS
+    )
+
+    # Таблица ошибок извлекается заново из нового ответа
+    st.session_state["recognition_errors"] = extract_step_dataframe(
+        responses["analyze_recognition_errors"],
+        steps.get("analyze_recognition_errors", {}),
+    )
+    st.session_state.pop("recognition_errors_editor", None)
+
+    # Фрагменты живой встречи и результаты очистки относятся к предыдущему тексту
+    for key in ["live_updates", "live_segments", "turn_mapping", "cleaning_report"]:
+        st.session_state.pop(key, None)
+
+    # Сохранение результатов
+    st.session_state.update(
+        {
+            **result["state"],
+            "df_participation": pd.DataFrame(
+                result["participation"], columns=["Speaker", "Participation"]
+            ),
+            # Ответы со структурированным выводом (JSON) хранятся в виде таблиц:
+            # они показываются, копируются и подставляются в промпты итогов
+            **{
+                f"response_{i}": step_response_to_markdown(
+                    responses[i], steps.get(i, {})
+                )
+                for i in PREPARE_STEPS
+            },
+            **{f"stats_{i}": stats[i] for i in PREPARE_STEPS},
+        }
+    )
+
+
+def run_summaries_job(
+    *args, progress_callback: Callable[[str], None] = None, **kwargs
+) -> Dict[str, Any]:
+    """
+    Фоновое задание "Итоги": полный процесс формирования итогов
+    (аргументы передаются в process_all_summaries)
+    """
+    summaries = process_all_summaries(
+        *args, progress_callback=progress_callback, **kwargs
+    )
+    return {"summaries": summaries}
+
+
+def apply_summaries_result(result: Dict[str, Any], steps: Dict[str, Any]):
+    """
+    Сохранение результата задания "Итоги" в session_state
+    """
+    st.session_state.setdefault("total_cost", 0.0)
+
+    # Окупилось ли поддержание кэша: первый шаг итогов прочитал продленный кэш
+    keepalive_report = st.session_state.pop("keepalive_report", None)
+    if keepalive_report is not None and result["summaries"]:
+        first_stats = result["summaries"][0][1]
+        first_stats["keepalive"] = {
+            "pings": keepalive_report["pings"],
+            "cost": keepalive_report["cost"],
+            "saved": keepalive_savings(
+                first_stats["cache_read_tokens"], keepalive_report["input_price"]
+            ),
+        }
+
+    # Итерации предыдущего, более длинного запуска (улучшение по фрагментам
+    # может остановиться раньше) не должны отображаться вместе с новыми
+    for key in list(st.session_state.keys()):
+        if SUMMARY_KEY_PATTERN.fullmatch(key):
+            del st.session_state[key]
+
+    # Сохраняем все итерации в session_state
+    for i, (response, stats) in enumerate(result["summaries"]):
+        st.session_state[f"summary{i}_response"] = response
+        st.session_state[f"summary{i}_stats"] = stats
+        st.session_state["total_cost"] += stats["full_price"]
+
+    # Итоги построены по всему тексту, включая добавленные фрагменты
+    st.session_state.pop("live_updates", None)
+
+
+def run_summary_update_job(
+    turns_cnt: int,
+    fingerprint: str,
+    segment_state: Dict[str, Any],
+    *args,
+    progress_callback: Callable[[str], None] = None,
+    **kwargs,
+) -> Dict[str, Any]:
+    """
+    Фоновое задание "Обновление итогов" живой встречи по новому фрагменту
+    из turns_cnt реплик (остальные аргументы передаются в process_summary_update).
+    Отпечаток фрагмента и состояние сессии после его добавления возвращаются
+    в результате и сохраняются вместе с обновлением итогов
+    """
+    response, stats = process_summary_update(*args, **kwargs)
+    if progress_callback is not None:
+        progress_callback("update_summary")
+    return {
+        "response": response,
+        "stats": stats,
+        "turns_cnt": turns_cnt,
+        "fingerprint": fingerprint,
+        "state": segment_state,
+    }
+
+
+def apply_summary_update_result(result: Dict[str, Any], steps: Dict[str, Any]):
+    """
+    Сохранение результата задания "Обновление итогов" в session_state:
+    фрагмент добавляется к встрече только вместе с обновлением итогов
+    """
+    st.session_state.update(result["state"])
+    st.session_state.setdefault("live_segments", []).append(result["fingerprint"])
+    st.session_state.setdefault("live_updates", []).append(
+        {key: result[key] for key in ["response", "stats", "turns_cnt"]}
+    )
+    st.session_state["total_cost"] = (
+        st.session_state.get("total_cost", 0.0) + result["stats"]["full_price"]
+    )
+
+
+JOB_RESULT_HANDLERS = {
+    "prepare": apply_prepare_result,
+    "summaries": apply_summaries_result,
+    "live_update": apply_summary_update_result,
+}
+
+
+def submit_job(kind: str, func: Callable[..., Dict[str, Any]], *args, **kwargs):
+    """
+    Запуск фонового задания от имени текущей сессии.
+    Запросы задания к модели выполняются с интерактивным приоритетом
+    """
+    session_id = st.session_state["session_id"]
+    with llm_request_context(session_id, PRIORITY_INTERACTIVE):
+        st.session_state["active_job"] = get_job_runner().submit(
+            session_id, kind, func, *args, **kwargs
+        )
+    st.session_state.pop("job_error", None)
+
+
+def finish_job(job: Optional[Dict[str, Any]], steps: Dict[str, Any]):
+    """
+    Применение результата завершенного задания к session_state
+    """
+    st.session_state.pop("active_job", None)
+    if job is None:
+        st.session_state["job_error"] = "Задание не найдено"
+    elif job["status"] == JOB_DONE:
+        JOB_RESULT_HANDLERS[job["kind"]](job["result"], steps)
+        st.session_state[f"{job['kind']}_job_id"] = job["job_id"]
+    else:
+        st.session_state["job_error"] = job["error"]
+
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def poll_active_job(steps: Dict[str, Any]):
+    """
+    Периодическая проверка состояния задания. Пока задание выполняется,
+    перезапускается только этот фрагмент; после завершения результат сохраняется
+    и страница перерисовывается полностью
+    """
+    job = get_job_runner().get_job(st.session_state["active_job"])
+    if job is not None and job["status"] in (JOB_QUEUED, JOB_RUNNING):
+        display_job_progress(
+            job, get_llm_scheduler().get_metrics(st.session_state["session_id"])
+        )
+        # Шаги подготовки показываются по мере завершения
+        if job["kind"] == "prepare":
+            display_preparation_progress(
+                job["partial_result"] or {}, time.time() - job["created_at"], steps
+            )
+        return
+
+    finish_job(job, steps)
+    st.rerun()
+
+
+def stop_cache_keepalive():
+    """
+    Прекращение поддержания кэша промптов сессии. Стоимость поддерживающих
+    запросов добавляется к общей стоимости, а отчет сохраняется для оценки
+    окупаемости по первому шагу итогов
+    """
+    report = get_cache_keepalive().stop(st.session_state["session_id"])
+    if report is not None and report["pings"]:
+        st.session_state["total_cost"] = (
+            st.session_state.get("total_cost", 0.0) + report["cost"]
+        )
+        st.session_state["keepalive_report"] = report
+
+
+@st.fragment(run_every=KEEPALIVE_HEARTBEAT_INTERVAL)
+def keep_prompt_cache_alive(chat_strategy: ChatModelStrategy):
+    """
+    Пока страница открыта, периодически подтверждает активность сессии,
+    чтобы кэш промптов с текстом встречи поддерживался до нажатия «Итоги»
+    """
+    file_content = st.session_state["file_content"]
+    get_cache_keepalive().touch(
+        st.session_state["session_id"],
+        chat_strategy,
+        st.session_state["current_model"],
+        build_step_messages(
+            file_content, KEEPALIVE_PROMPT, read_terms_content(file_content)
+        ),
+    )
+
+
+def restore_session_jobs(steps: Dict[str, Any]):
+    """
+    Восстановление результатов заданий сессии после переподключения браузера:
+    применяются результаты последних завершенных заданий и обновлений итогов
+    живой встречи, а выполняющееся задание снова отслеживается
+    """
+    runner = get_job_runner()
+    jobs = runner.list_jobs(st.session_state["session_id"])
+    latest = {job["kind"]: job for job in jobs}
+
+    prepare_job, summaries_job = latest.get("prepare"), latest.get("summaries")
+    # Итоги, построенные до последней подготовки, относятся к предыдущему тексту
+    if (
+        prepare_job
+        and summaries_job
+        and summaries_job["created_at"] < prepare_job["created_at"]
+    ):
+        summaries_job = None
+
+    # Обновления итогов после подготовки применяются по порядку вместе с итогами:
+    # каждое добавляет свой фрагмент к тексту встречи
+    restored_jobs = [prepare_job] + sorted(
+        [
+            job
+            for job in jobs
+            if job["kind"] == "live_update"
+            and prepare_job is not None
+            and job["created_at"] > prepare_job["created_at"]
+        ]
+        + ([summaries_job] if summaries_job is not None else []),
+        key=lambda job: job["created_at"],
+    )
+
+    for job in restored_jobs:
+        if job is None:
+            continue
+        if job["status"] in (JOB_QUEUED, JOB_RUNNING):
+            st.session_state["active_job"] = job["job_id"]
+            break
+        if job["status"] == JOB_DONE:
+            finish_job(runner.get_job(job["job_id"]), steps)
+
+
+def render_main_interface(
+    chat_strategy: ChatModelStrategy, steps: Dict[str, Any], config: Dict[str, Any]
+):
     """
     Отрисовка основного интерфейса приложения
 
@@ -24,6 +715,8 @@ def render_main_interface(chat_strategy: ChatModelStrategy, steps: Dict[str, Any
         Стратегия работы с моделью
     steps: Dict[str, Any]
         Конфигурация шагов обработки
+    config: Dict[str, Any]
+        Полная конфигурация приложения (config.toml)
     """
     st.title("LLM Recup")
     st.info(f"Текущая модель: {st.session_state['current_model']}")
@@ -34,84 +727,200 @@ def render_main_interface(chat_strategy: ChatModelStrategy, steps: Dict[str, Any
     # Загрузка файлов
     display_file_upload()
 
+    # Восстановление результатов заданий после переподключения
+    if "jobs_restored" not in st.session_state:
+        st.session_state["jobs_restored"] = True
+        restore_session_jobs(steps)
+    busy = "active_job" in st.session_state
+
+    # Упреждающий запуск подготовки для загруженного файла
+    prefetcher = get_speculative_prefetcher()
+    if (
+        st.session_state.get("speculative_prepare")
+        and st.session_state.get("uploaded_file") is not None
+        and st.session_state.get("prepared_file_id")
+        != st.session_state["uploaded_file"].file_id
+        and not busy
+    ):
+        prefetch_preparation(chat_strategy, steps, config)
+        if prefetcher.status(st.session_state["session_id"]) == "done":
+            st.caption("Анализ метаданных выполнен заранее")
+        else:
+            st.caption("Анализ метаданных выполняется заранее...")
+    elif not st.session_state.get("speculative_prepare"):
+        prefetcher.cancel(st.session_state["session_id"])
+    add_discarded_speculative_cost(
+        prefetcher.take_discarded_cost(st.session_state["session_id"])
+    )
+
+    # Похожий файл уже обрабатывался: его результаты можно переиспользовать
+    if not busy:
+        match, summaries_job = find_similar_results(config)
+        if match is not None:
+            action = display_duplicate_offer(
+                match,
+                summaries_job is not None,
+                match["session_id"] == st.session_state["session_id"],
+            )
+            if action is not None:
+                reuse_similar_results(
+                    match,
+                    summaries_job if action == "summaries" else None,
+                    steps,
+                    config,
+                )
+                st.rerun()
+
     # Подготовка
     button1_title = (
         "✅ Подготовка" if "response1" in st.session_state else "⚪ Подготовка"
     )
-    if st.button(button1_title):
+    if st.button(button1_title, disabled=busy):
         # Чтение файлов
-        uploaded_file = st.session_state["uploaded_file"]
-        content = json.loads(uploaded_file.getvalue().decode("utf-8"))
-        file_content = json.dumps(content, ensure_ascii=False, indent=2)
+        file_content, restore_state = read_uploaded_transcript(config)
 
         # Чтение словаря терминов, если он загружен
-        terms_content = None
-        if "terms_file" in st.session_state:
-            terms_content = st.session_state["terms_file"].getvalue().decode("utf-8")
+        terms_content = read_terms_content(file_content)
+
+        # Локальный поиск кандидатов в ошибки распознавания по полному словарю
+        recognition_errors_mode = st.session_state.get("recognition_errors_mode", "llm")
+        full_terms_content = read_uploaded_terms()
+        error_candidates = None
+        if recognition_errors_mode != "llm" and full_terms_content:
+            error_candidates = detect_recognition_errors(
+                file_content, full_terms_content
+            )
 
-        # Обработка начальных шагов
-        responses, stats, df_participation = process_initial_steps(
+        # Начальные шаги выполняются фоновым заданием
+        submit_job(
+            "prepare",
+            run_prepare_job,
             chat_strategy,
             file_content,
             st.session_state["current_model"],
             steps,
             terms_content,  # Передаем содержимое словаря терминов
+            recognition_errors_mode,
+            error_candidates,
+            get_step_memo(config.get("cache", {})),
+            restore_state,
+            progress_total=len(PREPARE_STEPS),
         )
-
-        # Названия шагов
-        steps_list = [
-            "analyze_metadata",
-            "analyze_speakers",
-            "analyze_recognition_errors",
-        ]
-
-        # Инициализация стоимости
-        if "total_cost" not in st.session_state:
-            st.session_state["total_cost"] = 0.0
-
-        # Обновление стоимости
-        st.session_state["total_cost"] += sum(
-            stats[step]["full_price"] for step in steps_list
+        st.session_state["prepared_file_id"] = st.session_state["uploaded_file"].file_id
+        # Расшифровка регистрируется для поиска похожих при следующих загрузках
+        get_transcript_registry().register(
+            uploaded_signature(),
+            st.session_state["session_id"],
+            st.session_state["active_job"],
+            st.session_state["uploaded_file"].name,
         )
 
-        # Сохранение результатов
-        st.session_state.update(
-            {
-                "file_content": file_content,
-                "df_participation": df_participation,
-                **{f"response_{i}": responses[i] for i in steps_list},
-                **{f"stats_{i}": stats[i] for i in steps_list},
-            }
+    if "cleaning_report" in st.session_state:
+        display_cleaning_report(st.session_state["cleaning_report"])
+
+    if "terms_selection" in st.session_state:
+        st.caption(
+            "Из словаря отобрано терминов: {} из {}".format(
+                *st.session_state["terms_selection"]
+            )
         )
 
     # Отображение результатов начальных шагов
     if "response_analyze_metadata" in st.session_state:
         display_preprocessed_data()
 
+    # Кэш промптов поддерживается, пока пользователь правит результаты подготовки
+    if (
+        st.session_state.get("cache_keepalive")
+        and chat_strategy.provider_name in KEEPALIVE_PROVIDERS
+        and "response_analyze_metadata" in st.session_state
+        and "summary0_response" not in st.session_state
+        and not busy
+    ):
+        keep_prompt_cache_alive(chat_strategy)
+    else:
+        stop_cache_keepalive()
+
     # Обработка и отображение результатов
-    if "response_analyze_metadata" in st.session_state and st.button("Итоги"):
+    if "response_analyze_metadata" in st.session_state and st.button(
+        "Итоги", disabled=busy
+    ):
+        stop_cache_keepalive()
+        file_content = st.session_state["file_content"]
+
         # Получаем словарь терминов, если он есть
-        terms_content = None
-        if "terms_file" in st.session_state:
-            terms_content = st.session_state["terms_file"].getvalue().decode("utf-8")
+        terms_content = read_terms_content(file_content)
+        recognition_errors = st.session_state["response_analyze_recognition_errors"]
+        # Тема и участники с учетом правок пользователя
+        topic_and_roles = st.session_state.get(
+            "topic_and_roles", st.session_state["response_analyze_metadata"]
+        )
+
+        # Локальное применение таблицы ошибок распознавания к тексту встречи
+        if st.session_state.get("apply_corrections_locally"):
+            file_content, replacements_cnt = apply_recognition_corrections(
+                file_content,
+                corrections_from_dataframe(st.session_state["recognition_errors"]),
+            )
+            st.session_state["corrections_applied_cnt"] = replacements_cnt
+            if st.session_state.get("drop_recognition_errors_from_prompt"):
+                recognition_errors = CORRECTIONS_APPLIED_NOTE
+        else:
+            st.session_state.pop("corrections_applied_cnt", None)
+
+        # Экстрактивное сокращение текста встречи для шагов итогов
+        if st.session_state.get("condense_for_summary"):
+            file_content, condense_report = condense_transcript(
+                file_content, st.session_state["summary_token_budget"]
+            )
+            st.session_state["condense_report"] = condense_report
+        else:
+            st.session_state.pop("condense_report", None)
 
-        summaries = process_all_summaries(
+        coverage_refinement = st.session_state.get("coverage_refinement", False)
+        submit_job(
+            "summaries",
+            run_summaries_job,
             chat_strategy,
-            st.session_state["file_content"],
+            file_content,
             st.session_state["current_model"],
-            st.session_state["response_analyze_metadata"],
-            st.session_state["response_analyze_recognition_errors"],
+            topic_and_roles,
+            recognition_errors,
             steps.get("generate_summary", {}),
-            steps.get("refine_summary", {}),
+            steps.get(
+                (
+                    "refine_summary_coverage"
+                    if coverage_refinement
+                    else "refine_summary"
+                ),
+                {},
+            ),
             iterations=RECURSIVE_SUMMARY_ITERATIONS_CNT,
             terms_file=terms_content,
+            memo=get_step_memo(config.get("cache", {})),
+            coverage_refinement=coverage_refinement,
+            progress_total=RECURSIVE_SUMMARY_ITERATIONS_CNT + 1,
+        )
+
+    # Прогресс выполняющегося задания
+    if "active_job" in st.session_state:
+        poll_active_job(steps)
+    if "job_error" in st.session_state:
+        st.error(f"Ошибка выполнения: {st.session_state['job_error']}")
+
+    if "corrections_applied_cnt" in st.session_state:
+        st.caption(
+            "Исправлено ошибок распознавания в тексте: "
+            f"{st.session_state['corrections_applied_cnt']}"
         )
 
-        # Сохраняем все итерации в session_state
-        for i, (response, stats) in enumerate(summaries):
-            st.session_state[f"summary{i}_response"] = response
-            st.session_state[f"summary{i}_stats"] = stats
-            st.session_state["total_cost"] += stats["full_price"]
+    if "condense_report" in st.session_state:
+        st.caption(
+            "Для итогов отобрано реплик: {turns_after} из {turns_before}, "
+            "токенов: {tokens_after} из {tokens_before}".format(
+                **st.session_state["condense_report"]
+            )
+        )
 
     # Отображение всех итераций итогов
     for i in range(0, RECURSIVE_SUMMARY_ITERATIONS_CNT + 1):
@@ -122,6 +931,62 @@ def render_main_interface(chat_strategy: ChatModelStrategy, steps: Dict[str, Any
                 st.session_state[f"summary{i}_stats"],
             )
 
+    # Живая встреча: новые фрагменты добавляются к тексту, а итоги обновляются
+    # только по новому фрагменту
+    prev_summary = latest_summary()
+    if prev_summary is not None:
+        segment_file = display_segment_upload()
+        if segment_file is not None and st.button("Обновить итоги", disabled=busy):
+            segment_content = segment_file.getvalue().decode("utf-8")
+            fingerprint = segment_fingerprint(segment_content)
+            if fingerprint in st.session_state.get("live_segments", []):
+                st.warning("Этот фрагмент уже добавлен к встрече.")
+            else:
+                segment_content, segment_state = prepare_segment(
+                    segment_content, config
+                )
+
+                recognition_errors = st.session_state[
+                    "response_analyze_recognition_errors"
+                ]
+                if st.session_state.get(
+                    "apply_corrections_locally"
+                ) and st.session_state.get("drop_recognition_errors_from_prompt"):
+                    recognition_errors = CORRECTIONS_APPLIED_NOTE
+
+                # Обновление выполняется фоновым заданием, как подготовка и итоги
+                submit_job(
+                    "live_update",
+                    run_summary_update_job,
+                    len(json.loads(segment_content)),
+                    fingerprint,
+                    segment_state,
+                    chat_strategy,
+                    segment_content,
+                    st.session_state["current_model"],
+                    st.session_state.get(
+                        "topic_and_roles",
+                        st.session_state["response_analyze_metadata"],
+                    ),
+                    recognition_errors,
+                    steps.get("update_summary", {}),
+                    prev_summary,
+                    read_terms_content(segment_content, record_selection=False),
+                    get_step_memo(config.get("cache", {})),
+                    progress_total=1,
+                )
+                st.rerun()
+
+    for i, update in enumerate(st.session_state.get("live_updates", []), start=1):
+        display_summary_results(
+            f"Обновление итогов {i} (+{update['turns_cnt']} реплик)",
+            update["response"],
+            update["stats"],
+        )
+
     # Отображение общей стоимости
     if "total_cost" in st.session_state:
-        display_total_cost(st.session_state["total_cost"])
+        display_total_cost(
+            st.session_state["total_cost"],
+            st.session_state.get("speculative_discarded_cost", 0.0),
+        )
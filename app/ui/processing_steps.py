@@ -1,10 +1,77 @@
-from typing import Dict, Tuple, Any, List
+from typing import Dict, Tuple, Any, Iterator, List, Callable
 from chat_strategies.chat_model_strategy import ChatModelStrategy
+from chat_strategies.single_flight_strategy import (
+    SingleFlightChatStrategy,
+    leader_context,
+)
 import pandas as pd
-from utils.common import calculate_speaker_participation
-from concurrent.futures import ThreadPoolExecutor
+from utils.common import calculate_speaker_participation, dataframe_to_markdown_table
+from utils.step_memo import StepMemo
+from utils.llm_scheduler import get_llm_scheduler
+from utils.metrics import get_metrics_registry
+from utils.tracing import span
+from processing.summary_coverage import (
+    DEFAULT_COVERAGE_TOKEN_BUDGET,
+    DEFAULT_SEGMENT_TURNS,
+    select_uncovered_segments,
+)
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+import contextvars
+import json
 import time
 
+# Пауза после первого шага подготовки, пока кэш провайдера станет доступен, секунд
+CACHE_WARMUP_DELAY = 10
+
+# Режимы поиска ошибок распознавания
+RECOGNITION_ERRORS_MODES = {
+    "llm": "Модель",
+    "verify": "Модель проверяет локальных кандидатов",
+    "local": "Только локально",
+}
+
+
+def empty_stats() -> Dict[str, Any]:
+    """
+    Статистика шага, выполненного без обращения к модели
+    """
+    return {
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "cache_create_tokens": 0,
+        "cache_read_tokens": 0,
+        "full_price": 0.0,
+    }
+
+
+def build_step_messages(
+    content: str, prompt: str, terms_file: str = None
+) -> List[Dict[str, str]]:
+    """
+    Сообщения запроса шага. Текст встречи и словарь терминов идут первыми
+    и одинаковы для всех шагов, поэтому образуют общий кэшируемый префикс
+    """
+    messages = []
+    # Добавляем основной контент
+    messages.extend(
+        [
+            {"role": "user", "content": content},
+            {"role": "assistant", "content": "Текст принят."},
+        ]
+    )
+    # Добавляем словарь терминов, если он предоставлен
+    if terms_file:
+        messages.extend(
+            [
+                {"role": "user", "content": f"Словарь терминов:\n{terms_file}"},
+                {"role": "assistant", "content": "Словарь терминов принят."},
+            ]
+        )
+    # Добавляем сам вопрос (system prompt)
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
 
 def process_step(
     chat_strategy: ChatModelStrategy,
@@ -12,6 +79,8 @@ def process_step(
     content: str,
     model_name: str,
     terms_file: str = None,
+    memo: StepMemo = None,
+    step_name: str = None,
 ) -> Tuple[str, Dict[str, Any]]:
     """
     Обработка одного шага с помощью модели
@@ -28,50 +97,162 @@ def process_step(
         Имя модели
     terms_file: str, optional
         Содержимое файла словаря терминов
+    memo: StepMemo, optional
+        Память результатов шагов. Если входные данные шага не изменились,
+        ответ берется из памяти без обращения к модели
+    step_name: str, optional
+        Имя шага для трассировки
 
     Returns:
     --------
     Tuple[str, Dict[str, Any]]
         Ответ модели и статистика использования
     """
-    system_prompt = step_config.get("prompt", "")
     temperature = step_config.get("temperature", 0.0)
     max_tokens = chat_strategy.get_output_max_tokens(model_name)
+    messages = build_step_messages(content, step_config.get("prompt", ""), terms_file)
 
-    messages = []
-    # Добавляем основной контент
-    messages.extend(
-        [
-            {"role": "user", "content": content},
-            {"role": "assistant", "content": "Текст принят."},
-        ]
+    structured = bool(
+        step_config.get("structured_output") and step_config.get("output_schema")
     )
-    # Добавляем словарь терминов, если он предоставлен
-    if terms_file:
-        messages.extend(
-            [
-                {"role": "user", "content": f"Словарь терминов:\n{terms_file}"},
-                {"role": "assistant", "content": "Словарь терминов принят."},
-            ]
+
+    with span(
+        "step",
+        step=step_name,
+        model=model_name,
+        input_bytes=len(content.encode("utf-8")),
+    ) as step_span:
+        if memo is not None:
+            memo_key = StepMemo.make_key(
+                messages=messages,
+                model_name=model_name,
+                temperature=temperature,
+                output_schema=step_config.get("output_schema") if structured else None,
+            )
+            memoized = memo.get(memo_key)
+            if memoized is None:
+                # Пока шаг с теми же входными данными выполняется в другой сессии
+                # или реплике, ждем его результат вместо повторного запроса
+                with memo.locked(memo_key):
+                    memoized = memo.get(memo_key)
+                    if memoized is None:
+                        response, stats = request_step(
+                            chat_strategy,
+                            step_config,
+                            messages,
+                            model_name,
+                            max_tokens,
+                            temperature,
+                            structured,
+                        )
+                        memo.set(memo_key, response, stats)
+                        step_span.set_attributes(
+                            memo_hit=False, output_bytes=len(response.encode("utf-8"))
+                        )
+                        return response, stats
+            step_span.set_attributes(memo_hit=True)
+            return memoized[0], {**empty_stats(), "memo_hit": True}
+
+        response, stats = request_step(
+            chat_strategy,
+            step_config,
+            messages,
+            model_name,
+            max_tokens,
+            temperature,
+            structured,
         )
-    # Добавляем сам вопрос (system prompt)
-    messages.append({"role": "user", "content": system_prompt})
-
-    response = chat_strategy.send_message(
-        system_prompt="",
-        messages=messages,
-        model_name=model_name,
-        max_tokens=max_tokens,
-        temperature=temperature,
-    )
+        step_span.set_attributes(output_bytes=len(response.encode("utf-8")))
+        return response, stats
 
-    stats = {
-        "input_tokens": chat_strategy.get_input_tokens(),
-        "output_tokens": chat_strategy.get_output_tokens(),
-        "cache_create_tokens": chat_strategy.get_cache_create_tokens(),
-        "cache_read_tokens": chat_strategy.get_cache_read_tokens(),
-        "full_price": chat_strategy.get_full_price(),
-    }
+
+def request_step(
+    chat_strategy: ChatModelStrategy,
+    step_config: Dict[str, Any],
+    messages: List[Dict[str, str]],
+    model_name: str,
+    max_tokens: int,
+    temperature: float,
+    structured: bool,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Запрос к модели для шага с уже подготовленными сообщениями
+
+    Returns:
+    --------
+    Tuple[str, Dict[str, Any]]
+        Ответ модели и статистика использования
+    """
+    # Запрос ждет своей очереди в общем для всех сессий регуляторе запросов.
+    # Одинаковые запросы объединяются до постановки в очередь: место у регулятора
+    # занимает только запрос, который действительно обращается к провайдеру, а
+    # ожидающие его результат запросы места не занимают.
+    # Шаги со схемой ответа выполняются в режиме структурированного вывода,
+    # ответом шага становится компактный JSON
+    metrics = get_metrics_registry()
+    provider = chat_strategy.provider_name
+    queue_wait = 0.0
+
+    @contextmanager
+    def provider_slot() -> Iterator[None]:
+        nonlocal queue_wait
+        queued_at = time.monotonic()
+        with get_llm_scheduler().slot(provider):
+            queue_wait = time.monotonic() - queued_at
+            yield
+
+    if isinstance(chat_strategy, SingleFlightChatStrategy):
+        call_context = leader_context(provider_slot)
+    else:
+        call_context = provider_slot()
+
+    with span(
+        "llm.call", provider=provider, model=model_name, structured=structured
+    ) as call_span:
+        started_at = time.monotonic()
+        try:
+            with call_context:
+                if structured:
+                    response_data = chat_strategy.send_structured_message(
+                        system_prompt="",
+                        messages=messages,
+                        model_name=model_name,
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                        schema_name=step_config.get("output_name", "result"),
+                        schema=json.loads(step_config["output_schema"]),
+                    )
+                    response = json.dumps(response_data, ensure_ascii=False)
+                else:
+                    response = chat_strategy.send_message(
+                        system_prompt="",
+                        messages=messages,
+                        model_name=model_name,
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                    )
+        except Exception as e:
+            metrics.record_error(provider, model_name, e, queue_wait)
+            raise
+        duration = time.monotonic() - started_at - queue_wait
+
+        stats = {
+            "input_tokens": chat_strategy.get_input_tokens(),
+            "output_tokens": chat_strategy.get_output_tokens(),
+            "cache_create_tokens": chat_strategy.get_cache_create_tokens(),
+            "cache_read_tokens": chat_strategy.get_cache_read_tokens(),
+            "full_price": chat_strategy.get_full_price(),
+        }
+        call_span.set_attributes(queue_wait=queue_wait, **stats)
+        metrics.record_request(
+            provider,
+            model_name,
+            duration,
+            queue_wait,
+            stats,
+            chat_strategy.get_time_to_first_token(),
+            chat_strategy.get_retries(),
+        )
 
     return response, stats
 
@@ -82,6 +263,10 @@ def process_initial_steps(
     model_name: str,
     steps: Dict[str, Any],
     terms_file: str = None,
+    recognition_errors_mode: str = "llm",
+    error_candidates: pd.DataFrame = None,
+    memo: StepMemo = None,
+    progress_callback: Callable[[str, Dict[str, Any]], None] = None,
 ) -> Tuple[Dict[str, str], Dict[str, Dict[str, Any]], pd.DataFrame]:
     """
     Параллельная обработка начальных шагов анализа
@@ -98,61 +283,124 @@ def process_initial_steps(
         Конфигурация шагов
     terms_file: str, optional
         Содержимое файла словаря терминов
+    recognition_errors_mode: str, optional
+        Режим поиска ошибок распознавания (ключ RECOGNITION_ERRORS_MODES)
+    error_candidates: pd.DataFrame, optional
+        Кандидаты в ошибки распознавания, найденные локально по словарю терминов
+    memo: StepMemo, optional
+        Память результатов шагов
+    progress_callback: Callable[[str, Dict[str, Any]], None], optional
+        Вызывается сразу после завершения каждого шага (в порядке завершения)
+        с именем шага и его результатом: ответом модели (response), статистикой
+        (stats) и временем от начала подготовки (elapsed, секунд)
 
     Returns:
     --------
     Tuple[Dict[str, str], Dict[str, Dict[str, Any]], pd.DataFrame]
         Ответы моделей, статистика и DataFrame с участием спикеров
     """
-    # Расчет участия спикеров
-    speaker_participation = calculate_speaker_participation(file_content)
-    df_participation = pd.DataFrame(
-        list(speaker_participation.items()), columns=["Speaker", "Participation"]
-    )
-
-    responses = {}
-    stats = {}
-
-    # Первый шаг - analyze_metadata.
-    # Идет отдельно, т.к. позволяет инициализировать кэш
-    response, step_stats = process_step(
-        chat_strategy,
-        steps.get("analyze_metadata", {}),
-        file_content,
-        model_name,
-        terms_file,
-    )
+    with span(
+        "pipeline.prepare",
+        model=model_name,
+        input_bytes=len(file_content.encode("utf-8")),
+        recognition_errors_mode=recognition_errors_mode,
+    ):
+        # Расчет участия спикеров
+        speaker_participation = calculate_speaker_participation(file_content)
+        df_participation = pd.DataFrame(
+            list(speaker_participation.items()), columns=["Speaker", "Participation"]
+        )
 
-    responses["analyze_metadata"] = response
-    stats["analyze_metadata"] = step_stats
+        responses = {}
+        stats = {}
+        started_at = time.monotonic()
+
+        def step_done(step_name: str):
+            if progress_callback:
+                progress_callback(
+                    step_name,
+                    {
+                        "response": responses[step_name],
+                        "stats": stats[step_name],
+                        "elapsed": time.monotonic() - started_at,
+                    },
+                )
+
+        # Первый шаг - analyze_metadata.
+        # Идет отдельно, т.к. позволяет инициализировать кэш
+        response, step_stats = process_step(
+            chat_strategy,
+            steps.get("analyze_metadata", {}),
+            file_content,
+            model_name,
+            terms_file,
+            memo,
+            "analyze_metadata",
+        )
 
-    # Ждем 10 секунд
-    time.sleep(10)
+        responses["analyze_metadata"] = response
+        stats["analyze_metadata"] = step_stats
+        step_done("analyze_metadata")
 
-    # Параллельное выполнение оставшихся шагов
-    # Испольуя кэш
-    parallel_steps = ["analyze_speakers", "analyze_recognition_errors"]
+        # Ждем, пока кэш провайдера станет доступен.
+        # Если шаг взят из памяти, кэш уже был создан ранее
+        if not step_stats.get("memo_hit"):
+            time.sleep(CACHE_WARMUP_DELAY)
 
-    with ThreadPoolExecutor() as executor:
-        futures = {
-            step_name: executor.submit(
-                process_step,
-                chat_strategy,
-                steps.get(step_name, {}),
-                file_content,
-                model_name,
-                terms_file,
-            )
-            for step_name in parallel_steps
+        # Параллельное выполнение оставшихся шагов
+        # Испольуя кэш
+        parallel_steps = ["analyze_speakers", "analyze_recognition_errors"]
+        step_configs = {
+            step_name: steps.get(step_name, {}) for step_name in parallel_steps
         }
 
-        # Сбор результатов параллельных шагов
-        for step_name, future in futures.items():
-            response, step_stats = future.result()
-            responses[step_name] = response
-            stats[step_name] = step_stats
-
-    return responses, stats, df_participation
+        # Локально найденные кандидаты либо заменяют шаг поиска ошибок,
+        # либо передаются модели на проверку
+        if recognition_errors_mode != "llm" and error_candidates is not None:
+            candidates_table = dataframe_to_markdown_table(error_candidates)
+            if recognition_errors_mode == "local":
+                parallel_steps.remove("analyze_recognition_errors")
+                responses["analyze_recognition_errors"] = (
+                    candidates_table or "Ошибки распознавания не найдены."
+                )
+                stats["analyze_recognition_errors"] = empty_stats()
+                step_done("analyze_recognition_errors")
+            elif candidates_table:
+                # Шаг проверки наследует от analyze_recognition_errors формат ответа
+                verify_config = steps.get("verify_recognition_errors", {})
+                step_configs["analyze_recognition_errors"] = {
+                    **steps.get("analyze_recognition_errors", {}),
+                    **verify_config,
+                    "prompt": verify_config.get("prompt", "").replace(
+                        "<<CANDIDATES>>", candidates_table
+                    ),
+                }
+
+        # Потоки наследуют контекст запросов (сессию и приоритет) вызывающего потока
+        with ThreadPoolExecutor(max_workers=len(parallel_steps)) as executor:
+            futures = {
+                executor.submit(
+                    contextvars.copy_context().run,
+                    process_step,
+                    chat_strategy,
+                    step_configs[step_name],
+                    file_content,
+                    model_name,
+                    terms_file,
+                    memo,
+                    step_name,
+                ): step_name
+                for step_name in parallel_steps
+            }
+
+            # Результаты параллельных шагов передаются по мере завершения,
+            # чтобы медленный шаг не задерживал показ уже готовых
+            for future in as_completed(futures):
+                step_name = futures[future]
+                responses[step_name], stats[step_name] = future.result()
+                step_done(step_name)
+
+        return responses, stats, df_participation
 
 
 def process_summary_initial(
@@ -163,6 +411,7 @@ def process_summary_initial(
     recognition_errors: str,
     step_config: Dict[str, Any],
     terms_file: str = None,
+    memo: StepMemo = None,
 ) -> Tuple[str, Dict[str, Any]]:
     """
     Первый этап формирования итогов steps.generate_summary
@@ -179,6 +428,8 @@ def process_summary_initial(
         file_content,
         model_name,
         terms_file,
+        memo,
+        "generate_summary",
     )
 
 
@@ -191,6 +442,7 @@ def process_summary_recursive(
     step_config: Dict[str, Any],
     prev_summary: str,
     terms_file: str = None,
+    memo: StepMemo = None,
 ) -> Tuple[str, Dict[str, Any]]:
     """
     Рекурсивное улучшение итогов (step5+)
@@ -208,6 +460,42 @@ def process_summary_recursive(
         file_content,
         model_name,
         terms_file,
+        memo,
+        "refine_summary",
+    )
+
+
+def process_summary_update(
+    chat_strategy: ChatModelStrategy,
+    segment_content: str,
+    model_name: str,
+    topic_roles: str,
+    recognition_errors: str,
+    step_config: Dict[str, Any],
+    prev_summary: str,
+    terms_file: str = None,
+    memo: StepMemo = None,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Обновление итогов продолжающейся встречи steps.update_summary.
+    Модели передается только новый фрагмент расшифровки и последние итоги,
+    поэтому стоимость обновления зависит от размера фрагмента, а не всей встречи.
+    """
+    prompt = (
+        step_config["prompt"]
+        .replace("<<TOPIC_AND_ROLES>>", topic_roles)
+        .replace("<<RECOGNITION_ERRORS>>", recognition_errors)
+        .replace("<<PREV_RESUME>>", prev_summary)
+    )
+
+    return process_step(
+        chat_strategy,
+        {"prompt": prompt, "temperature": step_config.get("temperature", 0)},
+        segment_content,
+        model_name,
+        terms_file,
+        memo,
+        "update_summary",
     )
 
 
@@ -221,43 +509,79 @@ def process_all_summaries(
     refine_summary_config: Dict[str, Any],
     iterations: int = 2,
     terms_file: str = None,
+    memo: StepMemo = None,
+    progress_callback: Callable[[str], None] = None,
+    coverage_refinement: bool = False,
 ) -> List[Tuple[str, Dict[str, Any]]]:
     """
-    Полный процесс формирования итогов с рекурсивным улучшением
+    Полный процесс формирования итогов с рекурсивным улучшением.
+    progress_callback, если задан, вызывается после каждой итерации.
+
+    При coverage_refinement в каждую итерацию улучшения вместо всего текста
+    передаются только фрагменты, хуже всего отраженные в предыдущих итогах
+    (refine_summary_config - шаг steps.refine_summary_coverage). Если непокрытых
+    фрагментов не осталось, улучшение завершается досрочно
 
     Returns:
     --------
     List[Tuple[str, Dict[str, Any]]]
         Список кортежей (ответ, статистика) для каждой итерации
     """
-    results = []
-
-    # Первый этап (step4)
-    response, stats = process_summary_initial(
-        chat_strategy,
-        file_content,
-        model_name,
-        topic_roles,
-        recognition_errors,
-        generate_summary_config,
-        terms_file,
-    )
-    results.append((response, stats))
-
-    # Рекурсивные улучшения
-    prev_summary = response
-    for _ in range(iterations):
-        response, stats = process_summary_recursive(
+    with span(
+        "pipeline.summaries",
+        model=model_name,
+        iterations=iterations,
+        coverage_refinement=coverage_refinement,
+    ):
+        results = []
+
+        # Первый этап (step4)
+        response, stats = process_summary_initial(
             chat_strategy,
             file_content,
             model_name,
             topic_roles,
             recognition_errors,
-            refine_summary_config,
-            prev_summary,
+            generate_summary_config,
             terms_file,
+            memo,
         )
         results.append((response, stats))
-        prev_summary = response
+        if progress_callback:
+            progress_callback("generate_summary")
 
-    return results
+        # Рекурсивные улучшения
+        prev_summary = response
+        for _ in range(iterations):
+            refine_content, coverage_report = file_content, None
+            if coverage_refinement:
+                refine_content, coverage_report = select_uncovered_segments(
+                    file_content,
+                    prev_summary,
+                    refine_summary_config.get(
+                        "token_budget", DEFAULT_COVERAGE_TOKEN_BUDGET
+                    ),
+                    refine_summary_config.get("segment_turns", DEFAULT_SEGMENT_TURNS),
+                )
+                if not coverage_report["turns_selected"]:
+                    break
+
+            response, stats = process_summary_recursive(
+                chat_strategy,
+                refine_content,
+                model_name,
+                topic_roles,
+                recognition_errors,
+                refine_summary_config,
+                prev_summary,
+                terms_file,
+                memo,
+            )
+            if coverage_report is not None:
+                stats = {**stats, "coverage": coverage_report}
+            results.append((response, stats))
+            prev_summary = response
+            if progress_callback:
+                progress_callback("refine_summary")
+
+        return results
@@ -1,6 +1,10 @@
 import streamlit as st
 from typing import Dict
 from chat_strategies.chat_model_strategy import ChatModelStrategy
+from ui.processing_steps import RECOGNITION_ERRORS_MODES
+from processing.extractive_summary import DEFAULT_TOKEN_BUDGET
+from utils.llm_scheduler import get_llm_scheduler
+from ui.display_components import display_queue_metrics
 
 
 def render_sidebar(available_strategies: Dict[str, ChatModelStrategy]):
@@ -37,3 +41,77 @@ def render_sidebar(available_strategies: Dict[str, ChatModelStrategy]):
 
         # Сохраняем выбранную модель в session_state
         st.session_state["current_model"] = selected_model
+
+        st.subheader("Обработка текста")
+        st.toggle(
+            "Очищать текст от слов-паразитов и поддакиваний",
+            key="clean_transcript",
+            help="Удаляет слова-паразиты, повторы и короткие реплики-поддакивания "
+            "перед отправкой текста в модель",
+        )
+        st.toggle(
+            "Отбирать из словаря только релевантные термины",
+            key="filter_terms",
+            help="В запросы передаются только термины, которые точно или "
+            "приблизительно встречаются в тексте встречи",
+        )
+        st.selectbox(
+            "Поиск ошибок распознавания",
+            list(RECOGNITION_ERRORS_MODES),
+            format_func=RECOGNITION_ERRORS_MODES.get,
+            key="recognition_errors_mode",
+            help="Локальный поиск сравнивает текст встречи со словарем терминов "
+            "и работает только при загруженном словаре",
+        )
+        st.toggle(
+            "Исправлять ошибки распознавания локально",
+            key="apply_corrections_locally",
+            help="Перед формированием итогов исправления из таблицы ошибок "
+            "применяются к тексту встречи без участия модели",
+        )
+        st.toggle(
+            "Не передавать таблицу ошибок в промпт",
+            key="drop_recognition_errors_from_prompt",
+            disabled=not st.session_state["apply_corrections_locally"],
+            help="Экономит токены промпта в каждом шаге итогов",
+        )
+        st.toggle(
+            "Начинать подготовку сразу после загрузки",
+            key="speculative_prepare",
+            help="Анализ метаданных (и создание кэша провайдера) запускается "
+            "в фоне сразу после загрузки файла, до нажатия «Подготовка». "
+            "При смене файлов, модели или настроек результат не используется",
+        )
+
+        st.subheader("Итоги")
+        st.toggle(
+            "Сокращать длинные встречи для итогов",
+            key="condense_for_summary",
+            help="Для формирования итогов локально отбираются самые информативные "
+            "реплики в пределах бюджета токенов. Шаги подготовки видят полный текст",
+        )
+        st.number_input(
+            "Бюджет токенов для итогов",
+            min_value=1_000,
+            value=DEFAULT_TOKEN_BUDGET,
+            step=5_000,
+            key="summary_token_budget",
+            disabled=not st.session_state["condense_for_summary"],
+        )
+        st.toggle(
+            "Поддерживать кэш промптов до формирования итогов",
+            key="cache_keepalive",
+            help="Пока результаты подготовки правятся, кэш текста встречи у "
+            "провайдера продлевается минимальными запросами раз в 4 минуты "
+            "(только Anthropic, не дольше часа)",
+        )
+        st.toggle(
+            "Улучшать итоги по непокрытым фрагментам",
+            key="coverage_refinement",
+            help="В итерации улучшения итогов передаются не весь текст, а только "
+            "реплики, слабо отраженные в предыдущих итогах (шаг "
+            "refine_summary_coverage)",
+        )
+
+        st.subheader("Очередь запросов к моделям")
+        display_queue_metrics(get_llm_scheduler().get_metrics())
@@ -0,0 +1,298 @@
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+DEFAULT_SQLITE_PATH = Path("Data/cache.sqlite3")
+DEFAULT_REDIS_URL = "redis://localhost:6379/0"
+DEFAULT_MAX_ENTRIES = 10_000
+# Время хранения записей кэша по умолчанию, часов
+DEFAULT_TTL_HOURS = 168
+# Блокировка освобождается автоматически, если владелец не снял ее за это время, секунд
+LOCK_EXPIRE = 600
+# Интервал повторных попыток захвата блокировки, секунд
+LOCK_POLL_INTERVAL = 0.5
+
+
+class CacheBackend(ABC):
+    """
+    Хранилище кэша результатов шагов "ключ - строка" с блокировками.
+
+    Реализации отличаются областью видимости: память процесса, файл SQLite
+    (общий для процессов одной машины) или Redis (общий для всех реплик).
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Возвращает значение по ключу или None"""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: Optional[float] = None):
+        """Сохраняет значение; ttl - время хранения в секундах (None - бессрочно)"""
+        pass
+
+    @abstractmethod
+    def delete(self, key: str):
+        """Удаляет значение по ключу"""
+        pass
+
+    @abstractmethod
+    def _try_acquire(self, name: str, token: str, expire: float) -> bool:
+        """Пытается захватить блокировку name с меткой владельца token"""
+        pass
+
+    @abstractmethod
+    def _release(self, name: str, token: str):
+        """Освобождает блокировку name, если ее владелец - token"""
+        pass
+
+    @contextmanager
+    def lock(self, name: str, wait_timeout: float = LOCK_EXPIRE) -> Iterator[bool]:
+        """
+        Блокировка с ожиданием, видимая всем пользователям хранилища.
+
+        Если блокировку не удалось захватить за wait_timeout секунд, блок
+        выполняется без нее (возвращается False): дублирование работы лучше,
+        чем бесконечное ожидание зависшего владельца.
+        """
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + wait_timeout
+        acquired = self._try_acquire(name, token, LOCK_EXPIRE)
+        while not acquired and time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            acquired = self._try_acquire(name, token, LOCK_EXPIRE)
+        if not acquired:
+            logging.warning(f"Не удалось дождаться блокировки {name}")
+
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self._release(name, token)
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    Кэш в памяти процесса с вытеснением давно не использованных записей.
+    Общий для всех сессий процесса, но не для разных реплик.
+
+    Parameters:
+    -----------
+    max_entries: int
+        Максимальное количество записей
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, Optional[float]]]" = OrderedDict()
+        self._locks: Dict[str, Tuple[str, float]] = {}
+        self._mutex = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._mutex:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None):
+        with self._mutex:
+            self._entries[key] = (value, time.time() + ttl if ttl else None)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._mutex:
+            self._entries.pop(key, None)
+
+    def _try_acquire(self, name: str, token: str, expire: float) -> bool:
+        with self._mutex:
+            holder = self._locks.get(name)
+            if holder is not None and holder[1] > time.monotonic():
+                return False
+            self._locks[name] = (token, time.monotonic() + expire)
+            return True
+
+    def _release(self, name: str, token: str):
+        with self._mutex:
+            if self._locks.get(name, ("",))[0] == token:
+                del self._locks[name]
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Кэш в файле SQLite. Общий для всех процессов (реплик) одной машины
+    или для реплик, использующих общий том.
+
+    Parameters:
+    -----------
+    path: Path
+        Путь к файлу базы данных
+    """
+
+    def __init__(self, path: Path = DEFAULT_SQLITE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS locks "
+                "(name TEXT PRIMARY KEY, token TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Контекст соединения sqlite3 только фиксирует транзакцию, но не закрывает его
+        with closing(sqlite3.connect(self.path, timeout=30)) as connection:
+            with connection:
+                yield connection
+
+    def get(self, key: str) -> Optional[str]:
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT value FROM cache WHERE key = ? "
+                "AND (expires_at IS NULL OR expires_at >= ?)",
+                (key, time.time()),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None):
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl if ttl else None),
+            )
+            # Заодно удаляем устаревшие записи
+            connection.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+
+    def delete(self, key: str):
+        with self._connect() as connection:
+            connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def _try_acquire(self, name: str, token: str, expire: float) -> bool:
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute(
+                "DELETE FROM locks WHERE name = ? AND expires_at < ?", (name, now)
+            )
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO locks (name, token, expires_at) VALUES (?, ?, ?)",
+                (name, token, now + expire),
+            )
+            return cursor.rowcount == 1
+
+    def _release(self, name: str, token: str):
+        with self._connect() as connection:
+            connection.execute(
+                "DELETE FROM locks WHERE name = ? AND token = ?", (name, token)
+            )
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Кэш в Redis (или совместимом сервере). Общий для всех реплик приложения.
+    Требует установленного пакета redis.
+
+    Parameters:
+    -----------
+    url: str
+        Адрес сервера Redis
+    prefix: str
+        Префикс ключей приложения
+    """
+
+    # Снятие блокировки только ее владельцем (атомарно на стороне сервера)
+    RELEASE_SCRIPT = """
+    if redis.call("get", KEYS[1]) == ARGV[1] then
+        return redis.call("del", KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(self, url: str = DEFAULT_REDIS_URL, prefix: str = "llm_recup:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError(
+                "Для кэша в Redis установите пакет redis: pip install redis"
+            ) from e
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[str]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None):
+        self.client.set(self.prefix + key, value, px=int(ttl * 1000) if ttl else None)
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def _try_acquire(self, name: str, token: str, expire: float) -> bool:
+        return bool(
+            self.client.set(
+                f"{self.prefix}lock:{name}", token, nx=True, px=int(expire * 1000)
+            )
+        )
+
+    def _release(self, name: str, token: str):
+        self.client.eval(self.RELEASE_SCRIPT, 1, f"{self.prefix}lock:{name}", token)
+
+
+def create_cache_backend(cache_config: Dict[str, Any]) -> CacheBackend:
+    """
+    Создает хранилище кэша по секции [cache] из config.toml
+
+    Parameters:
+    -----------
+    cache_config: Dict[str, Any]
+        Параметры: backend ("memory", "sqlite" или "redis"), max_entries, path, url
+
+    Returns:
+    --------
+    CacheBackend
+        Хранилище кэша
+    """
+    backend = cache_config.get("backend", "memory")
+    if backend == "memory":
+        return MemoryCacheBackend(cache_config.get("max_entries", DEFAULT_MAX_ENTRIES))
+    if backend == "sqlite":
+        return SQLiteCacheBackend(Path(cache_config.get("path", DEFAULT_SQLITE_PATH)))
+    if backend == "redis":
+        return RedisCacheBackend(cache_config.get("url", DEFAULT_REDIS_URL))
+    raise ValueError(f"Неизвестный тип хранилища кэша: {backend}")
+
+
+_cache_backend: Optional[CacheBackend] = None
+_cache_backend_config: Optional[Dict[str, Any]] = None
+_cache_backend_lock = threading.Lock()
+
+
+def get_cache_backend(cache_config: Dict[str, Any]) -> CacheBackend:
+    """
+    Возвращает общее для всех сессий процесса хранилище кэша.
+    Хранилище создается заново только при изменении секции [cache]
+    """
+    global _cache_backend, _cache_backend_config
+    with _cache_backend_lock:
+        if _cache_backend is None or _cache_backend_config != cache_config:
+            _cache_backend = create_cache_backend(cache_config)
+            _cache_backend_config = dict(cache_config)
+        return _cache_backend
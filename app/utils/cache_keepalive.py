@@ -0,0 +1,181 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from chat_strategies.chat_model_strategy import ChatModelStrategy
+from chat_strategies.single_flight_strategy import (
+    SingleFlightChatStrategy,
+    leader_context,
+)
+from utils.llm_scheduler import PRIORITY_BATCH, get_llm_scheduler, llm_request_context
+from utils.tracing import span
+
+# Провайдеры, у которых кэш промптов истекает через несколько минут без обращений
+KEEPALIVE_PROVIDERS = {"anthropic"}
+# Интервал поддерживающих запросов, секунд (меньше 5-минутного времени жизни кэша)
+KEEPALIVE_INTERVAL = 240
+# Сессия считается покинутой, если страница не подтверждала активность дольше, секунд
+HEARTBEAT_TIMEOUT = 150
+# Максимальная длительность поддержания кэша одной сессии, секунд
+MAX_KEEPALIVE_DURATION = 3600
+# Интервал проверки сессий фоновым потоком, секунд
+CHECK_INTERVAL = 5
+# Коэффициенты цены токенов записи и чтения кэша относительно входных токенов
+CACHE_CREATE_PRICE_FACTOR = 1.25
+CACHE_READ_PRICE_FACTOR = 0.1
+
+KEEPALIVE_PROMPT = "Ответь одним словом: ок"
+
+
+@dataclass
+class _KeepAliveEntry:
+    chat_strategy: ChatModelStrategy
+    model_name: str
+    messages: List[Dict[str, str]]
+    started_at: float = field(default_factory=time.monotonic)
+    last_heartbeat: float = field(default_factory=time.monotonic)
+    last_request: float = field(default_factory=time.monotonic)
+    pings: int = 0
+    cost: float = 0.0
+
+
+class CacheKeepAlive:
+    """
+    Поддержание кэша промптов провайдера, пока пользователь правит результаты
+    подготовки перед формированием итогов.
+
+    Для зарегистрированной сессии фоновый поток раз в KEEPALIVE_INTERVAL секунд
+    отправляет минимальный запрос (один выходной токен) с тем же префиксом
+    сообщений (текст встречи и словарь терминов), что и у шагов итогов: чтение
+    кэша продлевает время его жизни. Поддержание прекращается, когда сессия
+    переходит к следующему шагу (stop), перестает подтверждать активность
+    (страница закрыта) или по истечении MAX_KEEPALIVE_DURATION.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, _KeepAliveEntry] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def touch(
+        self,
+        session_id: str,
+        chat_strategy: ChatModelStrategy,
+        model_name: str,
+        messages: List[Dict[str, str]],
+    ):
+        """
+        Регистрирует сессию или подтверждает ее активность.
+        Если изменились модель или префикс сообщений, учет начинается заново
+        """
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if (
+                entry is None
+                or entry.model_name != model_name
+                or entry.messages != messages
+            ):
+                self._entries[session_id] = _KeepAliveEntry(
+                    chat_strategy, model_name, messages
+                )
+            else:
+                entry.last_heartbeat = time.monotonic()
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="cache-keepalive", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Прекращает поддержание кэша сессии
+
+        Returns:
+        --------
+        Optional[Dict[str, Any]]
+            Количество (pings) и стоимость (cost) поддерживающих запросов и цена
+            миллиона входных токенов модели (input_price) или None
+        """
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+        if entry is None:
+            return None
+        return {
+            "pings": entry.pings,
+            "cost": entry.cost,
+            "input_price": entry.chat_strategy.get_input_price(entry.model_name),
+        }
+
+    def _run(self):
+        while True:
+            time.sleep(CHECK_INTERVAL)
+            now = time.monotonic()
+            with self._lock:
+                for session_id, entry in list(self._entries.items()):
+                    if (
+                        now - entry.last_heartbeat > HEARTBEAT_TIMEOUT
+                        or now - entry.started_at > MAX_KEEPALIVE_DURATION
+                    ):
+                        del self._entries[session_id]
+                due = [
+                    (session_id, entry)
+                    for session_id, entry in self._entries.items()
+                    if now - entry.last_request >= KEEPALIVE_INTERVAL
+                ]
+            for session_id, entry in due:
+                self._ping(session_id, entry)
+
+    def _ping(self, session_id: str, entry: _KeepAliveEntry):
+        chat_strategy = entry.chat_strategy
+        try:
+            with llm_request_context(session_id, PRIORITY_BATCH), span(
+                "keepalive", session_id=session_id, model=entry.model_name
+            ):
+                # Одинаковые продления разных сессий объединяются, место у регулятора
+                # занимает только запрос, который обращается к провайдеру
+                def slot():
+                    return get_llm_scheduler().slot(chat_strategy.provider_name)
+
+                if isinstance(chat_strategy, SingleFlightChatStrategy):
+                    call_context = leader_context(slot)
+                else:
+                    call_context = slot()
+                with call_context:
+                    chat_strategy.send_message(
+                        system_prompt="",
+                        messages=entry.messages,
+                        model_name=entry.model_name,
+                        max_tokens=1,
+                        temperature=0,
+                    )
+        except Exception:
+            logging.exception(f"Не удалось продлить кэш промптов сессии {session_id}")
+            return
+        with self._lock:
+            entry.last_request = time.monotonic()
+            entry.pings += 1
+            entry.cost += chat_strategy.get_full_price()
+
+
+def keepalive_savings(cache_read_tokens: int, input_price: float) -> float:
+    """
+    Экономия на шаге, прочитавшем cache_read_tokens токенов из продленного кэша:
+    без поддержания эти токены были бы записаны в кэш заново
+    """
+    return (
+        cache_read_tokens
+        * input_price
+        * (CACHE_CREATE_PRICE_FACTOR - CACHE_READ_PRICE_FACTOR)
+        / 1_000_000.0
+    )
+
+
+_cache_keepalive = CacheKeepAlive()
+
+
+def get_cache_keepalive() -> CacheKeepAlive:
+    """
+    Возвращает общий для всех сессий процесса экземпляр CacheKeepAlive
+    """
+    return _cache_keepalive
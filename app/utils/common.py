@@ -1,6 +1,37 @@
 import json
+import logging
 import pandas as pd
+import tiktoken
 from collections import defaultdict
+from functools import lru_cache
+from utils.tracing import span
+
+
+@lru_cache(maxsize=1)
+def get_token_encoding():
+    """
+    Возвращает кодировку tiktoken для подсчета токенов.
+    Если кодировку не удалось загрузить (например, нет доступа к сети), возвращает None.
+    """
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logging.warning(f"Не удалось загрузить кодировку tiktoken: {e}")
+        return None
+
+
+def count_tokens(text):
+    """
+    Подсчитывает количество токенов в тексте.
+    Без кодировки tiktoken возвращает приблизительную оценку (4 символа на токен).
+
+    :param text: Текст.
+    :return: Количество токенов.
+    """
+    encoding = get_token_encoding()
+    if encoding is None:
+        return len(text) // 4
+    return len(encoding.encode(text, disallowed_special=()))
 
 
 def calculate_speaker_participation(json_text):
@@ -92,3 +123,76 @@ def extract_table_to_dataframe(input_text):
         # В случае любой ошибки возвращаем пустой DataFrame
         print(f"Ошибка при обработке таблицы: {e}")
         return pd.DataFrame()
+
+
+def extract_step_dataframe(input_text, step_config):
+    """
+    Извлекает таблицу из ответа шага и возвращает pandas DataFrame.
+    Для шагов со структурированным выводом (structured_output) строки берутся из JSON
+    (ключ output_rows), колонки переименовываются по output_columns. Если ответ не JSON
+    (например, таблица получена локально), используется extract_table_to_dataframe.
+
+    :param input_text: Ответ шага.
+    :param step_config: Конфигурация шага.
+    :return: pandas DataFrame или пустой DataFrame в случае ошибки.
+    """
+    with span("parse", bytes=len(input_text.encode("utf-8"))):
+        if step_config.get("structured_output") and step_config.get("output_schema"):
+            try:
+                data = json.loads(input_text)
+            except ValueError:
+                data = None
+            if isinstance(data, dict):
+                columns = step_config.get("output_columns", {})
+                rows = data.get(step_config.get("output_rows", ""), [])
+                df = pd.DataFrame(rows, columns=list(columns) or None)
+                return df.rename(columns=columns)
+
+        return extract_table_to_dataframe(input_text)
+
+
+def step_response_to_markdown(input_text, step_config):
+    """
+    Ответ шага в виде текста для промптов, отображения и копирования.
+    Ответ шага со структурированным выводом (JSON) преобразуется в markdown-таблицу
+    через extract_step_dataframe, остальные ответы возвращаются без изменений.
+
+    :param input_text: Ответ шага.
+    :param step_config: Конфигурация шага.
+    :return: Текст ответа.
+    """
+    if not (step_config.get("structured_output") and step_config.get("output_schema")):
+        return input_text
+    try:
+        data = json.loads(input_text)
+    except ValueError:
+        return input_text
+    if not isinstance(data, dict):
+        return input_text
+    return dataframe_to_markdown_table(extract_step_dataframe(input_text, step_config))
+
+
+def dataframe_to_markdown_table(df):
+    """
+    Преобразует pandas DataFrame в markdown-таблицу
+    (в формате, который понимает extract_table_to_dataframe).
+
+    :param df: pandas DataFrame.
+    :return: Текст таблицы или пустая строка, если DataFrame пустой.
+    """
+    if df is None or df.empty:
+        return ""
+
+    def format_row(values):
+        cells = [
+            str(value).replace("|", "/").replace("\n", " ").strip() or "-"
+            for value in values
+        ]
+        return "| " + " | ".join(cells) + " |"
+
+    lines = [
+        format_row(df.columns),
+        "|" + "|".join("---" for _ in df.columns) + "|",
+    ]
+    lines.extend(format_row(row) for row in df.itertuples(index=False))
+    return "\n".join(lines)
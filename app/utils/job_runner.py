@@ -0,0 +1,330 @@
+import contextvars
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from utils.tracing import span
+
+# Таблица заданий хранится рядом с данными сессий
+JOBS_DB_PATH = Path("Data/jobs.sqlite3")
+# Количество заданий, выполняемых одновременно
+DEFAULT_MAX_WORKERS = 4
+# Интервал, с которым процесс подтверждает, что выполняет свои задания, секунд
+OWNER_HEARTBEAT_INTERVAL = 10
+# Процесс, не подтверждавший работу дольше этого времени, считается завершенным
+OWNER_TIMEOUT = 60
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class JobRunner:
+    """
+    Выполнение длительных конвейеров в фоновых потоках, независимо от
+    перезапусков скрипта Streamlit.
+
+    Состояние заданий (статус, прогресс по шагам, результаты уже завершенных
+    шагов, результат или ошибка) хранится в таблице SQLite, поэтому
+    переподключившаяся сессия может получить результат завершенного задания
+    по идентификатору сессии.
+
+    Таблицу могут использовать несколько процессов (приложение, API-сервер,
+    реплики). Каждое задание закреплено за процессом-владельцем, который
+    периодически подтверждает, что работает (таблица job_owners). Незавершенные
+    задания владельца, переставшего подтверждать работу дольше OWNER_TIMEOUT
+    секунд, помечаются как прерванные; задания других работающих процессов
+    не затрагиваются.
+
+    Parameters:
+    -----------
+    db_path: Path
+        Путь к файлу таблицы заданий
+    max_workers: int
+        Количество рабочих потоков
+    """
+
+    def __init__(
+        self, db_path: Path = JOBS_DB_PATH, max_workers: int = DEFAULT_MAX_WORKERS
+    ):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="job"
+        )
+        self._lock = threading.Lock()
+
+        # Идентификатор владельца уникален для каждого запуска процесса
+        # (в отличие от pid, который повторяется после перезапуска контейнера)
+        self.owner_id = uuid.uuid4().hex
+
+        with self._connect() as connection:
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    session_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    progress_done INTEGER NOT NULL DEFAULT 0,
+                    progress_total INTEGER NOT NULL DEFAULT 0,
+                    progress_label TEXT NOT NULL DEFAULT '',
+                    result TEXT,
+                    partial_result TEXT,
+                    error TEXT,
+                    owner_id TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_session ON jobs (session_id, kind)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS job_owners (owner_id TEXT PRIMARY KEY, "
+                "pid INTEGER NOT NULL, heartbeat_at REAL NOT NULL)"
+            )
+            # Таблица, созданная до появления промежуточных результатов и владельцев
+            columns = [row[1] for row in connection.execute("PRAGMA table_info(jobs)")]
+            if "partial_result" not in columns:
+                connection.execute("ALTER TABLE jobs ADD COLUMN partial_result TEXT")
+            if "owner_id" not in columns:
+                connection.execute("ALTER TABLE jobs ADD COLUMN owner_id TEXT")
+
+        self._heartbeat()
+        threading.Thread(
+            target=self._heartbeat_loop, name="job-owner-heartbeat", daemon=True
+        ).start()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Контекст соединения sqlite3 только фиксирует транзакцию, но не закрывает его
+        with closing(sqlite3.connect(self.db_path, timeout=30)) as connection:
+            with connection:
+                yield connection
+
+    def _heartbeat(self):
+        """
+        Подтверждает работу процесса и помечает как прерванные незавершенные
+        задания владельцев, которые перестали подтверждать работу
+        """
+        now = time.time()
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO job_owners (owner_id, pid, heartbeat_at) "
+                "VALUES (?, ?, ?)",
+                (self.owner_id, os.getpid(), now),
+            )
+            connection.execute(
+                "DELETE FROM job_owners WHERE heartbeat_at < ?", (now - OWNER_TIMEOUT,)
+            )
+            cursor = connection.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? "
+                "WHERE status IN (?, ?) AND (owner_id IS NULL OR owner_id NOT IN "
+                "(SELECT owner_id FROM job_owners))",
+                (
+                    JOB_FAILED,
+                    "Задание прервано перезапуском приложения",
+                    now,
+                    JOB_QUEUED,
+                    JOB_RUNNING,
+                ),
+            )
+        if cursor.rowcount:
+            logging.warning(
+                f"Помечено прерванными заданий завершенных процессов: {cursor.rowcount}"
+            )
+
+    def _heartbeat_loop(self):
+        while True:
+            time.sleep(OWNER_HEARTBEAT_INTERVAL)
+            try:
+                self._heartbeat()
+            except sqlite3.Error:
+                logging.exception("Не удалось обновить отметку владельца заданий")
+
+    def _update(self, job_id: str, **fields):
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                f"UPDATE jobs SET {assignments} WHERE job_id = ?",
+                (*fields.values(), job_id),
+            )
+
+    def submit(
+        self,
+        session_id: str,
+        kind: str,
+        func: Callable[..., Dict[str, Any]],
+        *args,
+        progress_total: int = 0,
+        **kwargs,
+    ) -> str:
+        """
+        Ставит задание в очередь
+
+        Parameters:
+        -----------
+        session_id: str
+            Идентификатор сессии, запустившей задание
+        kind: str
+            Тип задания (например, "prepare" или "summaries")
+        func: Callable[..., Dict[str, Any]]
+            Функция задания. Получает аргументы args и kwargs и именованный аргумент
+            progress_callback(label, partial=None), который вызывается после каждого
+            шага; partial - результат шага (сериализуемый в JSON), доступный до
+            завершения задания в partial_result[label].
+            Должна вернуть результат, сериализуемый в JSON
+        progress_total: int
+            Ожидаемое количество шагов
+
+        Returns:
+        --------
+        str
+            Идентификатор задания
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                "INSERT INTO jobs (job_id, session_id, kind, status, progress_total, "
+                "owner_id, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    session_id,
+                    kind,
+                    JOB_QUEUED,
+                    progress_total,
+                    self.owner_id,
+                    now,
+                    now,
+                ),
+            )
+        # Задание выполняется в контексте (contextvars) вызывающего потока
+        context = contextvars.copy_context()
+        self._executor.submit(
+            context.run, self._run, job_id, session_id, kind, func, args, kwargs
+        )
+        return job_id
+
+    def _run(
+        self,
+        job_id: str,
+        session_id: str,
+        kind: str,
+        func: Callable,
+        args: tuple,
+        kwargs: dict,
+    ):
+        self._update(job_id, status=JOB_RUNNING)
+        progress_done = 0
+        partial_result: Dict[str, Any] = {}
+        progress_lock = threading.Lock()
+
+        def progress_callback(label: str, partial: Any = None):
+            nonlocal progress_done
+            # Шаги могут завершаться одновременно в разных потоках
+            with progress_lock:
+                progress_done += 1
+                fields = {"progress_done": progress_done, "progress_label": label}
+                if partial is not None:
+                    partial_result[label] = partial
+                    fields["partial_result"] = json.dumps(
+                        partial_result, ensure_ascii=False
+                    )
+                self._update(job_id, **fields)
+
+        try:
+            # Задание - корневой интервал трассы, шаги конвейера вложены в него
+            with span("job", job_id=job_id, session_id=session_id, kind=kind):
+                result = func(*args, progress_callback=progress_callback, **kwargs)
+            self._update(
+                job_id,
+                status=JOB_DONE,
+                result=json.dumps(result, ensure_ascii=False),
+            )
+        except Exception as e:
+            logging.exception(f"Задание {job_id} завершилось с ошибкой")
+            self._update(job_id, status=JOB_FAILED, error=str(e))
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Возвращает состояние задания (результат десериализуется из JSON) или None
+        """
+        with self._connect() as connection:
+            connection.row_factory = sqlite3.Row
+            row = connection.execute(
+                "SELECT * FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        for field in ["result", "partial_result"]:
+            if job[field] is not None:
+                job[field] = json.loads(job[field])
+        return job
+
+    def delete_jobs_before(self, timestamp: float) -> int:
+        """
+        Удаляет завершенные задания, не изменявшиеся с момента timestamp
+
+        Returns:
+        --------
+        int
+            Количество удаленных заданий
+        """
+        with self._lock, self._connect() as connection:
+            cursor = connection.execute(
+                "DELETE FROM jobs WHERE updated_at < ? AND status IN (?, ?)",
+                (timestamp, JOB_DONE, JOB_FAILED),
+            )
+            return cursor.rowcount
+
+    def count_active_jobs(self, kind: str) -> int:
+        """
+        Возвращает количество ожидающих и выполняющихся заданий типа kind
+        """
+        with self._connect() as connection:
+            return connection.execute(
+                "SELECT COUNT(*) FROM jobs WHERE kind = ? AND status IN (?, ?)",
+                (kind, JOB_QUEUED, JOB_RUNNING),
+            ).fetchone()[0]
+
+    def list_jobs(self, session_id: str) -> List[Dict[str, Any]]:
+        """
+        Возвращает задания сессии (без результатов) в порядке создания
+        """
+        with self._connect() as connection:
+            connection.row_factory = sqlite3.Row
+            rows = connection.execute(
+                "SELECT job_id, kind, status, progress_done, progress_total, "
+                "progress_label, error, created_at, updated_at FROM jobs "
+                "WHERE session_id = ? ORDER BY created_at",
+                (session_id,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+
+_job_runner: Optional[JobRunner] = None
+_job_runner_lock = threading.Lock()
+
+
+def get_job_runner() -> JobRunner:
+    """
+    Возвращает общий для всех сессий процесса экземпляр JobRunner
+    """
+    global _job_runner
+    with _job_runner_lock:
+        if _job_runner is None:
+            _job_runner = JobRunner()
+        return _job_runner
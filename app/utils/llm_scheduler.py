@@ -0,0 +1,211 @@
+import contextvars
+import itertools
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+# Приоритеты запросов: интерактивные (действия пользователя) обслуживаются раньше фоновых
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+
+# Ограничения по умолчанию (переопределяются секцией [scheduler] в config.toml)
+DEFAULT_MAX_CONCURRENT = 8
+DEFAULT_PROVIDER_MAX_CONCURRENT = 4
+# Количество последних ожиданий, по которым считается среднее время ожидания
+WAIT_TIME_WINDOW = 100
+
+
+@dataclass
+class RequestContext:
+    """Сессия и приоритет, от имени которых выполняются запросы к модели"""
+
+    session_id: str = ""
+    priority: int = PRIORITY_INTERACTIVE
+
+
+_request_context: contextvars.ContextVar[RequestContext] = contextvars.ContextVar(
+    "llm_request_context", default=RequestContext()
+)
+
+
+@contextmanager
+def llm_request_context(
+    session_id: str, priority: int = PRIORITY_INTERACTIVE
+) -> Iterator[None]:
+    """
+    Задает сессию и приоритет для запросов к модели внутри блока.
+    Контекст наследуют потоки, запущенные через contextvars.copy_context().run
+    """
+    token = _request_context.set(RequestContext(session_id, priority))
+    try:
+        yield
+    finally:
+        _request_context.reset(token)
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    session_running: int
+    seq: int
+    provider: str = field(compare=False)
+    session_id: str = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    granted: bool = field(default=False, compare=False)
+
+
+class LLMScheduler:
+    """
+    Общий для всех сессий процесса регулятор одновременных запросов к моделям.
+
+    Ограничивает общее количество одновременных запросов и количество запросов
+    к каждому провайдеру. Ожидающие запросы обслуживаются по приоритету
+    (интерактивные раньше фоновых), а при равном приоритете - сначала запросы
+    сессий, у которых сейчас выполняется меньше всего запросов, и затем в порядке
+    поступления. Так всплеск запросов одной сессии не блокирует остальных.
+
+    Parameters:
+    -----------
+    max_concurrent: int
+        Максимальное количество одновременных запросов
+    provider_limits: Dict[str, int], optional
+        Максимальное количество одновременных запросов к провайдеру
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+        provider_limits: Optional[Dict[str, int]] = None,
+    ):
+        self.max_concurrent = max_concurrent
+        self.provider_limits = dict(provider_limits or {})
+        self._condition = threading.Condition()
+        self._seq = itertools.count()
+        self._waiting: List[_Waiter] = []
+        self._running_total = 0
+        self._running_by_provider: Dict[str, int] = defaultdict(int)
+        self._running_by_session: Dict[str, int] = defaultdict(int)
+        self._wait_times: deque = deque(maxlen=WAIT_TIME_WINDOW)
+
+    def configure(
+        self, max_concurrent: int, provider_limits: Optional[Dict[str, int]] = None
+    ):
+        """Изменяет ограничения (уже выполняющиеся запросы не прерываются)"""
+        with self._condition:
+            self.max_concurrent = max_concurrent
+            self.provider_limits = dict(provider_limits or {})
+            self._dispatch()
+
+    def _provider_limit(self, provider: str) -> int:
+        return self.provider_limits.get(provider, DEFAULT_PROVIDER_MAX_CONCURRENT)
+
+    def _dispatch(self):
+        """Выдает освободившиеся места ожидающим запросам (под блокировкой)"""
+        granted_any = False
+        while self._running_total < self.max_concurrent:
+            candidates = [
+                waiter
+                for waiter in self._waiting
+                if self._running_by_provider[waiter.provider]
+                < self._provider_limit(waiter.provider)
+            ]
+            if not candidates:
+                break
+            # Очередность пересчитывается с учетом текущей загрузки сессий
+            for waiter in candidates:
+                waiter.session_running = self._running_by_session[waiter.session_id]
+            waiter = min(candidates)
+            self._waiting.remove(waiter)
+            waiter.granted = True
+            self._running_total += 1
+            self._running_by_provider[waiter.provider] += 1
+            self._running_by_session[waiter.session_id] += 1
+            self._wait_times.append(time.monotonic() - waiter.enqueued_at)
+            granted_any = True
+        if granted_any:
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, provider: str) -> Iterator[None]:
+        """
+        Ожидает свободного места для запроса к провайдеру и удерживает его внутри блока.
+        Сессия и приоритет берутся из llm_request_context
+        """
+        context = _request_context.get()
+        waiter = _Waiter(
+            priority=context.priority,
+            session_running=0,
+            seq=next(self._seq),
+            provider=provider,
+            session_id=context.session_id,
+            enqueued_at=time.monotonic(),
+        )
+        with self._condition:
+            self._waiting.append(waiter)
+            self._dispatch()
+            while not waiter.granted:
+                self._condition.wait()
+
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._running_total -= 1
+                self._running_by_provider[provider] -= 1
+                self._running_by_session[waiter.session_id] -= 1
+                if not self._running_by_session[waiter.session_id]:
+                    del self._running_by_session[waiter.session_id]
+                self._dispatch()
+
+    def get_metrics(self, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Состояние очереди: количество ожидающих и выполняющихся запросов
+        (всего и по провайдерам), среднее время ожидания за последние запросы,
+        количество ожидающих запросов сессии session_id
+        """
+        with self._condition:
+            waiting_by_provider: Dict[str, int] = defaultdict(int)
+            for waiter in self._waiting:
+                waiting_by_provider[waiter.provider] += 1
+            return {
+                "waiting": len(self._waiting),
+                "running": self._running_total,
+                "max_concurrent": self.max_concurrent,
+                "waiting_by_provider": dict(waiting_by_provider),
+                "running_by_provider": {
+                    provider: running
+                    for provider, running in self._running_by_provider.items()
+                    if running
+                },
+                "session_waiting": sum(
+                    waiter.session_id == session_id for waiter in self._waiting
+                ),
+                "avg_wait_time": (
+                    sum(self._wait_times) / len(self._wait_times)
+                    if self._wait_times
+                    else 0.0
+                ),
+            }
+
+
+_llm_scheduler = LLMScheduler()
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """
+    Возвращает общий для всех сессий процесса экземпляр LLMScheduler
+    """
+    return _llm_scheduler
+
+
+def configure_llm_scheduler(scheduler_config: Dict[str, Any]):
+    """
+    Применяет секцию [scheduler] из config.toml к общему регулятору запросов
+    """
+    _llm_scheduler.configure(
+        scheduler_config.get("max_concurrent", DEFAULT_MAX_CONCURRENT),
+        scheduler_config.get("providers", {}),
+    )
@@ -0,0 +1,352 @@
+"""
+Метрики запросов к моделям в памяти процесса.
+
+Гистограммы и счетчики ведутся отдельно для каждой пары провайдер/модель
+и отдаются в текстовом формате Prometheus (секция [metrics] config.toml):
+
+    GET http://127.0.0.1:9464/metrics
+"""
+
+import asyncio
+import bisect
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import tornado.web
+from chat_strategies.single_flight_strategy import CoalescedRequestError
+
+DEFAULT_METRICS_ADDRESS = "127.0.0.1"
+DEFAULT_METRICS_PORT = 9464
+
+# Границы интервалов гистограмм
+SECONDS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+TOKENS_PER_SECOND_BUCKETS = (5, 10, 20, 30, 50, 75, 100, 150, 200, 300, 500)
+RATIO_BUCKETS = (0.0, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0)
+
+# Имя, описание и границы гистограмм запросов к моделям
+HISTOGRAMS = {
+    "llm_request_duration_seconds": (
+        "Длительность запроса к модели",
+        SECONDS_BUCKETS,
+    ),
+    "llm_time_to_first_token_seconds": (
+        "Время до первого токена ответа (только потоковые стратегии)",
+        SECONDS_BUCKETS,
+    ),
+    "llm_output_tokens_per_second": (
+        "Скорость генерации ответа, токенов в секунду",
+        TOKENS_PER_SECOND_BUCKETS,
+    ),
+    "llm_queue_wait_seconds": (
+        "Ожидание места в регуляторе запросов",
+        SECONDS_BUCKETS,
+    ),
+    "llm_prompt_cache_hit_ratio": (
+        "Доля входных токенов запроса, прочитанных из кэша промптов",
+        RATIO_BUCKETS,
+    ),
+}
+
+COUNTERS = {
+    "llm_requests_total": "Завершенные запросы к модели",
+    "llm_request_errors_total": "Запросы к модели, завершившиеся ошибкой",
+    "llm_request_retries_total": "Повторные попытки запросов к модели",
+    "llm_input_tokens_total": "Входные токены без кэша",
+    "llm_cache_create_tokens_total": "Входные токены, записанные в кэш промптов",
+    "llm_cache_read_tokens_total": "Входные токены, прочитанные из кэша промптов",
+    "llm_output_tokens_total": "Выходные токены",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными границами интервалов (как в Prometheus)
+
+    Parameters:
+    -----------
+    buckets: Sequence[float]
+        Верхние границы интервалов по возрастанию
+    """
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Оценка квантиля q линейной интерполяцией внутри интервала
+        (как histogram_quantile в Prometheus); None, если наблюдений нет
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if cumulative + count >= rank and count:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+
+class MetricsRegistry:
+    """
+    Гистограммы и счетчики запросов к моделям с метками provider и model
+    """
+
+    def __init__(self):
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = defaultdict(dict)
+        self._counters: Dict[str, Dict[Labels, float]] = defaultdict(
+            lambda: defaultdict(float)
+        )
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, **labels: str):
+        """Добавляет наблюдение value в гистограмму name"""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            histogram = self._histograms[name].get(key)
+            if histogram is None:
+                histogram = self._histograms[name][key] = Histogram(HISTOGRAMS[name][1])
+            histogram.observe(value)
+
+    def increment(self, name: str, value: float = 1, **labels: str):
+        """Увеличивает счетчик name на value"""
+        with self._lock:
+            self._counters[name][tuple(sorted(labels.items()))] += value
+
+    def record_request(
+        self,
+        provider: str,
+        model: str,
+        duration: float,
+        queue_wait: float,
+        stats: Dict[str, Any],
+        time_to_first_token: Optional[float] = None,
+        retries: int = 0,
+    ):
+        """
+        Учитывает успешный запрос к модели
+
+        Parameters:
+        -----------
+        provider: str
+            Провайдер
+        model: str
+            Модель
+        duration: float
+            Длительность запроса, секунд
+        queue_wait: float
+            Ожидание места в регуляторе запросов, секунд
+        stats: Dict[str, Any]
+            Статистика запроса (input_tokens, output_tokens, cache_create_tokens,
+            cache_read_tokens)
+        time_to_first_token: float, optional
+            Время до первого токена, если стратегия его измеряет
+        retries: int
+            Количество повторных попыток
+        """
+        labels = {"provider": provider, "model": model}
+        self.increment("llm_requests_total", **labels)
+        self.observe("llm_request_duration_seconds", duration, **labels)
+        self.observe("llm_queue_wait_seconds", queue_wait, **labels)
+        if time_to_first_token is not None:
+            self.observe(
+                "llm_time_to_first_token_seconds", time_to_first_token, **labels
+            )
+        if retries:
+            self.increment("llm_request_retries_total", retries, **labels)
+        if stats["output_tokens"] and duration > 0:
+            generation_time = duration - (time_to_first_token or 0.0)
+            if generation_time > 0:
+                self.observe(
+                    "llm_output_tokens_per_second",
+                    stats["output_tokens"] / generation_time,
+                    **labels,
+                )
+
+        for field in [
+            "input_tokens",
+            "cache_create_tokens",
+            "cache_read_tokens",
+            "output_tokens",
+        ]:
+            self.increment(f"llm_{field}_total", stats[field], **labels)
+        prompt_tokens = (
+            stats["input_tokens"]
+            + stats["cache_create_tokens"]
+            + stats["cache_read_tokens"]
+        )
+        if prompt_tokens:
+            self.observe(
+                "llm_prompt_cache_hit_ratio",
+                stats["cache_read_tokens"] / prompt_tokens,
+                **labels,
+            )
+
+    def record_error(
+        self, provider: str, model: str, error: BaseException, queue_wait: float
+    ):
+        """Учитывает запрос к модели, завершившийся ошибкой"""
+        labels = {"provider": provider, "model": model}
+        # Ошибка объединенного запроса учитывается под типом исходной ошибки
+        if isinstance(error, CoalescedRequestError) and error.__cause__ is not None:
+            error = error.__cause__
+        self.increment("llm_request_errors_total", error=type(error).__name__, **labels)
+        self.observe("llm_queue_wait_seconds", queue_wait, **labels)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """
+        Сводка по парам провайдер/модель: количество запросов и ошибок,
+        квантили длительности, средние ожидание, скорость и время до первого
+        токена, доля входных токенов из кэша
+        """
+        with self._lock:
+            pairs = {
+                (dict(key)["provider"], dict(key)["model"])
+                for series in [*self._histograms.values(), *self._counters.values()]
+                for key in series
+            }
+            rows = []
+            for provider, model in sorted(pairs):
+                key = (("model", model), ("provider", provider))
+
+                def histogram(name: str) -> Histogram:
+                    return self._histograms[name].get(key) or Histogram(
+                        HISTOGRAMS[name][1]
+                    )
+
+                def counter(name: str) -> float:
+                    return sum(
+                        value
+                        for labels, value in self._counters[name].items()
+                        if dict(labels)["provider"] == provider
+                        and dict(labels)["model"] == model
+                    )
+
+                def mean(name: str) -> Optional[float]:
+                    h = histogram(name)
+                    return h.sum / h.count if h.count else None
+
+                duration = histogram("llm_request_duration_seconds")
+                prompt_tokens = sum(
+                    counter(f"llm_{field}_tokens_total")
+                    for field in ["input", "cache_create", "cache_read"]
+                )
+                rows.append(
+                    {
+                        "provider": provider,
+                        "model": model,
+                        "requests": int(counter("llm_requests_total")),
+                        "errors": int(counter("llm_request_errors_total")),
+                        "retries": int(counter("llm_request_retries_total")),
+                        "p50": duration.quantile(0.5),
+                        "p95": duration.quantile(0.95),
+                        "p99": duration.quantile(0.99),
+                        "ttft": mean("llm_time_to_first_token_seconds"),
+                        "tokens_per_second": mean("llm_output_tokens_per_second"),
+                        "queue_wait": mean("llm_queue_wait_seconds"),
+                        "cache_hit_ratio": (
+                            counter("llm_cache_read_tokens_total") / prompt_tokens
+                            if prompt_tokens
+                            else None
+                        ),
+                    }
+                )
+            return rows
+
+    def render_prometheus(self) -> str:
+        """Все метрики в текстовом формате Prometheus"""
+        lines = []
+        with self._lock:
+            for name, (description, _) in HISTOGRAMS.items():
+                lines += [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+                for key, histogram in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(
+                        [*histogram.buckets, "+Inf"], histogram.counts
+                    ):
+                        cumulative += count
+                        labels = _format_labels((*key, ("le", str(bound))))
+                        lines.append(f"{name}_bucket{labels} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {histogram.sum}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+            for name, description in COUNTERS.items():
+                lines += [f"# HELP {name} {description}", f"# TYPE {name} counter"]
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Labels) -> str:
+    escaped = (
+        name
+        + '="'
+        + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        + '"'
+        for name, value in labels
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+_metrics_registry = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """
+    Возвращает общий для всех сессий процесса экземпляр MetricsRegistry
+    """
+    return _metrics_registry
+
+
+class MetricsHandler(tornado.web.RequestHandler):
+    def get(self):
+        self.set_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.write(get_metrics_registry().render_prometheus())
+
+
+_metrics_thread: Optional[threading.Thread] = None
+_metrics_thread_lock = threading.Lock()
+
+
+def start_metrics_server(metrics_config: Dict[str, Any]):
+    """
+    Запускает в фоновом потоке сервер метрик (GET /metrics), если он включен
+    в секции [metrics] config.toml. Повторные вызовы ничего не делают
+    """
+    global _metrics_thread
+    if not metrics_config.get("enabled"):
+        return
+    with _metrics_thread_lock:
+        if _metrics_thread is not None:
+            return
+        port = metrics_config.get("port", DEFAULT_METRICS_PORT)
+        address = metrics_config.get("address", DEFAULT_METRICS_ADDRESS)
+
+        async def serve():
+            tornado.web.Application([(r"/metrics", MetricsHandler)]).listen(
+                port, address
+            )
+            logging.info(f"Метрики доступны на порту {port}")
+            await asyncio.Event().wait()
+
+        def run():
+            try:
+                asyncio.run(serve())
+            except Exception:
+                logging.exception("Сервер метрик остановлен с ошибкой")
+
+        _metrics_thread = threading.Thread(target=run, name="metrics", daemon=True)
+        _metrics_thread.start()
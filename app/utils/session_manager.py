@@ -1,17 +1,41 @@
 import streamlit as st
-import uuid
-import datetime
+import re
+import secrets
+import shutil
+import time
+import logging
 from pathlib import Path
+from utils.job_runner import get_job_runner
+from utils.transcript_registry import get_transcript_registry
+
+# Идентификатор сессии - случайный токен (256 бит): знание адреса страницы дает
+# доступ к результатам заданий сессии, поэтому идентификатор нельзя подобрать
+SESSION_ID_BYTES = 32
+SESSION_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{43}")
+
+SESSIONS_BASE_PATH = Path("Data/tmp")
+# Время хранения папок сессий без изменений по умолчанию, часов
+DEFAULT_SESSION_TTL_HOURS = 72
+# Очистка выполняется не чаще одного раза за этот интервал, секунд
+CLEANUP_INTERVAL = 3600
+
+_last_cleanup_time = 0.0
 
 
 def initialize_session():
     """
     Инициализирует необходимые переменные в session_state.
+    Идентификатор сессии сохраняется в адресе страницы (параметр sid), чтобы
+    после переподключения браузера сессия могла получить результаты своих заданий.
+    Принимаются только идентификаторы, созданные secrets.token_urlsafe; идентификаторы
+    прежнего формата (время и короткий суффикс) заменяются новыми.
     """
     if "session_id" not in st.session_state:
-        timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-        unique_id = uuid.uuid4().hex[:6]
-        st.session_state["session_id"] = f"{timestamp}_{unique_id}"
+        session_id = st.query_params.get("sid", "")
+        if not SESSION_ID_PATTERN.fullmatch(session_id):
+            session_id = secrets.token_urlsafe(SESSION_ID_BYTES)
+        st.session_state["session_id"] = session_id
+    st.query_params["sid"] = st.session_state["session_id"]
 
     default_states = {
         "processing_option": "gpt-4",
@@ -32,7 +56,38 @@ def get_session_folder() -> Path:
     """
     Возвращает путь к временной папке текущей сессии.
     """
-    base_path = Path("Data/tmp")
-    session_folder = base_path / st.session_state["session_id"]
+    session_folder = SESSIONS_BASE_PATH / st.session_state["session_id"]
     session_folder.mkdir(parents=True, exist_ok=True)
     return session_folder
+
+
+def cleanup_expired_sessions(ttl_hours: float = DEFAULT_SESSION_TTL_HOURS):
+    """
+    Удаляет папки сессий, которые не изменялись дольше ttl_hours,
+    а также записи о заданиях и реестра расшифровок того же возраста.
+    Вызывается при каждом запуске скрипта, но фактически выполняется
+    не чаще одного раза в CLEANUP_INTERVAL секунд.
+    """
+    global _last_cleanup_time
+    now = time.time()
+    if now - _last_cleanup_time < CLEANUP_INTERVAL:
+        return
+    _last_cleanup_time = now
+
+    get_job_runner().delete_jobs_before(now - ttl_hours * 3600)
+    get_transcript_registry().delete_before(now - ttl_hours * 3600)
+
+    if not SESSIONS_BASE_PATH.exists():
+        return
+
+    current_session = st.session_state.get("session_id")
+    for session_folder in SESSIONS_BASE_PATH.iterdir():
+        if not session_folder.is_dir() or session_folder.name == current_session:
+            continue
+        last_modified = max(
+            path.stat().st_mtime
+            for path in [session_folder, *session_folder.rglob("*")]
+        )
+        if now - last_modified > ttl_hours * 3600:
+            shutil.rmtree(session_folder, ignore_errors=True)
+            logging.info(f"Удалена папка устаревшей сессии {session_folder.name}")
@@ -0,0 +1,152 @@
+import contextvars
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable, Dict, Hashable, Optional
+from utils.tracing import span
+
+# Количество одновременно выполняемых упреждающих задач во всем процессе
+DEFAULT_MAX_WORKERS = 2
+
+
+@dataclass
+class _Task:
+    key: Hashable
+    future: Future
+
+
+class SpeculativePrefetcher:
+    """
+    Упреждающее выполнение работы, которая, скорее всего, понадобится сессии
+    (например, первого шага подготовки сразу после загрузки файла).
+
+    У каждой сессии не больше одной задачи. Задача идентифицируется ключом
+    входных данных: при смене ключа прежняя задача отменяется, если еще не
+    началась, а начавшаяся доводится до конца, но ее результат не используется.
+    Результат передается основному процессу через память результатов шагов,
+    поэтому задачи сами по себе ничего не возвращают в session_state.
+
+    Parameters:
+    -----------
+    max_workers: int
+        Количество рабочих потоков
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="speculative"
+        )
+        self._tasks: Dict[str, _Task] = {}
+        self._discarded_cost: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def current_key(self, session_id: str) -> Optional[Hashable]:
+        """Ключ текущей задачи сессии или None"""
+        with self._lock:
+            task = self._tasks.get(session_id)
+            return task.key if task is not None else None
+
+    def prefetch(
+        self,
+        session_id: str,
+        key: Hashable,
+        func: Callable[..., Any],
+        *args,
+        **kwargs,
+    ):
+        """
+        Запускает задачу сессии с ключом key, если она еще не запущена.
+        func возвращает ответ и статистику шага, как process_step.
+        Задача выполняется в контексте (contextvars) вызывающего потока
+        """
+        with self._lock:
+            task = self._tasks.get(session_id)
+            if task is not None and task.key == key:
+                return
+            context = contextvars.copy_context()
+            self._tasks[session_id] = _Task(
+                key,
+                self._executor.submit(
+                    context.run, self._run, session_id, func, args, kwargs
+                ),
+            )
+        if task is not None:
+            self._discard(session_id, task)
+
+    def cancel(self, session_id: str):
+        """Отменяет задачу сессии (начавшаяся задача доводится до конца)"""
+        with self._lock:
+            task = self._tasks.pop(session_id, None)
+        if task is not None:
+            self._discard(session_id, task)
+
+    def take(self, session_id: str, key: Hashable) -> Optional[Any]:
+        """
+        Забирает результат завершенной задачи сессии с ключом key.
+        Возвращает None, если задачи нет, она не завершена, завершилась
+        с ошибкой или относится к другим входным данным
+        """
+        with self._lock:
+            task = self._tasks.get(session_id)
+            if task is None or task.key != key or not task.future.done():
+                return None
+            del self._tasks[session_id]
+        if task.future.cancelled():
+            return None
+        return task.future.result()
+
+    def take_discarded_cost(self, session_id: str) -> float:
+        """
+        Забирает накопленную стоимость задач сессии, которые были выполнены,
+        но заменены или отменены, так что их результат не используется
+        """
+        with self._lock:
+            return self._discarded_cost.pop(session_id, 0.0)
+
+    def _discard(self, session_id: str, task: _Task):
+        # Начавшаяся задача доводится до конца: ее стоимость учитывается после завершения
+        if not task.future.cancel():
+            task.future.add_done_callback(partial(self._add_discarded_cost, session_id))
+
+    def _add_discarded_cost(self, session_id: str, future: Future):
+        result = future.result()
+        if result is None:
+            return
+        with self._lock:
+            self._discarded_cost[session_id] = (
+                self._discarded_cost.get(session_id, 0.0) + result[1]["full_price"]
+            )
+
+    def status(self, session_id: str) -> Optional[str]:
+        """Состояние задачи сессии: "pending", "running", "done" или None"""
+        with self._lock:
+            task = self._tasks.get(session_id)
+        if task is None or task.future.cancelled():
+            return None
+        if task.future.done():
+            return "done"
+        return "running" if task.future.running() else "pending"
+
+    @staticmethod
+    def _run(
+        session_id: str, func: Callable[..., Any], args: tuple, kwargs: dict
+    ) -> Any:
+        try:
+            with span("speculative", session_id=session_id):
+                return func(*args, **kwargs)
+        except Exception:
+            # Упреждающая работа необязательна: основной процесс выполнит ее сам
+            logging.exception("Упреждающая задача завершилась с ошибкой")
+            return None
+
+
+_speculative_prefetcher = SpeculativePrefetcher()
+
+
+def get_speculative_prefetcher() -> SpeculativePrefetcher:
+    """
+    Возвращает общий для всех сессий процесса экземпляр SpeculativePrefetcher
+    """
+    return _speculative_prefetcher
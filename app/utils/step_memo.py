@@ -0,0 +1,172 @@
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+from utils.cache_backends import CacheBackend
+from utils.file_handler import read_json, write_json
+
+# Максимальное количество результатов шагов, хранимых в памяти
+DEFAULT_MAX_ENTRIES = 256
+
+
+class StepMemo:
+    """
+    Мемоизация результатов шагов по хэшу их фактических входных данных
+    (сообщения с подставленными значениями, модель, температура, схема ответа).
+
+    Если входные данные шага не изменились, результат берется из памяти без
+    обращения к модели. Хранилище ограничено по размеру (вытесняются давно
+    не использованные результаты) и безопасно для использования из нескольких потоков.
+
+    Если задана папка контрольных точек, каждый результат дополнительно сохраняется
+    в ней файлом <хэш>.json. После обновления страницы или перезапуска сервера
+    уже выполненные шаги берутся из контрольных точек, и конвейер продолжается
+    с первого невыполненного шага.
+
+    Если задано общее хранилище кэша, результаты сохраняются и в нем, поэтому шаг,
+    выполненный в другой сессии или на другой реплике, берется из хранилища.
+    После clear() записи хранилища, сохраненные до очистки, этой памятью
+    не используются.
+
+    Parameters:
+    -----------
+    max_entries: int
+        Максимальное количество хранимых в памяти результатов
+    checkpoint_folder: Path, optional
+        Папка контрольных точек
+    backend: CacheBackend, optional
+        Общее хранилище кэша
+    ttl: float, optional
+        Время хранения результатов в общем хранилище, секунд
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        checkpoint_folder: Optional[Path] = None,
+        backend: Optional[CacheBackend] = None,
+        ttl: Optional[float] = None,
+    ):
+        self.max_entries = max_entries
+        self.checkpoint_folder = checkpoint_folder
+        self.backend = backend
+        self.ttl = ttl
+        if checkpoint_folder is not None:
+            checkpoint_folder.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[str, Dict[str, Any]]]" = OrderedDict()
+        # Время последней очистки: более ранние записи общего хранилища не читаются
+        self._cleared_at = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(**inputs) -> str:
+        """Хэш входных данных шага (значения должны сериализоваться в JSON)"""
+        serialized = json.dumps(inputs, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    def _checkpoint_path(self, key: str) -> Path:
+        return self.checkpoint_folder / f"{key}.json"
+
+    def _read_checkpoint(self, key: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        if self.checkpoint_folder is None:
+            return None
+        path = self._checkpoint_path(key)
+        if not path.exists():
+            return None
+        try:
+            checkpoint = read_json(path)
+            return checkpoint["response"], checkpoint["stats"]
+        except (OSError, ValueError, KeyError):
+            # Файл, записанный не полностью (например, при сбое), не используется
+            return None
+
+    def _read_backend(self, key: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        if self.backend is None:
+            return None
+        value = self.backend.get(f"step:{key}")
+        if value is None:
+            return None
+        entry = json.loads(value)
+        if entry.get("created_at", 0.0) <= self._cleared_at:
+            return None
+        return entry["response"], entry["stats"]
+
+    def _remember(self, key: str, response: str, stats: Dict[str, Any]):
+        self._entries[key] = (response, copy.deepcopy(stats))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Возвращает сохраненный результат шага (ответ и статистику) или None
+        """
+        with self._lock:
+            if key not in self._entries:
+                stored = self._read_checkpoint(key) or self._read_backend(key)
+                if stored is None:
+                    self.misses += 1
+                    return None
+                self._remember(key, *stored)
+            self._entries.move_to_end(key)
+            self.hits += 1
+            response, stats = self._entries[key]
+            return response, copy.deepcopy(stats)
+
+    def set(self, key: str, response: str, stats: Dict[str, Any]):
+        """
+        Сохраняет результат шага (а также контрольную точку и запись в общем
+        хранилище, если они заданы)
+        """
+        entry = {
+            "inputs_hash": key,
+            "response": response,
+            "stats": stats,
+            "created_at": time.time(),
+        }
+        with self._lock:
+            self._remember(key, response, stats)
+            if self.checkpoint_folder is not None:
+                write_json(entry, self._checkpoint_path(key))
+        if self.backend is not None:
+            self.backend.set(
+                f"step:{key}", json.dumps(entry, ensure_ascii=False), self.ttl
+            )
+
+    @contextmanager
+    def locked(self, key: str) -> Iterator[None]:
+        """
+        Блокировка выполнения шага в общем хранилище: пока шаг выполняется
+        в одной сессии или реплике, остальные ждут и затем берут готовый результат
+        """
+        if self.backend is None:
+            yield
+            return
+        with self.backend.lock(f"step:{key}"):
+            yield
+
+    def clear(self):
+        """
+        Удаляет результаты, сохраненные в памяти, и контрольные точки.
+        Записи общего хранилища не удаляются: их используют и другие сессии
+        (они истекают по ttl), но сохраненные до очистки записи этой памятью
+        больше не читаются, поэтому шаги выполняются заново
+        """
+        with self._lock:
+            self._entries.clear()
+            self._cleared_at = time.time()
+            self.hits = 0
+            self.misses = 0
+            if self.checkpoint_folder is not None:
+                for path in self.checkpoint_folder.glob("*.json"):
+                    path.unlink(missing_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,223 @@
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+DEFAULT_TRACE_PATH = Path("logs/traces.jsonl")
+
+
+@dataclass
+class Span:
+    """
+    Интервал выполнения операции. Вложенные интервалы ссылаются на родителя
+    (parent_id) и принадлежат одной трассе (trace_id)
+    """
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start: float
+    end: Optional[float] = None
+    thread: str = ""
+    error: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    def set_attributes(self, **attributes):
+        """Добавляет атрибуты интервала (модель, токены, попадания в кэш, байты)"""
+        self.attributes.update(attributes)
+
+
+class _NoopSpan(Span):
+    """Интервал, который ничего не записывает (трассировка выключена)"""
+
+    def set_attributes(self, **attributes):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan("", "", "", None, 0.0)
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+class Tracer:
+    """
+    Запись интервалов в файл JSONL (одна строка на завершенный интервал).
+
+    Текущий интервал хранится в contextvars, поэтому вложенность сохраняется
+    и в потоках, запущенных через contextvars.copy_context().run (параллельные
+    шаги, фоновые задания), и в асинхронном коде.
+
+    Parameters:
+    -----------
+    path: Path
+        Путь к файлу интервалов
+    enabled: bool
+        Включена ли запись
+    """
+
+    def __init__(self, path: Path = DEFAULT_TRACE_PATH, enabled: bool = False):
+        self.path = Path(path)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        """
+        Интервал операции name внутри блока, вложенный в текущий интервал.
+        Исключение, вышедшее из блока, записывается в интервал
+        """
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+
+        parent = _current_span.get()
+        current = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+            span_id=uuid.uuid4().hex[:16],
+            parent_id=parent.span_id if parent else None,
+            start=time.time(),
+            thread=threading.current_thread().name,
+            attributes=attributes,
+        )
+        token = _current_span.set(current)
+        try:
+            yield current
+        except BaseException as e:
+            current.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            current.end = time.time()
+            self._export(current)
+
+    def _export(self, span: Span):
+        line = json.dumps(asdict(span), ensure_ascii=False, default=str)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def read_spans(
+        self, trace_ids: Optional[List[str]] = None, **attributes
+    ) -> List[Dict[str, Any]]:
+        """
+        Читает записанные интервалы трасс trace_ids (по умолчанию всех);
+        attributes - отбор трасс по атрибутам их корневых интервалов
+        """
+        if not self.path.exists():
+            return []
+        with self._lock, open(self.path, encoding="utf-8") as f:
+            spans = [json.loads(line) for line in f if line.strip()]
+        if attributes:
+            matching = {
+                span["trace_id"]
+                for span in spans
+                if span["parent_id"] is None
+                and all(span["attributes"].get(k) == v for k, v in attributes.items())
+            }
+            trace_ids = [t for t in trace_ids or matching if t in matching]
+        if trace_ids is not None:
+            spans = [span for span in spans if span["trace_id"] in trace_ids]
+        return spans
+
+
+def chrome_trace(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Преобразует интервалы в формат Chrome Trace Event (chrome://tracing, Perfetto).
+    Каждая трасса отображается отдельным процессом, каждый поток - дорожкой
+    """
+    pids = {}
+    tids = {}
+    events = []
+    for span in sorted(spans, key=lambda span: span["start"]):
+        pid = pids.setdefault(span["trace_id"], len(pids) + 1)
+        tid = tids.setdefault((pid, span["thread"]), len(tids) + 1)
+        events.append(
+            {
+                "name": span["name"],
+                "cat": span["name"].split(".")[0],
+                "ph": "X",
+                "ts": span["start"] * 1_000_000,
+                "dur": ((span["end"] or span["start"]) - span["start"]) * 1_000_000,
+                "pid": pid,
+                "tid": tid,
+                "args": {
+                    **span["attributes"],
+                    **({"error": span["error"]} if span["error"] else {}),
+                },
+            }
+        )
+    for (pid, thread), tid in tids.items():
+        events.append(
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": tid,
+                "args": {"name": thread},
+            }
+        )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """
+    Возвращает общий для всех сессий процесса экземпляр Tracer
+    """
+    return _tracer
+
+
+def configure_tracing(tracing_config: Dict[str, Any]):
+    """
+    Применяет секцию [tracing] из config.toml (enabled, path).
+    Переменная окружения LLM_RECUP_TRACING=1 включает трассировку независимо от файла
+    """
+    _tracer.enabled = bool(
+        tracing_config.get("enabled") or os.environ.get("LLM_RECUP_TRACING") == "1"
+    )
+    _tracer.path = Path(tracing_config.get("path", DEFAULT_TRACE_PATH))
+
+
+def span(name: str, **attributes):
+    """Интервал операции name в общем трассировщике (см. Tracer.span)"""
+    return _tracer.span(name, **attributes)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """
+    Декоратор: каждый вызов функции записывается интервалом name
+    (по умолчанию - имя функции)
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name or func.__name__):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+if __name__ == "__main__":
+    # python -m utils.tracing traces.jsonl trace.json [trace_id ...]
+    import sys
+
+    tracer = Tracer(Path(sys.argv[1]))
+    with open(sys.argv[2], "w", encoding="utf-8") as output:
+        json.dump(chrome_trace(tracer.read_spans(sys.argv[3:] or None)), output)
@@ -0,0 +1,147 @@
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+import numpy as np
+from processing.near_duplicates import (
+    DEFAULT_SIMILARITY_THRESHOLD,
+    estimate_similarity,
+    lsh_band_keys,
+)
+
+REGISTRY_DB_PATH = Path("Data/transcripts.sqlite3")
+
+
+class TranscriptRegistry:
+    """
+    Реестр обработанных расшифровок с индексом LSH по MinHash-сигнатурам.
+
+    Для каждой подготовленной расшифровки хранится сигнатура, сессия и задание
+    "Подготовка", результаты которого можно переиспользовать для почти совпадающей
+    расшифровки (повторная выгрузка с другими пробелами, небольшие ручные правки).
+
+    Parameters:
+    -----------
+    db_path: Path
+        Путь к файлу реестра
+    """
+
+    def __init__(self, db_path: Path = REGISTRY_DB_PATH):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        with self._connect() as connection:
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS transcripts (
+                    job_id TEXT PRIMARY KEY,
+                    session_id TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    signature BLOB NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS bands (band_key TEXT, job_id TEXT)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS bands_key ON bands (band_key)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Контекст соединения sqlite3 только фиксирует транзакцию, но не закрывает его
+        with closing(sqlite3.connect(self.db_path, timeout=30)) as connection:
+            with connection:
+                yield connection
+
+    def register(self, signature: np.ndarray, session_id: str, job_id: str, name: str):
+        """
+        Добавляет расшифровку, подготовленную заданием job_id, в реестр
+        """
+        if not len(signature):
+            return
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO transcripts VALUES (?, ?, ?, ?, ?)",
+                (job_id, session_id, name, signature.tobytes(), time.time()),
+            )
+            connection.executemany(
+                "INSERT INTO bands VALUES (?, ?)",
+                [(band_key, job_id) for band_key in lsh_band_keys(signature)],
+            )
+
+    def find_similar(
+        self,
+        signature: np.ndarray,
+        threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+        exclude_job_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Находит расшифровки, похожие на данную: кандидаты отбираются по совпадению
+        полос LSH, затем сходство оценивается по полным сигнатурам.
+        Если задан session_id, ищутся только расшифровки этой сессии
+
+        Returns:
+        --------
+        List[Dict[str, Any]]
+            Записи реестра (job_id, session_id, name, created_at, similarity)
+            в порядке убывания сходства
+        """
+        if not len(signature):
+            return []
+        band_keys = lsh_band_keys(signature)
+        query = (
+            "SELECT * FROM transcripts WHERE job_id IN (SELECT DISTINCT job_id "
+            f"FROM bands WHERE band_key IN ({', '.join('?' * len(band_keys))}))"
+        )
+        params = list(band_keys)
+        if session_id is not None:
+            query += " AND session_id = ?"
+            params.append(session_id)
+        with self._connect() as connection:
+            connection.row_factory = sqlite3.Row
+            rows = connection.execute(query, params).fetchall()
+
+        matches = []
+        for row in rows:
+            if row["job_id"] == exclude_job_id:
+                continue
+            similarity = estimate_similarity(
+                signature, np.frombuffer(row["signature"], dtype=np.uint64)
+            )
+            if similarity >= threshold:
+                match = {key: row[key] for key in row.keys() if key != "signature"}
+                matches.append({**match, "similarity": similarity})
+        return sorted(matches, key=lambda match: -match["similarity"])
+
+    def delete_before(self, timestamp: float):
+        """Удаляет записи, добавленные раньше timestamp"""
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                "DELETE FROM bands WHERE job_id IN "
+                "(SELECT job_id FROM transcripts WHERE created_at < ?)",
+                (timestamp,),
+            )
+            connection.execute(
+                "DELETE FROM transcripts WHERE created_at < ?", (timestamp,)
+            )
+
+
+_transcript_registry: Optional[TranscriptRegistry] = None
+_transcript_registry_lock = threading.Lock()
+
+
+def get_transcript_registry() -> TranscriptRegistry:
+    """
+    Возвращает общий для всех сессий процесса экземпляр TranscriptRegistry
+    """
+    global _transcript_registry
+    with _transcript_registry_lock:
+        if _transcript_registry is None:
+            _transcript_registry = TranscriptRegistry()
+        return _transcript_registry
@@ -0,0 +1,202 @@
+import multiprocessing
+import threading
+import time
+from pathlib import Path
+import pytest
+from utils.cache_backends import (
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    SQLiteCacheBackend,
+)
+from utils.step_memo import StepMemo
+
+BACKENDS = ["memory", "sqlite", "redis"]
+
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    """Сервер fakeredis вместо Redis: все клиенты теста видят одни данные"""
+    fakeredis = pytest.importorskip("fakeredis")
+    redis = pytest.importorskip("redis")
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        redis.Redis,
+        "from_url",
+        lambda url, **kwargs: fakeredis.FakeRedis(server=server, **kwargs),
+    )
+    return server
+
+
+@pytest.fixture
+def make_backend(request, tmp_path, redis_server):
+    """
+    Фабрика хранилищ одного типа (параметр теста). Хранилища sqlite и redis,
+    созданные одной фабрикой, используют общие данные, как разные процессы
+    """
+    kind = request.param
+
+    def make():
+        if kind == "memory":
+            return MemoryCacheBackend()
+        if kind == "sqlite":
+            return SQLiteCacheBackend(tmp_path / "cache.sqlite3")
+        return RedisCacheBackend()
+
+    make.kind = kind
+    return make
+
+
+@pytest.mark.parametrize("make_backend", BACKENDS, indirect=True)
+def test_get_set_delete(make_backend):
+    backend = make_backend()
+    assert backend.get("key") is None
+    backend.set("key", "значение")
+    assert backend.get("key") == "значение"
+    backend.set("key", "новое значение")
+    assert backend.get("key") == "новое значение"
+    backend.delete("key")
+    assert backend.get("key") is None
+    backend.delete("key")
+
+
+@pytest.mark.parametrize("make_backend", BACKENDS, indirect=True)
+def test_expiry(make_backend):
+    backend = make_backend()
+    backend.set("short", "1", ttl=0.2)
+    backend.set("long", "2", ttl=60)
+    backend.set("forever", "3")
+    assert backend.get("short") == "1"
+    time.sleep(0.4)
+    assert backend.get("short") is None
+    assert backend.get("long") == "2"
+    assert backend.get("forever") == "3"
+
+
+@pytest.mark.parametrize("make_backend", BACKENDS, indirect=True)
+def test_lock_mutual_exclusion(make_backend, monkeypatch):
+    monkeypatch.setattr("utils.cache_backends.LOCK_POLL_INTERVAL", 0.01)
+    # Каждый поток работает со своим экземпляром, как разные процессы
+    # (для памяти процесса экземпляр общий)
+    shared = make_backend()
+    inside, max_inside, completed = 0, 0, 0
+    counter_lock = threading.Lock()
+
+    def worker():
+        nonlocal inside, max_inside, completed
+        backend = shared if make_backend.kind == "memory" else make_backend()
+        with backend.lock("step:key") as acquired:
+            assert acquired
+            with counter_lock:
+                inside += 1
+                max_inside = max(max_inside, inside)
+            time.sleep(0.02)
+            with counter_lock:
+                inside -= 1
+                completed += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert completed == 8
+    assert max_inside == 1
+
+
+@pytest.mark.parametrize("make_backend", BACKENDS, indirect=True)
+def test_lock_wait_timeout_and_release(make_backend, monkeypatch):
+    monkeypatch.setattr("utils.cache_backends.LOCK_POLL_INTERVAL", 0.01)
+    holder = make_backend()
+    waiter = holder if make_backend.kind == "memory" else make_backend()
+    with holder.lock("step:key") as acquired:
+        assert acquired
+        # Занятая блокировка не захватывается, блок выполняется без нее
+        with waiter.lock("step:key", wait_timeout=0.1) as acquired_by_waiter:
+            assert not acquired_by_waiter
+        # Выход из блока без блокировки не снимает чужую блокировку
+        assert not waiter._try_acquire("step:key", "other", 60)
+        # Другие имена не блокируются
+        with waiter.lock("step:other", wait_timeout=0.1) as acquired_other:
+            assert acquired_other
+    with waiter.lock("step:key", wait_timeout=0.1) as acquired:
+        assert acquired
+
+
+@pytest.mark.parametrize("make_backend", BACKENDS, indirect=True)
+def test_lock_expires(make_backend):
+    backend = make_backend()
+    assert backend._try_acquire("step:key", "dead-owner", 0.2)
+    assert not backend._try_acquire("step:key", "owner", 60)
+    time.sleep(0.4)
+    assert backend._try_acquire("step:key", "owner", 60)
+    # Снять блокировку может только ее владелец
+    backend._release("step:key", "dead-owner")
+    assert not backend._try_acquire("step:key", "another", 60)
+    backend._release("step:key", "owner")
+    assert backend._try_acquire("step:key", "another", 60)
+
+
+def _hold_sqlite_lock(path: Path, locked, release):
+    backend = SQLiteCacheBackend(path)
+    backend.set("from-child", "значение из другого процесса")
+    with backend.lock("step:key"):
+        locked.set()
+        release.wait(10)
+
+
+def test_sqlite_visible_across_processes(tmp_path, monkeypatch):
+    monkeypatch.setattr("utils.cache_backends.LOCK_POLL_INTERVAL", 0.01)
+    path = tmp_path / "cache.sqlite3"
+    backend = SQLiteCacheBackend(path)
+    context = multiprocessing.get_context("spawn")
+    locked, release = context.Event(), context.Event()
+    process = context.Process(target=_hold_sqlite_lock, args=(path, locked, release))
+    process.start()
+    try:
+        assert locked.wait(30)
+        assert backend.get("from-child") == "значение из другого процесса"
+        with backend.lock("step:key", wait_timeout=0.1) as acquired:
+            assert not acquired
+    finally:
+        release.set()
+        process.join(30)
+    assert process.exitcode == 0
+    with backend.lock("step:key", wait_timeout=1) as acquired:
+        assert acquired
+
+
+@pytest.mark.parametrize("make_backend", ["sqlite", "redis"], indirect=True)
+def test_step_memo_shared_between_sessions(make_backend, tmp_path):
+    first = StepMemo(checkpoint_folder=tmp_path / "first", backend=make_backend())
+    second = StepMemo(checkpoint_folder=tmp_path / "second", backend=make_backend())
+    key = StepMemo.make_key(messages=["текст"], model="model")
+    first.set(key, "ответ", {"full_price": 1.0})
+    assert second.get(key) == ("ответ", {"full_price": 1.0})
+
+    # Очистка памяти одной сессии не удаляет результаты из общего хранилища
+    first.clear()
+    assert len(first) == 0
+    assert not list((tmp_path / "first").glob("*.json"))
+    third = StepMemo(backend=make_backend())
+    assert third.get(key) == ("ответ", {"full_price": 1.0})
+
+
+@pytest.mark.parametrize("make_backend", BACKENDS, indirect=True)
+def test_step_memo_clear_forces_rerun(make_backend, tmp_path):
+    backend = make_backend()
+    memo = StepMemo(checkpoint_folder=tmp_path / "session", backend=backend)
+    other = StepMemo(backend=backend)
+    key = StepMemo.make_key(messages=["текст"], model="model")
+    memo.set(key, "старый ответ", {"full_price": 1.0})
+
+    # После очистки записи, сохраненные раньше, не читаются этой памятью
+    memo.clear()
+    assert memo.get(key) is None
+    assert other.get(key) == ("старый ответ", {"full_price": 1.0})
+
+    # Результат повторного выполнения снова общий
+    time.sleep(0.01)
+    memo.set(key, "новый ответ", {"full_price": 2.0})
+    memo._entries.clear()
+    assert memo.get(key) == ("новый ответ", {"full_price": 2.0})
+    assert StepMemo(backend=backend).get(key) == ("новый ответ", {"full_price": 2.0})
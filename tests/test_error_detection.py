@@ -0,0 +1,79 @@
+import json
+import pytest
+from processing.error_detection import (
+    ERRORS_TABLE_COLUMNS,
+    RecognitionErrorDetector,
+    detect_recognition_errors,
+    levenshtein_distance,
+)
+
+TERMS = """Jira - трекер задач
+Confluence - вики
+Kubernetes - оркестратор контейнеров
+SAP ERP - система учета
+"""
+
+
+@pytest.mark.parametrize(
+    "left, right, max_distance, expected",
+    [
+        ("jira", "jira", 1, 0),
+        ("jira", "jra", 1, 1),
+        ("kubernetes", "kubernetis", 2, 1),
+        ("kitten", "sitting", 3, 3),
+        # Расстояние больше порога не вычисляется точно
+        ("kitten", "sitting", 1, 2),
+        ("a", "abcdef", 2, 3),
+    ],
+)
+def test_levenshtein_distance(left, right, max_distance, expected):
+    assert levenshtein_distance(left, right, max_distance) == expected
+
+
+def test_match_key():
+    detector = RecognitionErrorDetector(TERMS)
+    assert detector.match_key("jira") == ("Jira", 0)
+    assert detector.match_key("kubernetis")[0] == "Kubernetes"
+    assert detector.match_key("sapep") == ("SAP ERP", 1)
+    assert detector.match_key("postgres") is None
+    assert detector.match_key("abc") is None
+
+
+def test_detect():
+    detector = RecognitionErrorDetector(TERMS)
+    df = detector.detect(
+        [
+            "Заведи задачу в джира и опиши в конфлюенс",
+            "Кубернетис кластер и Jira уже настроены",
+            "В джира еще раз",
+        ]
+    )
+    assert list(df.columns) == ERRORS_TABLE_COLUMNS
+    rows = {row["Исходный текст"]: row for row in df.to_dict("records")}
+    assert set(rows) == {"джира", "конфлюенс", "Кубернетис"}
+    assert rows["джира"]["Правильный вариант"] == "Jira"
+    assert rows["джира"]["Уверенность"] == "высокая"
+    assert rows["конфлюенс"]["Правильный вариант"] == "Confluence"
+    assert rows["Кубернетис"]["Правильный вариант"] == "Kubernetes"
+    assert "задачу в джира" in rows["джира"]["Контекст"]
+
+
+def test_multiword_terms():
+    df = RecognitionErrorDetector(TERMS).detect(["внедряем сап эрп в этом году"])
+    assert df.to_dict("records")[0]["Исходный текст"] == "сап эрп"
+    assert df.to_dict("records")[0]["Правильный вариант"] == "SAP ERP"
+
+
+def test_detect_keeps_no_state_between_calls():
+    detector = RecognitionErrorDetector(TERMS)
+    detector.detect(["джира"] + [f"слово{index}" for index in range(100)])
+    assert not hasattr(detector, "_match_cache")
+
+
+def test_detect_recognition_errors():
+    file_content = json.dumps(
+        [{"speaker": "SPEAKER_00", "message": "открой джира"}], ensure_ascii=False
+    )
+    df = detect_recognition_errors(file_content, TERMS)
+    assert df["Исходный текст"].tolist() == ["джира"]
+    assert detect_recognition_errors(file_content, "").empty
@@ -0,0 +1,73 @@
+import json
+from processing.extractive_summary import (
+    condense_transcript,
+    score_turns,
+    turn_terms,
+)
+from utils.common import count_tokens
+
+MEETING = [
+    "Обсуждаем миграцию базы на новый кластер",
+    "Кластер для миграции готов к субботе",
+    "Миграцию базы начнем ночью в субботу",
+    "Нужен план отката для миграции базы",
+    "Бюджет проекта утвердили на квартал",
+    "Бюджет квартала включает новый кластер",
+    "Отчет по бюджету пришлю завтра утром",
+    "Кто-нибудь видел мою кружку с котиком",
+    "Тестирование отката проведем в пятницу",
+    "Заказчик согласовал окно работ ночью",
+    "ну да",
+    "угу понятно",
+    "хорошо",
+]
+OFF_TOPIC = 7
+
+
+def make_transcript(messages):
+    return json.dumps(
+        [
+            {"speaker": f"SPEAKER_0{index % 2}", "message": message}
+            for index, message in enumerate(messages)
+        ],
+        ensure_ascii=False,
+        indent=2,
+    )
+
+
+def test_turn_terms():
+    assert turn_terms("Миграция базы ДАННЫХ") == ["миграц", "базы", "данных"]
+
+
+def test_score_turns():
+    scores = score_turns(MEETING)
+    # Короткие реплики неинформативны
+    assert not scores[-3:].any()
+    # Отступление от темы встречи наименее информативно
+    assert scores[:-3].argmin() == OFF_TOPIC
+    assert scores[OFF_TOPIC] > 0
+    assert not score_turns(["да", "нет"]).any()
+    assert len(score_turns([])) == 0
+
+
+def test_condense_within_budget_returns_input():
+    file_content = make_transcript(MEETING)
+    condensed, report = condense_transcript(file_content, token_budget=10**6)
+    assert condensed == file_content
+    assert report["turns_before"] == report["turns_after"] == len(MEETING)
+
+
+def test_condense_keeps_informative_turns_in_order():
+    file_content = make_transcript(MEETING)
+    turn_tokens = count_tokens(
+        json.dumps(json.loads(file_content)[:1], ensure_ascii=False, indent=2)
+    )
+    condensed, report = condense_transcript(file_content, token_budget=3 * turn_tokens)
+    messages = [turn["message"] for turn in json.loads(condensed)]
+
+    assert report["turns_after"] == len(messages) < len(MEETING)
+    assert report["tokens_after"] == count_tokens(condensed)
+    assert report["tokens_after"] < report["tokens_before"]
+    assert messages == [message for message in MEETING if message in messages]
+    assert MEETING[OFF_TOPIC] not in messages
+    assert all(len(message.split()) >= 4 for message in messages)
@@ -0,0 +1,129 @@
+import json
+import time
+import numpy as np
+import pytest
+from processing.near_duplicates import (
+    LSH_BANDS,
+    NUM_PERMUTATIONS,
+    estimate_similarity,
+    lsh_band_keys,
+    transcript_signature,
+    transcript_words,
+)
+from utils.transcript_registry import TranscriptRegistry
+
+WORDS = (
+    "обсуждаем миграцию базы данных на новый кластер в субботу ночью после "
+    "согласования окна работ с заказчиком и подготовки плана отката"
+).split()
+
+
+def make_transcript(turns_cnt=60, indent=2, edited_turn=None):
+    turns = [
+        {
+            "speaker": f"SPEAKER_0{index % 3}",
+            "message": " ".join(
+                WORDS[(index + shift) % len(WORDS)] for shift in range(8)
+            )
+            + f" пункт {index}",
+        }
+        for index in range(turns_cnt)
+    ]
+    if edited_turn is not None:
+        turns[edited_turn]["message"] = "совсем другая реплика про бюджет"
+    return json.dumps(turns, ensure_ascii=False, indent=indent)
+
+
+def test_transcript_words_ignore_formatting():
+    assert transcript_words(make_transcript(indent=None)) == transcript_words(
+        make_transcript(indent=4)
+    )
+    assert transcript_words("Не JSON: просто Текст") == [
+        "не",
+        "json",
+        "просто",
+        "текст",
+    ]
+
+
+def test_signature():
+    signature = transcript_signature(make_transcript())
+    assert signature.dtype == np.uint64
+    assert len(signature) == NUM_PERMUTATIONS
+    # Параметры хэш-функций фиксированы: сигнатура воспроизводима
+    assert np.array_equal(signature, transcript_signature(make_transcript()))
+    assert len(transcript_signature("")) == 0
+    assert len(transcript_signature("[]")) == 0
+
+
+def test_similarity():
+    original = transcript_signature(make_transcript())
+    assert (
+        estimate_similarity(original, transcript_signature(make_transcript(indent=0)))
+        == 1.0
+    )
+    edited = estimate_similarity(
+        original, transcript_signature(make_transcript(edited_turn=30))
+    )
+    assert 0.8 <= edited < 1.0
+    other = transcript_signature(make_transcript(turns_cnt=5))
+    assert estimate_similarity(original, other) < 0.5
+    assert estimate_similarity(original, np.empty(0, dtype=np.uint64)) == 0.0
+
+
+def test_lsh_band_keys():
+    keys = lsh_band_keys(transcript_signature(make_transcript()))
+    assert len(keys) == len(set(keys)) == LSH_BANDS
+    assert keys == lsh_band_keys(transcript_signature(make_transcript()))
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return TranscriptRegistry(tmp_path / "transcripts.sqlite3")
+
+
+def test_registry_find_similar(registry):
+    registry.register(transcript_signature(make_transcript()), "s1", "job1", "a.json")
+    registry.register(
+        transcript_signature(make_transcript(turns_cnt=5)), "s1", "job2", "b.json"
+    )
+
+    matches = registry.find_similar(
+        transcript_signature(make_transcript(edited_turn=30)), 0.8
+    )
+    assert [match["job_id"] for match in matches] == ["job1"]
+    assert matches[0]["name"] == "a.json"
+    assert matches[0]["session_id"] == "s1"
+    assert 0.8 <= matches[0]["similarity"] < 1.0
+    assert "signature" not in matches[0]
+    assert registry.find_similar(np.empty(0, dtype=np.uint64)) == []
+
+
+def test_registry_limits_to_session(registry):
+    signature = transcript_signature(make_transcript())
+    registry.register(signature, "s1", "job1", "a.json")
+    registry.register(signature, "s2", "job2", "a.json")
+
+    assert {match["job_id"] for match in registry.find_similar(signature)} == {
+        "job1",
+        "job2",
+    }
+    assert [
+        match["job_id"] for match in registry.find_similar(signature, session_id="s2")
+    ] == ["job2"]
+    assert registry.find_similar(signature, session_id="s3") == []
+    assert [
+        match["job_id"]
+        for match in registry.find_similar(signature, exclude_job_id="job1")
+    ] == ["job2"]
+
+
+def test_registry_delete_before(registry):
+    signature = transcript_signature(make_transcript())
+    registry.register(signature, "s1", "job1", "a.json")
+    cutoff = time.time()
+    time.sleep(0.01)
+    registry.register(signature, "s1", "job2", "a.json")
+
+    registry.delete_before(cutoff)
+    assert [match["job_id"] for match in registry.find_similar(signature)] == ["job2"]
@@ -0,0 +1,72 @@
+import json
+import pandas as pd
+import pytest
+from processing.recognition_corrections import (
+    RecognitionCorrector,
+    apply_recognition_corrections,
+    corrections_from_dataframe,
+)
+
+
+@pytest.mark.parametrize(
+    "text, expected, replacements",
+    [
+        ("Задача в джира готова", "Задача в Jira готова", 1),
+        ("ДЖИРА и Джира", "Jira и Jira", 2),
+        # Только по границам слов
+        ("джираф не трекер", "джираф не трекер", 0),
+        # Из пересекающихся совпадений выбирается самое длинное
+        ("сап эрп внедрен, сап тоже", "SAP ERP внедрен, SAP тоже", 2),
+        ("эрп сап", "эрп SAP", 1),
+        ("", "", 0),
+    ],
+)
+def test_apply(text, expected, replacements):
+    corrector = RecognitionCorrector(
+        {"джира": "Jira", "сап": "SAP", "сап эрп": "SAP ERP"}
+    )
+    assert corrector.apply(text) == (expected, replacements)
+
+
+def test_matches_do_not_overlap():
+    corrector = RecognitionCorrector({"а б": "X", "б в": "Y"})
+    assert corrector.find_matches("а б в") == [(0, 3)]
+    assert corrector.apply("а б в") == ("X в", 1)
+
+
+def test_identical_and_empty_corrections_are_ignored():
+    corrector = RecognitionCorrector({"Jira": "jira", " ": "x", "кафка": "Kafka"})
+    assert corrector.corrections == {"кафка": "Kafka"}
+    assert RecognitionCorrector({}).apply("текст") == ("текст", 0)
+
+
+def test_corrections_from_dataframe():
+    df = pd.DataFrame(
+        {
+            "Исходный текст": ["**джира**", "сап", "джира", "", None],
+            "Правильный вариант": ["`Jira`", "SAP / SAP ERP", "Jura", "X", "Y"],
+            "Контекст": ["", "", "", "", ""],
+        }
+    )
+    assert corrections_from_dataframe(df) == {"джира": "Jira", "сап": "SAP"}
+    assert corrections_from_dataframe(pd.DataFrame()) == {}
+    assert corrections_from_dataframe(None) == {}
+
+
+def test_apply_recognition_corrections():
+    file_content = json.dumps(
+        [
+            {"speaker": "SPEAKER_00", "message": "обновим джира"},
+            {"speaker": "SPEAKER_01", "message": "и конфлюенс"},
+        ],
+        ensure_ascii=False,
+    )
+    corrected, replacements = apply_recognition_corrections(
+        file_content, {"джира": "Jira", "конфлюенс": "Confluence"}
+    )
+    assert replacements == 2
+    assert [turn["message"] for turn in json.loads(corrected)] == [
+        "обновим Jira",
+        "и Confluence",
+    ]
+    assert apply_recognition_corrections(file_content, {}) == (file_content, 0)
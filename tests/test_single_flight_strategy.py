@@ -0,0 +1,135 @@
+import threading
+from chat_strategies.chat_model_strategy import ChatModelStrategy
+from chat_strategies.single_flight_strategy import (
+    CoalescedRequestError,
+    SingleFlightChatStrategy,
+)
+from utils.metrics import MetricsRegistry
+
+
+class RateLimitError(Exception):
+    pass
+
+
+class StatusError(Exception):
+    def __init__(self, message, *, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class UncopyableError(Exception):
+    def __new__(cls, *, code):
+        return super().__new__(cls)
+
+    def __init__(self, *, code):
+        super().__init__(f"error {code}")
+
+
+class FakeStrategy(ChatModelStrategy):
+    provider_name = "fake"
+
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def get_models(self):
+        return ["model"]
+
+    def get_output_max_tokens(self, model_name):
+        return 100
+
+    def get_input_tokens(self):
+        return self.input_tokens
+
+    def get_output_tokens(self):
+        return self.output_tokens
+
+    def get_cache_create_tokens(self):
+        return 0
+
+    def get_cache_read_tokens(self):
+        return 0
+
+    def get_full_price(self):
+        return 1.0
+
+    def get_input_price(self, model_name):
+        return 1.0
+
+    def send_message(
+        self, system_prompt, messages, model_name, max_tokens, temperature
+    ):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(10)
+        if self.error is not None:
+            raise self.error
+        self.input_tokens, self.output_tokens, self.reasoning_tokens = 10, 5, 3
+        return "ответ"
+
+    def send_structured_message(self, *args, **kwargs):
+        raise NotImplementedError
+
+
+def run_coalesced(strategy):
+    """Отправляет два одинаковых запроса: второй ждет результат первого"""
+    single_flight = SingleFlightChatStrategy(strategy)
+    outcomes = {}
+
+    def send(name):
+        try:
+            outcomes[name] = single_flight.send_message("system", [], "model", 10, 0.0)
+        except BaseException as e:
+            outcomes[name] = e
+        outcomes[f"{name}_reasoning_tokens"] = single_flight.reasoning_tokens
+
+    leader = threading.Thread(target=send, args=("leader",))
+    leader.start()
+    assert strategy.started.wait(10)
+    waiter = threading.Thread(target=send, args=("waiter",))
+    waiter.start()
+    # Ожидающий поток не вызывает провайдера
+    waiter.join(0.2)
+    strategy.release.set()
+    leader.join(10)
+    waiter.join(10)
+    return outcomes
+
+
+def test_usage_attributed_to_leader():
+    strategy = FakeStrategy()
+    outcomes = run_coalesced(strategy)
+    assert strategy.calls == 1
+    assert outcomes["leader"] == outcomes["waiter"] == "ответ"
+    assert outcomes["leader_reasoning_tokens"] == 3
+    assert outcomes["waiter_reasoning_tokens"] == 0
+
+
+def test_waiter_gets_error_of_original_type():
+    error = RateLimitError("too many requests")
+    outcomes = run_coalesced(FakeStrategy(error))
+    assert outcomes["leader"] is error
+    assert type(outcomes["waiter"]) is RateLimitError
+    assert outcomes["waiter"] is not error
+    assert outcomes["waiter"].__cause__ is error
+
+
+def test_waiter_error_copies_attributes():
+    error = StatusError("bad request", status_code=400)
+    outcomes = run_coalesced(FakeStrategy(error))
+    assert type(outcomes["waiter"]) is StatusError
+    assert outcomes["waiter"].status_code == 400
+    assert str(outcomes["waiter"]) == "bad request"
+
+
+def test_waiter_error_fallback_keeps_metric_label():
+    error = UncopyableError(code=1)
+    outcomes = run_coalesced(FakeStrategy(error))
+    assert type(outcomes["waiter"]) is CoalescedRequestError
+    assert outcomes["waiter"].__cause__ is error
+
+    metrics = MetricsRegistry()
+    metrics.record_error("fake", "model", outcomes["waiter"], 0.0)
+    assert "UncopyableError" in metrics.render_prometheus()
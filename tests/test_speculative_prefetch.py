@@ -0,0 +1,39 @@
+import threading
+from utils.speculative_prefetch import SpeculativePrefetcher
+
+
+def run_step(started, release, price):
+    started.set()
+    release.wait(10)
+    return "ответ", {"full_price": price}
+
+
+def test_discarded_cost_of_started_tasks():
+    prefetcher = SpeculativePrefetcher(max_workers=1)
+    started, release = threading.Event(), threading.Event()
+    prefetcher.prefetch("session", "first", run_step, started, release, 1.0)
+    assert started.wait(10)
+
+    # Задача "second" не начнется, пока выполняется "first", и отменяется без затрат
+    prefetcher.prefetch("session", "second", run_step, threading.Event(), release, 2.0)
+    prefetcher.prefetch("session", "third", run_step, threading.Event(), release, 4.0)
+    release.set()
+    prefetcher._executor.shutdown(wait=True)
+
+    assert prefetcher.take_discarded_cost("session") == 1.0
+    assert prefetcher.take_discarded_cost("session") == 0.0
+    assert prefetcher.take_discarded_cost("other") == 0.0
+    assert prefetcher.take("session", "third") == ("ответ", {"full_price": 4.0})
+
+
+def test_cancel_finished_task():
+    prefetcher = SpeculativePrefetcher(max_workers=1)
+    started, release = threading.Event(), threading.Event()
+    release.set()
+    prefetcher.prefetch("session", "key", run_step, started, release, 1.0)
+    prefetcher._executor.shutdown(wait=True)
+    assert prefetcher.status("session") == "done"
+
+    prefetcher.cancel("session")
+    assert prefetcher.take("session", "key") is None
+    assert prefetcher.take_discarded_cost("session") == 1.0
@@ -0,0 +1,93 @@
+import json
+from processing.summary_coverage import (
+    COVERED_THRESHOLD,
+    select_uncovered_segments,
+    summary_sentences,
+    turn_coverage,
+)
+from utils.common import count_tokens
+
+MEETING = [
+    "Обсуждаем миграцию базы на новый кластер",
+    "Кластер для миграции готов к субботе",
+    "Миграцию базы начнем ночью в субботу",
+    "Нужен план отката для миграции базы",
+    "Бюджет проекта утвердили на квартал",
+    "Бюджет квартала включает новый кластер",
+    "Отчет по бюджету пришлю завтра утром",
+    "Заказчик согласовал окно работ ночью",
+]
+
+SUMMARY = """## Итоги
+- Миграцию базы на новый кластер начнем ночью в субботу.
+- Нужен план отката для миграции базы!
+"""
+
+
+def make_transcript(messages):
+    return json.dumps(
+        [
+            {"speaker": f"SPEAKER_0{index % 2}", "message": message}
+            for index, message in enumerate(messages)
+        ],
+        ensure_ascii=False,
+        indent=2,
+    )
+
+
+def test_summary_sentences():
+    assert summary_sentences("Первое. Второе!\n\n- Третье\n---\n") == [
+        "Первое.",
+        "Второе!",
+        "- Третье",
+    ]
+
+
+def test_turn_coverage():
+    coverage = turn_coverage(MEETING + ["..."], SUMMARY)
+    assert coverage[2] == coverage[3] == 1.0
+    assert coverage[6] == 0.0
+    assert max(coverage[4:8]) < COVERED_THRESHOLD < coverage[0] < 1.0
+    # Реплики без терминов считаются покрытыми
+    assert coverage[-1] == 1.0
+    assert not turn_coverage(MEETING, "").any()
+
+
+def test_select_uncovered_segments():
+    file_content = make_transcript(MEETING)
+    segment_tokens = [
+        count_tokens(
+            json.dumps(
+                json.loads(file_content)[start : start + 4],
+                ensure_ascii=False,
+                indent=2,
+            )
+        )
+        for start in (0, 4)
+    ]
+    segments, report = select_uncovered_segments(
+        file_content, SUMMARY, token_budget=max(segment_tokens), segment_turns=4
+    )
+    # Бюджета хватает на один фрагмент: отбирается хуже отраженный в итогах (бюджет)
+    assert [turn["message"] for turn in json.loads(segments)] == MEETING[4:]
+    assert report["turns_total"] == len(MEETING)
+    assert report["turns_selected"] == 4
+    assert 0 < report["tokens_selected"] < report["tokens_total"]
+
+
+def test_select_uncovered_segments_budget():
+    file_content = make_transcript(MEETING)
+    segments, report = select_uncovered_segments(
+        file_content, "", token_budget=1, segment_turns=4
+    )
+    assert json.loads(segments) == []
+    assert report["turns_selected"] == report["tokens_selected"] == 0
+
+
+def test_everything_covered():
+    file_content = make_transcript(MEETING)
+    segments, report = select_uncovered_segments(file_content, "\n".join(MEETING))
+    assert json.loads(segments) == []
+    assert report["turns_selected"] == 0
+    segments, report = select_uncovered_segments("[]", SUMMARY)
+    assert json.loads(segments) == []
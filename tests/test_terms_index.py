@@ -0,0 +1,86 @@
+import json
+import pytest
+from processing.terms_index import (
+    TermsIndex,
+    extract_term_key,
+    normalize_token,
+    select_relevant_terms,
+)
+
+TERMS = """# Словарь терминов
+Jira - трекер задач
+SAP ERP — система учета
+Kubernetes: оркестратор контейнеров
+- **Confluence** - вики
+Apache Kafka - брокер сообщений
+"""
+
+TABLE_TERMS = """| Термин | Описание |
+|:-------|----------|
+| Jira | трекер задач |
+| Confluence | вики |
+"""
+
+
+def make_transcript(*messages):
+    return json.dumps(
+        [{"speaker": "SPEAKER_00", "message": message} for message in messages],
+        ensure_ascii=False,
+    )
+
+
+@pytest.mark.parametrize(
+    "line, expected",
+    [
+        ("Jira - трекер задач", "Jira"),
+        ("SAP ERP — система учета", "SAP ERP"),
+        ("Kubernetes: оркестратор", "Kubernetes"),
+        ("- **Confluence** - вики", "Confluence"),
+        ("| Apache Kafka | брокер |", "Apache Kafka"),
+        ("Termin\tописание", "Termin"),
+    ],
+)
+def test_extract_term_key(line, expected):
+    assert extract_term_key(line) == expected
+
+
+def test_normalize_token_matches_transliteration():
+    assert normalize_token("джира") == normalize_token("Jira")
+    assert normalize_token("кубернетис") != normalize_token("Kubernetes")
+
+
+def test_select_relevant_terms_exact_and_fuzzy():
+    selected, selected_cnt, total_cnt = select_relevant_terms(
+        TERMS, make_transcript("Заведи задачу в джира", "разверни в кубернетис")
+    )
+    assert selected.splitlines() == [
+        "Jira - трекер задач",
+        "Kubernetes: оркестратор контейнеров",
+    ]
+    assert (selected_cnt, total_cnt) == (2, 5)
+
+
+def test_multiword_terms_need_all_words():
+    selected, selected_cnt, _ = select_relevant_terms(
+        TERMS, make_transcript("сообщения идут через кафку")
+    )
+    assert selected_cnt == 0
+    selected, selected_cnt, _ = select_relevant_terms(
+        TERMS, make_transcript("используем apache kafka")
+    )
+    assert selected == "Apache Kafka - брокер сообщений"
+
+
+def test_table_header_and_separator_are_not_entries():
+    index = TermsIndex(TABLE_TERMS)
+    assert index.entry_terms == ["Jira", "Confluence"]
+    selected, selected_cnt, total_cnt = select_relevant_terms(
+        TABLE_TERMS, make_transcript("Термин из джира")
+    )
+    assert selected == "| Jira | трекер задач |"
+    assert (selected_cnt, total_cnt) == (1, 2)
+
+
+def test_plain_text_transcript():
+    _, selected_cnt, _ = select_relevant_terms(TERMS, "обсудили confluence")
+    assert selected_cnt == 1
@@ -0,0 +1,74 @@
+import json
+import pandas as pd
+import pytest
+from processing.transcript_cleaning import (
+    DEFAULT_CLEANING_CONFIG,
+    clean_messages,
+    clean_transcript,
+)
+
+
+def make_transcript(*turns):
+    return json.dumps(
+        [{"speaker": speaker, "message": message} for speaker, message in turns],
+        ensure_ascii=False,
+    )
+
+
+def cleaned_turns(*turns, **config):
+    content, mapping, report = clean_transcript(make_transcript(*turns), config)
+    return [(turn["speaker"], turn["message"]) for turn in json.loads(content)], mapping
+
+
+@pytest.mark.parametrize(
+    "message, expected",
+    [
+        ("да-да-да, задачу задачу сделаем", "да, задачу сделаем"),
+        ("я думаю, я думаю, что так", "я думаю, что так"),
+        ("ну это, э, как бы важно", "это, важно"),
+        ("что что-то пошло не так", "что что-то пошло не так"),
+        ("Бюджет 2 2 миллиона", "Бюджет 2 2 миллиона"),
+        ("код 12-12 и версия 3 3", "код 12-12 и версия 3 3"),
+    ],
+)
+def test_clean_messages(message, expected):
+    cleaned = clean_messages(pd.Series([message]), DEFAULT_CLEANING_CONFIG)
+    assert cleaned.iloc[0] == expected
+
+
+def test_answers_to_questions_are_kept():
+    turns, mapping = cleaned_turns(
+        ("A", "Вы согласны перенести релиз?"),
+        ("B", "Согласен."),
+        ("A", "Бюджет 2 2 миллиона, верно?"),
+        ("B", "Да."),
+    )
+    assert turns == [
+        ("A", "Вы согласны перенести релиз?"),
+        ("B", "Согласен."),
+        ("A", "Бюджет 2 2 миллиона, верно?"),
+        ("B", "Да."),
+    ]
+    assert mapping == [[0], [1], [2], [3]]
+
+
+def test_backchannels_are_merged_into_turns():
+    turns, mapping = cleaned_turns(
+        ("B", "угу"),
+        ("A", "Первая часть отчета готова"),
+        ("B", "да-да"),
+        ("A", "вторая будет завтра."),
+        ("B", "Понятно."),
+    )
+    assert turns == [("A", "Первая часть отчета готова. вторая будет завтра.")]
+    assert mapping == [[0, 1, 2, 3, 4]]
+
+
+def test_only_direct_answers_are_kept():
+    content, mapping, report = clean_transcript(
+        make_transcript(("A", "Начнем?"), ("B", "Да"), ("A", "Хорошо")), {}
+    )
+    assert [turn["message"] for turn in json.loads(content)] == ["Начнем?", "Да"]
+    assert mapping == [[0], [1, 2]]
+    assert report["turns_before"] == 3
+    assert report["turns_after"] == 2